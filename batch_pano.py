@@ -0,0 +1,190 @@
+# batch_pano.py (Pemrosesan Banyak Video Secara Paralel)
+#
+# Menyebar banyak file video, atau segmen waktu dari satu video panjang, ke
+# process pool. Setiap worker menjalankan logika pelacakan dan slit-capture
+# yang sama dengan `panoVideo.py --headless`. Contoh:
+#   python batch_pano.py shift1.mp4 shift2.mp4 --output-dir hasil --workers 4
+#   python batch_pano.py rekaman_panjang.mp4 --segments 8 --output-dir hasil
+
+import argparse
+import csv
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+
+from panoVideo import proses_video
+from tiled_writer import TiledPanoramaWriter, TiledPanoramaReader, INDEX_FILE
+from tracker import TRACKER_FULL
+from displacement import ESTIMATOR_MODES
+
+DEFAULT_WARMUP_FRAMES = 30  # Frame pemanasan pelacak sebelum awal setiap segmen
+
+
+def hitung_segmen(video_path, segments, segment_seconds):
+    # Bagi video menjadi rentang [start, end) berdasarkan jumlah frame
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError(f"Tidak bisa membuka file video '{video_path}'")
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    cap.release()
+
+    if segment_seconds and fps > 0:
+        segment_length = max(1, int(round(segment_seconds * fps)))
+    elif segments > 1 and total_frames > 0:
+        segment_length = -(-total_frames // segments)
+    else:
+        return [(0, None)]
+
+    if total_frames <= 0:
+        return [(0, None)]
+    return [(start, min(start + segment_length, total_frames))
+            for start in range(0, total_frames, segment_length)]
+
+
+def _init_worker():
+    # Satu proses = satu core; cegah OpenCV membuat thread tambahan per worker
+    cv2.setNumThreads(1)
+
+
+def _worker(job):
+    # Dijalankan di proses terpisah; panorama segmen ditulis sebagai tile agar
+    # memori worker tetap dan panorama besar tidak perlu dikirim lewat pickle.
+    video_path, start_frame, end_frame, warmup_frames, tiles_dir, log_path, tracker_mode = job
+    hasil = proses_video(video_path, headless=True, speed_log_path=log_path, stream_dir=tiles_dir,
+                         start_frame=start_frame, end_frame=end_frame, warmup_frames=warmup_frames,
+                         tracker_mode=tracker_mode)
+    if hasil is None:
+        raise IOError(f"Tidak bisa membuka file video '{video_path}'")
+    return job, hasil
+
+
+def sambung_panorama(segment_dirs, tiles_dir, output_path):
+    # Satukan tile per segmen sesuai urutan waktu, satu tile demi satu tile,
+    # lalu susun gambar akhir lewat memmap (TiledPanoramaReader.assemble):
+    # memori tidak bergantung pada panjang video.
+    writer = None
+    for directory in segment_dirs:
+        if not os.path.exists(os.path.join(directory, INDEX_FILE)):
+            continue  # Segmen tanpa kolom terpindai
+        reader = TiledPanoramaReader(directory)
+        if writer is None:
+            writer = TiledPanoramaWriter(tiles_dir, reader.height, channels=reader.channels)
+        for tile in reader.index["tiles"]:
+            writer.append(reader.read_columns(tile["start"], tile["start"] + tile["width"]))
+    if writer is None:
+        return 0
+    writer.close()
+    if writer.width <= 1:
+        return 0
+    TiledPanoramaReader(tiles_dir).assemble(output_path)
+    return writer.width
+
+
+def nama_keluaran(video_paths):
+    # Nama dasar file keluaran per video. Basename yang sama dari folder berbeda
+    # (a/cam.avi, b/cam.avi) diberi akhiran indeks masukan agar tidak saling timpa.
+    stems = [os.path.splitext(os.path.basename(p))[0] for p in video_paths]
+    return [f"{stem}_{idx:03d}" if stems.count(stem) > 1 else stem for idx, stem in enumerate(stems)]
+
+
+def sambung_log(log_paths, output_path):
+    # Gabungkan log kecepatan per segmen, header hanya ditulis sekali
+    with open(output_path, "w", newline="") as out:
+        writer = csv.writer(out)
+        header_written = False
+        for path in log_paths:
+            with open(path, newline="") as f:
+                reader = csv.reader(f)
+                header = next(reader, None)
+                if header is not None and not header_written:
+                    writer.writerow(header)
+                    header_written = True
+                writer.writerows(reader)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pemindai slit-scan paralel untuk banyak video.")
+    parser.add_argument("inputs", nargs="+", help="File video masukan")
+    parser.add_argument("--output-dir", default=".", help="Folder untuk panorama dan log kecepatan")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Jumlah proses worker")
+    parser.add_argument("--segments", type=int, default=1, help="Bagi setiap video menjadi N segmen")
+    parser.add_argument("--segment-seconds", type=float, default=None,
+                        help="Panjang segmen dalam detik (menggantikan --segments)")
+    parser.add_argument("--warmup-frames", type=int, default=DEFAULT_WARMUP_FRAMES,
+                        help="Frame pemanasan pelacak sebelum awal tiap segmen")
+    parser.add_argument("--tracker", choices=ESTIMATOR_MODES, default=TRACKER_FULL, help="Mode pelacak")
+    args = parser.parse_args()
+
+    real_paths = [os.path.realpath(p) for p in args.inputs]
+    duplicates = sorted({p for p, real in zip(args.inputs, real_paths) if real_paths.count(real) > 1})
+    if duplicates:
+        parser.error(f"Video yang sama disebut lebih dari sekali: {', '.join(duplicates)}")
+    stems = nama_keluaran(args.inputs)
+    if len(set(stems)) != len(stems):
+        parser.error("Nama keluaran bentrok setelah diberi akhiran indeks; ganti nama file masukan")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    temp_dir = tempfile.mkdtemp(prefix="batch_pano_")
+
+    # --- SUSUN DAFTAR PEKERJAAN ---
+    # File sementara diberi awalan indeks masukan, jadi tidak bergantung pada nama file
+    jobs = []
+    per_input = []
+    for idx, (video_path, stem) in enumerate(zip(args.inputs, stems)):
+        ranges = hitung_segmen(video_path, args.segments, args.segment_seconds)
+        info = {"path": video_path, "stem": stem, "prefix": f"{idx:03d}_{stem}", "segments": []}
+        per_input.append(info)
+        for i, (start, end) in enumerate(ranges):
+            tiles_dir = os.path.join(temp_dir, f"{info['prefix']}_{i:04d}")
+            log_path = os.path.join(temp_dir, f"{info['prefix']}_{i:04d}.csv")
+            warmup = args.warmup_frames if start > 0 else 0
+            job = (video_path, start, end, warmup, tiles_dir, log_path, args.tracker)
+            jobs.append(job)
+            info["segments"].append(job)
+
+    workers = max(1, min(args.workers, len(jobs)))
+    print(f"{len(args.inputs)} video, {len(jobs)} pekerjaan, {workers} worker.")
+
+    # --- JALANKAN DI PROCESS POOL ---
+    start_time = time.time()
+    total_frames = 0
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            futures = [pool.submit(_worker, job) for job in jobs]
+            for future in as_completed(futures):
+                job, hasil = future.result()
+                # Frame pemanasan didekode dua kali, jadi tidak dihitung sebagai throughput
+                total_frames += hasil["frames_in_range"]
+                print(f"Selesai: {job[0]} frame {job[1]}-{job[2]} "
+                      f"({hasil['frames_in_range']} frame, {hasil['columns']} kolom)")
+
+        # --- SAMBUNG HASIL PER VIDEO ---
+        for info in per_input:
+            video_path = info["path"]
+            segments = info["segments"]
+            image_path = os.path.join(args.output_dir, f"{info['stem']}_pano.png")
+            log_path = os.path.join(args.output_dir, f"{info['stem']}_speed.csv")
+            columns = sambung_panorama([job[4] for job in segments],
+                                       os.path.join(temp_dir, f"{info['prefix']}_pano"), image_path)
+            sambung_log([job[5] for job in segments], log_path)
+            if columns > 0:
+                print(f"{video_path}: panorama {columns} kolom -> {image_path}, log -> {log_path}")
+            else:
+                print(f"{video_path}: tidak ada kolom yang terpindai, log -> {log_path}")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    elapsed = time.time() - start_time
+    fps = total_frames / elapsed if elapsed > 0 else 0.0
+    print("-------------------------------------")
+    print(f"Total: {total_frames} frame dalam {elapsed:.2f} s = {fps:.1f} fps "
+          f"({fps / workers:.1f} fps per core, {workers} worker)")
+
+
+if __name__ == "__main__":
+    main()
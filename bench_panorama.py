@@ -0,0 +1,74 @@
+# bench_panorama.py (Benchmark Akumulator Panorama)
+#
+# Membandingkan biaya append per kolom antara PanoramaBuffer dan pola lama
+# `np.concatenate`. Contoh:
+#   python bench_panorama.py --columns 200000 --height 480
+
+import argparse
+import time
+
+import numpy as np
+
+from panorama_buffer import PanoramaBuffer
+
+
+def bench_buffer(height, total_columns, report_every):
+    buffer = PanoramaBuffer(height)
+    irisan = np.full((height, 1, 3), 128, dtype=np.uint8)
+    hasil = []
+
+    start = time.perf_counter()
+    chunk_start = start
+    for i in range(1, total_columns + 1):
+        buffer.append(irisan)
+        if i % report_every == 0:
+            now = time.perf_counter()
+            hasil.append((i, (now - chunk_start) / report_every * 1e6))
+            chunk_start = now
+    total = time.perf_counter() - start
+    return hasil, total
+
+
+def bench_concatenate(height, total_columns, report_every):
+    irisan = np.full((height, 1, 3), 128, dtype=np.uint8)
+    hasil_scan = irisan
+    hasil = []
+
+    start = time.perf_counter()
+    chunk_start = start
+    for i in range(2, total_columns + 1):
+        hasil_scan = np.concatenate((hasil_scan, irisan), axis=1)
+        if i % report_every == 0:
+            now = time.perf_counter()
+            hasil.append((i, (now - chunk_start) / report_every * 1e6))
+            chunk_start = now
+    total = time.perf_counter() - start
+    return hasil, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark append kolom panorama.")
+    parser.add_argument("--height", type=int, default=480, help="Tinggi frame (piksel)")
+    parser.add_argument("--columns", type=int, default=100000, help="Jumlah kolom untuk PanoramaBuffer")
+    parser.add_argument("--concat-columns", type=int, default=5000,
+                        help="Jumlah kolom untuk pola np.concatenate lama (0 = lewati)")
+    parser.add_argument("--report-every", type=int, default=10000, help="Interval laporan (kolom)")
+    args = parser.parse_args()
+
+    print(f"PanoramaBuffer: {args.columns} kolom, tinggi {args.height}")
+    hasil, total = bench_buffer(args.height, args.columns, args.report_every)
+    for kolom, us in hasil:
+        print(f"  kolom {kolom:>8}: {us:8.2f} us/append")
+    print(f"  total {total:.3f} s ({total / args.columns * 1e6:.2f} us/append rata-rata)")
+
+    if args.concat_columns > 0:
+        report_every = max(1, min(args.report_every, args.concat_columns // 5))
+        print(f"np.concatenate: {args.concat_columns} kolom, tinggi {args.height}")
+        hasil, total = bench_concatenate(args.height, args.concat_columns, report_every)
+        for kolom, us in hasil:
+            print(f"  kolom {kolom:>8}: {us:8.2f} us/append")
+        print(f"  total {total:.3f} s ({total / args.concat_columns * 1e6:.2f} us/append rata-rata)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+# bench_slitscan.py (Benchmark Sintetis Jalur Pelacakan dan Slit-Scan)
+#
+# Merender video sintetis (tekstur bergerak horizontal dengan kecepatan yang
+# diketahui dan bervariasi) di beberapa resolusi, lalu menjalankan logika
+# pelacakan, perhitungan kecepatan, dan capture panorama dari panoVideo.py
+# tanpa GUI. Hasil (fps, persentil latensi per frame, peak RSS, dan galat
+# kecepatan terhadap ground truth) ditulis sebagai JSON. Contoh:
+#   python bench_slitscan.py --resolutions 480p,1080p --trackers full,predictive,lk
+#   python bench_slitscan.py --frames 300 --output hasil_bench.json
+
+import argparse
+import contextlib
+import csv
+import io
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from panoVideo import proses_video, PIXELS_PER_METER
+from displacement import ESTIMATOR_MODES
+
+RESOLUTIONS = {
+    "480p": (640, 480),
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+    "4k": (3840, 2160),
+}
+DEFAULT_FPS = 30.0
+DEFAULT_BASE_SPEED_PX = 6.0   # Rata-rata pergeseran per frame pada 480p (diskalakan per resolusi)
+DEFAULT_SPEED_VARIATION = 0.5 # Amplitudo variasi kecepatan relatif
+SPEED_PERIOD_FRAMES = 90      # Periode variasi kecepatan
+DEFAULT_NOISE_SIGMA = 2.0     # Derau sensor (simpangan baku, level abu-abu)
+
+
+class SyntheticFrameSource:
+    """Sumber frame sintetis dengan antarmuka yang sama dengan ThreadedFrameSource.
+
+    Frame dirender di thread pemanggil saat `read()`; waktu render tidak ikut
+    dihitung. Latensi per frame adalah selang antara `read()` mengembalikan
+    frame dan `read()` berikutnya dipanggil, yaitu waktu proses frame itu.
+    """
+
+    def __init__(self, width, height, num_frames, fps=DEFAULT_FPS,
+                 base_speed_px=DEFAULT_BASE_SPEED_PX, speed_variation=DEFAULT_SPEED_VARIATION,
+                 noise_sigma=DEFAULT_NOISE_SIGMA, seed=0):
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.num_frames = num_frames
+
+        rng = np.random.default_rng(seed)
+        texture_width = width * 2
+        noise = rng.integers(0, 256, (height, texture_width, 3), dtype=np.uint8)
+        self.texture = cv2.GaussianBlur(noise, (5, 5), 0)
+
+        # Posisi tekstur (piksel bulat) per frame; pergeseran per frame = ground truth
+        i = np.arange(num_frames)
+        velocity = base_speed_px * (1.0 + speed_variation * np.sin(2 * math.pi * i / SPEED_PERIOD_FRAMES))
+        self.positions = np.round(np.cumsum(velocity)).astype(np.int64)
+        self._columns = np.arange(width)
+        self.noise_sigma = noise_sigma
+        self._noise = np.empty((height, width, 3), dtype=np.int16)
+
+        self._index = 0
+        self._last_return = None
+        self.latencies = []
+
+    def isOpened(self):
+        return True
+
+    def start(self):
+        return self
+
+    def ground_truth_kmh(self, frame_index):
+        if frame_index == 0:
+            return 0.0
+        dx = abs(int(self.positions[frame_index] - self.positions[frame_index - 1]))
+        return dx * self.fps / PIXELS_PER_METER * 3.6
+
+    def read(self, timeout=None):
+        now = time.perf_counter()
+        if self._last_return is not None:
+            self.latencies.append(now - self._last_return)
+        if self._index >= self.num_frames:
+            self._last_return = None
+            return False, None, None, None
+
+        i = self._index
+        # Tekstur bergeser ke kanan: kolom c menampilkan tekstur di (c - x) mod lebar
+        idx = (self._columns - self.positions[i]) % self.texture.shape[1]
+        frame = np.take(self.texture, idx, axis=1)
+        if self.noise_sigma > 0:
+            cv2.randn(self._noise, 0, self.noise_sigma)
+            frame = cv2.add(frame, self._noise, dtype=cv2.CV_8U)
+        self._index += 1
+        self._last_return = time.perf_counter()
+        return True, frame, i / self.fps, i
+
+    def stats(self):
+        return {"captured": self._index, "consumed": self._index, "dropped": 0,
+                "queue_depth": 0, "max_queue_depth": 0}
+
+    def release(self):
+        pass
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux melaporkan KB, macOS melaporkan byte
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _percentile_ms(values, p):
+    return float(np.percentile(values, p) * 1000) if len(values) else None
+
+
+def jalankan_kasus(resolution, tracker_mode, num_frames, seed, noise_sigma=DEFAULT_NOISE_SIGMA):
+    # Dijalankan di proses baru agar peak RSS tiap kasus terpisah
+    cv2.setNumThreads(1)
+    width, height = RESOLUTIONS[resolution]
+    scale = width / RESOLUTIONS["480p"][0]
+    source = SyntheticFrameSource(width, height, num_frames, base_speed_px=DEFAULT_BASE_SPEED_PX * scale,
+                                  noise_sigma=noise_sigma, seed=seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log_path = os.path.join(tmp, "speed.csv")
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            hasil = proses_video(f"synthetic-{resolution}", headless=True, speed_log_path=log_path,
+                                 tracker_mode=tracker_mode, frame_source=source)
+        elapsed = time.perf_counter() - start
+        with open(log_path, newline="") as f:
+            rows = list(csv.DictReader(f))
+
+    # --- GALAT KECEPATAN TERHADAP GROUND TRUTH ---
+    errors = []
+    for row in rows:
+        measured = float(row["kecepatan_sesaat_kmh"])
+        if measured > 0:
+            errors.append(measured - source.ground_truth_kmh(int(row["frame"])))
+    errors = np.array(errors)
+    truth = np.array([source.ground_truth_kmh(i) for i in range(1, num_frames)])
+
+    latencies = np.array(source.latencies)
+    return {
+        "resolution": resolution,
+        "width": width,
+        "height": height,
+        "tracker": tracker_mode,
+        "frames": hasil["frames"],
+        "elapsed_s": elapsed,
+        # fps = hanya waktu proses; wall_fps ikut menghitung waktu render frame sintetis
+        "fps": len(latencies) / latencies.sum() if latencies.sum() > 0 else None,
+        "wall_fps": hasil["frames"] / elapsed if elapsed > 0 else None,
+        "latency_ms": {
+            "mean": float(latencies.mean() * 1000) if len(latencies) else None,
+            "p50": _percentile_ms(latencies, 50),
+            "p90": _percentile_ms(latencies, 90),
+            "p99": _percentile_ms(latencies, 99),
+            "max": float(latencies.max() * 1000) if len(latencies) else None,
+        },
+        "peak_rss_mb": _peak_rss_mb(),
+        "panorama_columns": hasil["columns"],
+        "ground_truth_travel_px": int(abs(source.positions[-1] - source.positions[0])),
+        "speed_error_kmh": {
+            "samples": int(len(errors)),
+            "coverage": len(errors) / max(1, num_frames - 1),
+            "mean_abs": float(np.abs(errors).mean()) if len(errors) else None,
+            "rmse": float(np.sqrt((errors ** 2).mean())) if len(errors) else None,
+            "bias": float(errors.mean()) if len(errors) else None,
+            "mean_ground_truth": float(truth.mean()) if len(truth) else None,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sintetis pelacakan dan slit-scan.")
+    parser.add_argument("--resolutions", default=",".join(RESOLUTIONS),
+                        help=f"Daftar resolusi dipisah koma ({', '.join(RESOLUTIONS)})")
+    parser.add_argument("--trackers", default=",".join(ESTIMATOR_MODES),
+                        help=f"Daftar mode pelacak dipisah koma ({', '.join(ESTIMATOR_MODES)})")
+    parser.add_argument("--frames", type=int, default=150, help="Jumlah frame per kasus")
+    parser.add_argument("--seed", type=int, default=0, help="Seed tekstur sintetis")
+    parser.add_argument("--noise", type=float, default=DEFAULT_NOISE_SIGMA, help="Derau sensor (sigma)")
+    parser.add_argument("--output", default="bench_slitscan.json", help="File JSON hasil")
+    args = parser.parse_args()
+
+    resolutions = [r.strip() for r in args.resolutions.split(",") if r.strip()]
+    trackers = [t.strip() for t in args.trackers.split(",") if t.strip()]
+    for r in resolutions:
+        if r not in RESOLUTIONS:
+            parser.error(f"Resolusi tidak dikenal: {r}")
+    for t in trackers:
+        if t not in ESTIMATOR_MODES:
+            parser.error(f"Mode pelacak tidak dikenal: {t}")
+
+    cases = []
+    for resolution in resolutions:
+        for tracker_mode in trackers:
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                hasil = pool.submit(jalankan_kasus, resolution, tracker_mode, args.frames, args.seed,
+                                     args.noise).result()
+            cases.append(hasil)
+            err = hasil["speed_error_kmh"]
+            mae = f"{err['mean_abs']:.3f}" if err["mean_abs"] is not None else "-"
+            print(f"{resolution:>6} {tracker_mode:>10}: {hasil['fps']:7.1f} fps, "
+                  f"p50 {hasil['latency_ms']['p50']:.2f} ms, p99 {hasil['latency_ms']['p99']:.2f} ms, "
+                  f"RSS {hasil['peak_rss_mb'] or 0:.0f} MB, galat {mae} km/jam "
+                  f"(cakupan {err['coverage']:.0%})")
+
+    report = {
+        "benchmark": "slitscan",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "platform": {"python": platform.python_version(), "opencv": cv2.__version__,
+                     "machine": platform.machine(), "system": platform.system()},
+        "frames_per_case": args.frames,
+        "seed": args.seed,
+        "noise_sigma": args.noise,
+        "cases": cases,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Hasil disimpan di: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# checkpoint.py (Checkpoint untuk Pemrosesan Rekaman Panjang)
+#
+# Menyimpan status pemrosesan secara berkala ke satu file .npz di folder
+# checkpoint, agar `panoVideo.py --headless` yang terhenti di tengah rekaman
+# berjam-jam bisa dilanjutkan dengan `--resume` (seek CAP_PROP_POS_FRAMES ke
+# frame berikutnya). Isi checkpoint:
+#   - indeks frame berikutnya dan identitas video (path, ukuran, fps)
+#   - status engine: pelacakan, template/titik fitur, akumulasi pergeseran,
+#     statistik kecepatan (SlitScanEngine.state_dict())
+#   - lebar panorama yang sudah ada di tile plus kolom tile yang belum penuh
+#   - posisi (byte) log kecepatan CSV/biner, agar baris sesudahnya dibuang
+#
+# Array disimpan sebagai entri npz, nilai lain sebagai JSON di entri
+# "__meta__", tanpa pickle. File ditulis ke file sementara lalu di-rename,
+# jadi checkpoint di disk selalu utuh. Checkpoint juga ditulis saat video
+# selesai, sehingga rekaman yang terus bertambah cukup diproses ulang dengan
+# `--resume`: hanya frame baru yang dibaca.
+
+import json
+import os
+import time
+
+import numpy as np
+
+CHECKPOINT_FILE = "checkpoint.npz"
+CHECKPOINT_VERSION = 1
+DEFAULT_CHECKPOINT_INTERVAL = 60.0  # Detik (jam dinding)
+TILES_DIR = "tiles"                 # Subfolder tile panorama jika --stream-dir tidak diberikan
+_META_KEY = "__meta__"
+_ARRAY_MARK = "__array__"
+
+
+def _pisah(state, arrays, prefix=""):
+    # Ganti setiap ndarray di dict bersarang dengan penanda, kumpulkan arraynya
+    if isinstance(state, dict):
+        return {k: _pisah(v, arrays, f"{prefix}{k}/") for k, v in state.items()}
+    if isinstance(state, np.ndarray):
+        key = prefix.rstrip("/")
+        arrays[key] = state
+        return {_ARRAY_MARK: key}
+    if isinstance(state, np.generic):
+        return state.item()
+    return state
+
+
+def _gabung(meta, arrays):
+    if isinstance(meta, dict):
+        if set(meta) == {_ARRAY_MARK}:
+            return arrays[meta[_ARRAY_MARK]]
+        return {k: _gabung(v, arrays) for k, v in meta.items()}
+    return meta
+
+
+def simpan_checkpoint(directory, state):
+    os.makedirs(directory, exist_ok=True)
+    arrays = {}
+    meta = _pisah(dict(state, version=CHECKPOINT_VERSION), arrays)
+    arrays[_META_KEY] = np.array(json.dumps(meta))
+    path = os.path.join(directory, CHECKPOINT_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **arrays)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def muat_checkpoint(directory):
+    """Kembalikan status checkpoint, atau None jika belum ada."""
+    path = os.path.join(directory, CHECKPOINT_FILE)
+    if not os.path.exists(path):
+        return None
+    with np.load(path, allow_pickle=False) as data:
+        arrays = {k: data[k] for k in data.files}
+    meta = json.loads(str(arrays.pop(_META_KEY)))
+    if meta.get("version") != CHECKPOINT_VERSION:
+        raise ValueError(f"Versi checkpoint tidak didukung: {meta.get('version')}")
+    return _gabung(meta, arrays)
+
+
+class Checkpointer:
+    """Menulis checkpoint setiap `interval_s` detik dari loop pemrosesan."""
+
+    def __init__(self, directory, video, settings, interval_s=DEFAULT_CHECKPOINT_INTERVAL):
+        self.directory = directory
+        self.video = video          # {"path", "width", "height", "fps"}
+        self.settings = settings    # Pengaturan yang harus sama saat resume
+        self.interval_s = interval_s
+        self.saved = 0
+        self._last_save = time.time()
+
+    def due(self):
+        return time.time() - self._last_save >= self.interval_s
+
+    def save(self, next_frame, engine, panorama, logs):
+        # Log di-flush dulu agar posisi byte yang dicatat sudah ada di disk
+        simpan_checkpoint(self.directory, {
+            "video": self.video,
+            "settings": self.settings,
+            "next_frame": next_frame,
+            "engine": engine.state_dict(),
+            "panorama": panorama.state_dict(),
+            "logs": logs,
+        })
+        self.saved += 1
+        self._last_save = time.time()
+
+
+def cek_kecocokan(state, video, settings):
+    """Kembalikan pesan error jika checkpoint dibuat untuk video/pengaturan lain."""
+    old = state["video"]
+    if (old["width"], old["height"]) != (video["width"], video["height"]):
+        return (f"Checkpoint dibuat untuk video {old['width']}x{old['height']}, "
+                f"bukan {video['width']}x{video['height']}")
+    for key, value in settings.items():
+        if state["settings"].get(key) != value:
+            return f"Checkpoint dibuat dengan {key}={state['settings'].get(key)!r}, bukan {value!r}"
+    if os.path.abspath(old["path"]) != os.path.abspath(video["path"]):
+        print(f"Peringatan: checkpoint dibuat dari '{old['path']}', dilanjutkan dengan '{video['path']}'")
+    return None
+
+
+def cek_log(path, size):
+    """Kembalikan pesan error jika log di `path` lebih pendek dari posisi di checkpoint."""
+    if path is None or size is None:
+        return None
+    actual = os.path.getsize(path) if os.path.exists(path) else None
+    if actual is None or actual < size:
+        found = "tidak ada" if actual is None else f"{actual} byte"
+        return (f"Log '{path}' tidak cocok dengan checkpoint (butuh minimal {size} byte, {found}); "
+                f"pakai file log yang sama seperti sebelum dihentikan")
+    return None
@@ -0,0 +1,267 @@
+# displacement.py (Estimator Pergeseran: Template Matching atau Optical Flow)
+#
+# SlitScanEngine hanya butuh satu hal per frame: berapa piksel objek bergeser
+# secara horizontal. Antarmuka estimator:
+#
+#   estimator.start(image, y_offset, timestamp) -> bool   (kunci objek di kotak tengah)
+#   estimator.update(image, y_offset, timestamp) -> (confidence, shift_x atau None)
+#   estimator.position                                     (kiri-atas kotak, koordinat frame)
+#   estimator.set_coarse(active)                           (mode murah saat beban tinggi)
+#   estimator.state_dict() / load_state(state)             (untuk checkpoint)
+#
+# `image` adalah frame BGR penuh, atau pita pencarian grayscale jika
+# `band_input=True` (mode ROI, baris pertamanya = baris `y_offset` frame).
+# `shift_x` None berarti pelacakan gagal di frame ini.
+
+import cv2
+import numpy as np
+
+from tracker import buat_tracker, TRACKER_FULL, TRACKER_PREDICTIVE, TemplateTracker
+
+# --- MODE ESTIMATOR ---
+ESTIMATOR_LK = "lk"  # Lucas-Kanade piramida pada titik fitur yang dilacak antar frame
+ESTIMATOR_MODES = (TRACKER_FULL, TRACKER_PREDICTIVE, ESTIMATOR_LK)
+
+MIN_TEMPLATE_TEXTURE = 20       # Varians Laplacian minimum agar kotak dianggap berisi objek
+COARSE_PYRAMID_LEVELS = 1       # Level piramida tambahan untuk template matching di mode kasar
+
+# --- PENGATURAN LUCAS-KANADE ---
+LK_MAX_FEATURES = 40            # Jumlah titik fitur maksimum saat seeding
+LK_MIN_FEATURES = 8             # Di bawah ini titik dianggap hilang dan di-seed ulang
+LK_MIN_TRACKED = 3              # Minimum titik valid agar pergeseran frame ini dipercaya
+LK_FEATURE_QUALITY = 0.01
+LK_FEATURE_MIN_DISTANCE = 5
+LK_WINDOW = (15, 15)
+LK_PYRAMID_LEVELS = 3
+LK_FB_THRESHOLD = 1.0           # Galat maju-mundur maksimum (piksel)
+LK_INLIER_THRESHOLD = 2.0       # Jarak maksimum dari median pergeseran (piksel)
+LK_CRITERIA = (cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03)
+
+
+class TemplateEstimator:
+    """Pergeseran dari template matching (pelacak `full` atau `predictive`).
+
+    Template diambil dari kotak tengah, diperbarui dari posisi yang cocok
+    setiap frame, dan butuh reset berkala agar tidak menumpuk drift.
+    """
+
+    needs_periodic_reset = True
+    start_stage = "laplacian"
+    update_stage = "match"
+
+    def __init__(self, mode, frame_width, frame_height, box_size=100, confidence_threshold=0.8,
+                 band_input=False):
+        self.tracker = buat_tracker(mode, frame_width, frame_height, box_size, confidence_threshold,
+                                    band_input=band_input)
+        self.band_y0, self.band_y1 = self.tracker.band_y0, self.tracker.band_y1
+        self.w = self.h = box_size
+        self.x_box_init = (frame_width - box_size) // 2
+        self.y_box_init = (frame_height - box_size) // 2
+        self.confidence_threshold = confidence_threshold
+        self.gray_input = band_input
+        self.position = None
+
+        # --- BUFFER PRAALOKASI ---
+        channels = () if band_input else (3,)
+        self._template = np.empty((box_size, box_size) + channels, dtype=np.uint8)
+        self._gray_template = self._template if band_input else np.empty((box_size, box_size), dtype=np.uint8)
+        self._laplacian = np.empty((box_size, box_size), dtype=np.float64)
+
+    def set_coarse(self, active):
+        # Pencarian dimulai satu level piramida lebih kecil, lalu diperhalus
+        self.tracker.coarse_levels = COARSE_PYRAMID_LEVELS if active else 0
+
+    def state_dict(self):
+        return {"template": self._template.copy(), "position": _posisi(self.position),
+                "tracker": self.tracker.state_dict()}
+
+    def load_state(self, state):
+        np.copyto(self._template, state["template"])
+        self.position = _posisi(state["position"])
+        self.tracker.load_state(state["tracker"])
+
+    def _copy_template(self, image, y_offset, x, y):
+        np.copyto(self._template, image[y - y_offset:y - y_offset + self.h, x:x + self.w])
+
+    def start(self, image, y_offset, timestamp):
+        x, y = self.x_box_init, self.y_box_init
+        self._copy_template(image, y_offset, x, y)
+        if not self.gray_input:
+            cv2.cvtColor(self._template, cv2.COLOR_BGR2GRAY, dst=self._gray_template)
+        cv2.Laplacian(self._gray_template, cv2.CV_64F, dst=self._laplacian)
+        _, std = cv2.meanStdDev(self._laplacian)
+        if std[0, 0] ** 2 <= MIN_TEMPLATE_TEXTURE:
+            return False
+        self.position = (x, y)
+        self.tracker.reset(self.position, timestamp)
+        return True
+
+    def update(self, image, y_offset, timestamp):
+        max_val, current_pos = self.tracker.match(image, self._template, self.position, timestamp)
+        if max_val < self.confidence_threshold:
+            self.position = None
+            return max_val, None
+        shift = current_pos[0] - self.position[0]
+        self.position = current_pos
+        self._copy_template(image, y_offset, *current_pos)
+        return max_val, shift
+
+
+class LKEstimator:
+    """Pergeseran dari optical flow Lucas-Kanade pada titik fitur (sparse).
+
+    Titik fitur (goodFeaturesToTrack) di kotak tengah dilacak dari frame ke
+    frame di pita pencarian grayscale. Pergeseran = median pergeseran titik
+    yang lolos cek maju-mundur, jadi tahan terhadap outlier dan bernilai
+    subpiksel. Pergeseran frame sebelumnya dipakai sebagai tebakan awal
+    (OPTFLOW_USE_INITIAL_FLOW) agar gerakan besar tetap terkejar; tepat
+    setelah seeding tebakan itu diambil dari phase correlation pita. Titik
+    hanya di-seed ulang dari kotak tengah saat jumlahnya turun di bawah
+    `LK_MIN_FEATURES` (misalnya keluar frame), tanpa reset berkala.
+
+    Di mode kasar (`set_coarse(True)`) pelacakan mundur dilewati, jadi biaya
+    optical flow per frame kira-kira setengahnya; outlier tetap disaring
+    oleh jarak ke median.
+    """
+
+    needs_periodic_reset = False
+    start_stage = "seed"
+    update_stage = "flow"
+
+    def __init__(self, frame_width, frame_height, box_size=100, band_input=False):
+        band = TemplateTracker(frame_width, frame_height, box_size)
+        self.band_y0, self.band_y1 = band.band_y0, band.band_y1
+        self.frame_width = frame_width
+        self.w = self.h = box_size
+        self.x_box_init = (frame_width - box_size) // 2
+        self.y_box_init = (frame_height - box_size) // 2
+        self.band_input = band_input
+        self.position = None
+        self.reseed_count = 0
+
+        # Dua buffer pita grayscale bergantian: frame sebelumnya dan sekarang
+        band_height = self.band_y1 - self.band_y0
+        self._gray = [np.empty((band_height, frame_width), dtype=np.uint8) for _ in range(2)]
+        self._current = 0
+        self._points = None
+        self._x = 0.0
+        self._y = 0.0
+        self._last_delta = np.zeros(2, dtype=np.float32)
+        self._has_delta = False
+        self.coarse = False
+
+    def set_coarse(self, active):
+        self.coarse = active
+
+    def state_dict(self):
+        return {"gray": self._gray[self._current].copy(), "points": self._points,
+                "x": self._x, "y": self._y, "last_delta": self._last_delta.copy(),
+                "has_delta": self._has_delta, "position": _posisi(self.position),
+                "reseed_count": self.reseed_count}
+
+    def load_state(self, state):
+        self._current = 0
+        np.copyto(self._gray[0], state["gray"])
+        self._points = state["points"]
+        self._x, self._y = state["x"], state["y"]
+        self._last_delta[:] = state["last_delta"]
+        self._has_delta = state["has_delta"]
+        self.position = _posisi(state["position"])
+        self.reseed_count = state["reseed_count"]
+
+    def _load(self, image):
+        # Salin/konversi pita ke buffer berikutnya dan kembalikan buffer itu
+        self._current ^= 1
+        dst = self._gray[self._current]
+        if self.band_input:
+            np.copyto(dst, image)
+        else:
+            cv2.cvtColor(image[self.band_y0:self.band_y1], cv2.COLOR_BGR2GRAY, dst=dst)
+        return dst
+
+    def _seed(self, gray):
+        # Cari titik fitur di kotak tengah (koordinat pita)
+        x, y = self.x_box_init, self.y_box_init - self.band_y0
+        corners = cv2.goodFeaturesToTrack(gray[y:y + self.h, x:x + self.w], LK_MAX_FEATURES,
+                                          LK_FEATURE_QUALITY, LK_FEATURE_MIN_DISTANCE)
+        if corners is None or len(corners) < LK_MIN_FEATURES:
+            self._points = None
+            return False
+        corners[:, 0, 0] += x
+        corners[:, 0, 1] += y
+        self._points = corners
+        self._x, self._y = float(self.x_box_init), float(self.y_box_init)
+        self.position = (self.x_box_init, self.y_box_init)
+        self._has_delta = False
+        return True
+
+    def _global_shift(self, prev, gray):
+        # Tebakan kasar pergeseran seluruh pita (hanya dipakai setelah seeding)
+        (dx, dy), _ = cv2.phaseCorrelate(prev.astype(np.float32), gray.astype(np.float32))
+        self._last_delta[:] = (dx, dy)
+
+    def start(self, image, y_offset, timestamp):
+        return self._seed(self._load(image))
+
+    def update(self, image, y_offset, timestamp):
+        if self._points is None or len(self._points) < LK_MIN_TRACKED:
+            self.position = None
+            return 0.0, None
+        prev = self._gray[self._current]
+        gray = self._load(image)
+        points = self._points
+        if not self._has_delta:
+            self._global_shift(prev, gray)
+        guess = points + self._last_delta
+        moved, status, _ = cv2.calcOpticalFlowPyrLK(prev, gray, points, guess, winSize=LK_WINDOW,
+                                                    maxLevel=LK_PYRAMID_LEVELS, criteria=LK_CRITERIA,
+                                                    flags=cv2.OPTFLOW_USE_INITIAL_FLOW)
+        valid = status.ravel() == 1
+        if not self.coarse:
+            back, back_status, _ = cv2.calcOpticalFlowPyrLK(gray, prev, moved, points.copy(),
+                                                            winSize=LK_WINDOW,
+                                                            maxLevel=LK_PYRAMID_LEVELS, criteria=LK_CRITERIA,
+                                                            flags=cv2.OPTFLOW_USE_INITIAL_FLOW)
+            fb_error = np.abs(points - back).max(axis=2).ravel()
+            valid &= (back_status.ravel() == 1) & (fb_error < LK_FB_THRESHOLD)
+        if np.count_nonzero(valid) < LK_MIN_TRACKED:
+            self.position = None
+            self._points = None
+            self._last_delta[:] = 0
+            return 0.0, None
+
+        delta = (moved - points)[valid, 0]
+        dx = float(np.median(delta[:, 0]))
+        dy = float(np.median(delta[:, 1]))
+        inliers = np.abs(delta - (dx, dy)).max(axis=1) < LK_INLIER_THRESHOLD
+        confidence = np.count_nonzero(inliers) / len(points)
+        self._last_delta[:] = (dx, dy)
+        self._has_delta = True
+
+        # Kotak mengikuti titik; posisi dibatasi agar tetap di dalam frame/pita
+        self._x = min(max(self._x + dx, 0.0), self.frame_width - self.w)
+        self._y = min(max(self._y + dy, self.band_y0), self.band_y1 - self.h)
+        self.position = (int(round(self._x)), int(round(self._y)))
+
+        self._points = moved[valid][inliers].reshape(-1, 1, 2)
+        if len(self._points) < LK_MIN_FEATURES:
+            # Titik hilang: seed ulang dari frame ini untuk frame berikutnya.
+            # Jika kotak tengah tidak bertekstur, sisa titik tetap dipakai.
+            self.reseed_count += 1
+            remaining = self._points
+            if not self._seed(gray):
+                self._points = remaining
+        return confidence, dx
+
+
+def _posisi(position):
+    # Posisi kotak sebagai tuple int (checkpoint menyimpannya sebagai list)
+    return None if position is None else (int(position[0]), int(position[1]))
+
+
+def buat_estimator(mode, frame_width, frame_height, box_size=100, confidence_threshold=0.8, band_input=False):
+    if mode == ESTIMATOR_LK:
+        return LKEstimator(frame_width, frame_height, box_size, band_input=band_input)
+    if mode in (TRACKER_FULL, TRACKER_PREDICTIVE):
+        return TemplateEstimator(mode, frame_width, frame_height, box_size, confidence_threshold, band_input)
+    raise ValueError(f"Mode estimator tidak dikenal: {mode!r} (pilih {ESTIMATOR_MODES})")
@@ -0,0 +1,178 @@
+# display.py (Tampilan Terpisah dari Pemrosesan)
+#
+# Bagian GUI yang dipakai bersama oleh pano.py dan panoVideo.py:
+# - DisplayLimiter membatasi refresh jendela ke N kali per detik, terlepas
+#   dari kecepatan loop pemrosesan.
+# - PanoramaView menampilkan ekor panorama (viewport) ditambah overview kecil
+#   seluruh pindaian yang diperbarui bertahap, jadi biaya render tetap sama
+#   berapa pun panjang panoramanya.
+# - gambar_overlay() menggambar status engine di atas frame kamera.
+
+import math
+import time
+
+import cv2
+import numpy as np
+
+from panorama_buffer import PanoramaBuffer
+from slitscan_engine import EVENT_TRACKING_START, EVENT_TRACKING_RESET, EVENT_TRACKING_FAIL
+
+DEFAULT_DISPLAY_FPS = 15.0
+DEFAULT_VIEWPORT_WIDTH = 800
+DEFAULT_OVERVIEW_HEIGHT = 120
+OVERVIEW_GAP = 4  # Piksel pemisah antara viewport dan overview
+
+# Pesan konsol untuk event dari engine (hanya mode GUI)
+PESAN_EVENT = {
+    EVENT_TRACKING_RESET: "INFO: Posisi pelacakan di-reset ke tengah.",
+    EVENT_TRACKING_START: "Objek terdeteksi, memulai pelacakan...",
+    EVENT_TRACKING_FAIL: "Pelacakan gagal, mencari objek baru...",
+}
+
+
+class DisplayLimiter:
+    """Memutuskan apakah jendela perlu di-refresh sekarang (maks `max_fps` per detik).
+
+    `max_fps <= 0` berarti tanpa batas (refresh setiap frame).
+    """
+
+    def __init__(self, max_fps=DEFAULT_DISPLAY_FPS):
+        self.set_max_fps(max_fps)
+        self._next_time = 0.0
+        self.shown = 0
+        self.skipped = 0
+
+    def set_max_fps(self, max_fps):
+        self.max_fps = max_fps
+        self.interval = 1.0 / max_fps if max_fps > 0 else 0.0
+
+    def due(self, now=None):
+        now = time.perf_counter() if now is None else now
+        if now >= self._next_time:
+            self._next_time = now + self.interval
+            self.shown += 1
+            return True
+        self.skipped += 1
+        return False
+
+
+class PanoramaView:
+    """Gambar tampilan panorama: viewport ekor + overview seluruh pindaian.
+
+    Overview dibangun bertahap: hanya kolom baru sejak render sebelumnya yang
+    diperkecil (INTER_AREA, `factor` kolom menjadi satu) lalu ditambahkan.
+    Jika overview sudah lebih dari dua kali lebar tampilan, overview
+    diperkecil setengah dan `factor` digandakan, sehingga ukurannya (dan
+    biaya render) tetap terbatas. Untuk TiledPanoramaWriter, kolom yang sudah
+    ter-flush sebelum sempat dilihat tidak masuk overview.
+    """
+
+    def __init__(self, height, viewport_width=DEFAULT_VIEWPORT_WIDTH,
+                 overview_height=DEFAULT_OVERVIEW_HEIGHT, channels=3):
+        self.height = height
+        self.viewport_width = viewport_width
+        self.overview_height = min(overview_height, height)
+        self.channels = channels
+        self._initial_factor = max(1, math.ceil(height / self.overview_height))
+        self._canvas = np.zeros((height + OVERVIEW_GAP + self.overview_height, viewport_width, channels),
+                                dtype=np.uint8)
+        self._overview = PanoramaBuffer(self.overview_height, channels)
+        self.reset()
+
+    def reset(self):
+        """Kosongkan overview (dipanggil otomatis jika panorama di-clear)."""
+        self.factor = self._initial_factor
+        self._overview.clear()
+        self._pending = None
+        self._seen = 0
+
+    def _ingest(self, panorama):
+        # Ambil kolom yang belum pernah dilihat dari ekor panorama
+        total = panorama.width
+        if total < self._seen:
+            self.reset()
+        new = total - self._seen
+        if new <= 0:
+            return
+        tail = panorama.view()
+        columns = tail[:, tail.shape[1] - min(new, tail.shape[1]):]
+        self._seen = total
+
+        if self._pending is not None:
+            columns = np.concatenate((self._pending, columns), axis=1)
+        usable = (columns.shape[1] // self.factor) * self.factor
+        self._pending = columns[:, usable:].copy() if usable < columns.shape[1] else None
+        if usable == 0:
+            return
+        small = cv2.resize(columns[:, :usable], (usable // self.factor, self.overview_height),
+                           interpolation=cv2.INTER_AREA)
+        self._overview.append(small)
+
+        if self._overview.width > 2 * self.viewport_width:
+            # Perkecil setengah; kolom ganjil terakhir dibiarkan apa adanya
+            view = self._overview.view()
+            half = view.shape[1] // 2
+            compact = cv2.resize(view[:, :2 * half], (half, self.overview_height), interpolation=cv2.INTER_AREA)
+            last = view[:, 2 * half:].copy()
+            self._overview.clear()
+            self._overview.append(compact)
+            if last.shape[1]:
+                self._overview.append(last)
+            self.factor *= 2
+
+    def render(self, panorama):
+        """Kembalikan gambar tampilan (buffer yang dipakai ulang), atau None jika panorama kosong."""
+        if len(panorama) == 0:
+            if self._seen:
+                self.reset()
+            return None
+        self._ingest(panorama)
+        canvas = self._canvas
+        vw = self.viewport_width
+
+        # --- VIEWPORT: KOLOM TERAKHIR, RATA KANAN ---
+        tail = panorama.view()
+        n = min(vw, tail.shape[1])
+        canvas[:self.height, :vw - n] = 0
+        canvas[:self.height, vw - n:] = tail[:, tail.shape[1] - n:]
+
+        # --- OVERVIEW: SELURUH PINDAIAN ---
+        y0 = self.height + OVERVIEW_GAP
+        canvas[self.height:y0] = 64
+        area = canvas[y0:]
+        area[:] = 0
+        overview = self._overview.view()
+        if overview.shape[1] > vw:
+            cv2.resize(overview, (vw, self.overview_height), dst=area, interpolation=cv2.INTER_AREA)
+            shown = vw
+        else:
+            area[:, :overview.shape[1]] = overview
+            shown = overview.shape[1]
+
+        # Penanda posisi viewport di overview
+        if shown > 0:
+            x0 = int(shown * max(0, panorama.width - n) / panorama.width)
+            cv2.rectangle(area, (x0, 0), (max(x0, shown - 1), self.overview_height - 1), (0, 255, 255), 1)
+        return canvas
+
+
+def gambar_overlay(display_frame, engine):
+    # Garis slit, kotak pelacakan, dan teks status di atas frame tampilan
+    frame_height = display_frame.shape[0]
+    w, h = engine.w, engine.h
+    if engine.is_tracking:
+        x, y = engine.position
+        cv2.rectangle(display_frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
+    cv2.line(display_frame, (engine.posisi_slit, 0), (engine.posisi_slit, frame_height), (0, 255, 0), 1)
+    scan_status_text = f"SCAN MODE: {'ACTIVE' if engine.scanning else 'OFF'}"
+    tracking_status_text = "TRACKING" if engine.is_tracking else "WAITING FOR OBJECT"
+    speed_text = f"Kecepatan: {engine.display_speed_kmh:.2f} km/jam"
+
+    cv2.putText(display_frame, scan_status_text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+    if engine.scanning:
+        cv2.putText(display_frame, tracking_status_text, (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
+        cv2.putText(display_frame, speed_text, (10, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+
+    if not engine.is_tracking and engine.scanning:
+        x0, y0 = engine.x_box_init, engine.y_box_init
+        cv2.rectangle(display_frame, (x0, y0), (x0 + w, y0 + h), (255, 255, 0), 2)
@@ -0,0 +1,482 @@
+# frame_share.py (Berbagi Frame dan Ekor Panorama lewat Shared Memory)
+#
+# Proses lain (inspeksi, model ML) bisa membaca frame live dan panorama yang
+# sedang tumbuh tanpa membuka kamera lagi atau menunggu PNG saat keluar.
+# Ada dua blok shared memory per nama NAME:
+#
+#   NAME_frames  ring frame bertipe tetap (layout little-endian, versi 1)
+#     HEADER (64 byte)
+#        0  u32  magic        = 0x474D5246 ("FRMG")
+#        4  u32  version      = 1
+#        8  u32  header_size  = 64
+#       12  u32  slot_header  = 64
+#       16  u32  slots        (jumlah slot frame)
+#       20  u32  height
+#       24  u32  width
+#       28  u32  channels     (uint8)
+#       32  u64  slot_stride  (byte per slot, kelipatan 64)
+#       40  u64  write_seq    (jumlah frame yang sudah dipublikasikan)
+#     FRAME ke-n (n mulai dari 1) ada di slot (n - 1) % slots
+#        0  u64  seq          (2n-1 = sedang ditulis, 2n = lengkap)
+#        8  f64  timestamp    (detik, waktu frame dari sumber)
+#       16  u64  frame_index
+#       24  f64  speed_kmh
+#       32  f64  displacement (piksel)
+#       40  f64  confidence
+#       48  u32  tracking
+#       64  ...  piksel height x width x channels
+#
+#   NAME_pano  ekor panorama: `capacity` kolom terakhir (versi 1)
+#     HEADER (64 byte)
+#        0  u32  magic        = 0x4F4E4150 ("PANO")
+#        4  u32  version      = 1
+#        8  u32  header_size  = 64
+#       12  u32  capacity     (kolom)
+#       16  u32  height
+#       20  u32  channels
+#       24  u64  begin_width  (lebar panorama setelah append yang sedang ditulis)
+#       32  u64  width        (lebar panorama yang sudah lengkap)
+#       40  u64  generation   (+2 setiap panorama dikosongkan; ganjil = sedang dikosongkan)
+#       64  ...  piksel height x (2 x capacity) x channels
+#     Kolom ke-c ditulis di posisi c % capacity dan c % capacity + capacity,
+#     jadi `capacity` kolom terakhir selalu bersebelahan dan bisa dibaca
+#     sebagai satu view NumPy.
+#
+# Pembaca memetakan piksel sebagai view NumPy tanpa salinan. Penulis tidak
+# pernah menunggu pembaca: frame yang terlalu lama dipegang bisa tertimpa,
+# jadi setelah selesai memakai view pembaca memanggil `valid()` (atau
+# `copy()` yang menyalin lalu memeriksa). Jika False, hasilnya dibuang.
+#
+#   reader = FrameRingReader("slitscan")
+#   frame = reader.latest()
+#   hasil = model(frame["image"])
+#   if reader.valid(frame): pakai(hasil)
+
+import argparse
+import struct
+import time
+
+import cv2
+import numpy as np
+
+from telemetry_ring import buat_shm, buka_shm
+
+SHARE_NAME = "slitscan"
+FRAME_MAGIC = 0x474D5246
+TAIL_MAGIC = 0x4F4E4150
+SHARE_VERSION = 1
+HEADER_SIZE = 64
+SLOT_HEADER_SIZE = 64
+DEFAULT_SLOTS = 4
+DEFAULT_TAIL_COLUMNS = 2048
+SPIN_TIMEOUT = 0.1      # Detik; slot/ekor yang lebih lama "sedang ditulis" dianggap ditinggal penulis
+
+_FRAME_HEADER_STRUCT = struct.Struct("<IIIIIIIIQ")
+_TAIL_HEADER_STRUCT = struct.Struct("<IIIIII")
+_FRAME_WRITE_SEQ_OFFSET = 40
+_TAIL_BEGIN_OFFSET = 24
+_TAIL_WIDTH_OFFSET = 32
+_TAIL_GENERATION_OFFSET = 40
+_U32 = struct.Struct("<I")
+_U64 = struct.Struct("<Q")
+_META_STRUCT = struct.Struct("<dQdddI")  # timestamp, frame_index, speed, displacement, confidence, tracking
+_META_OFFSET = 8
+
+
+def slot_stride(height, width, channels):
+    return SLOT_HEADER_SIZE + (height * width * channels + 63) // 64 * 64
+
+
+# --- RING FRAME ---
+class FrameRingWriter:
+    """Penulis ring frame; `publish()` menyalin frame sekali dan tidak pernah menunggu pembaca."""
+
+    def __init__(self, name, width, height, channels=3, slots=DEFAULT_SLOTS):
+        if slots <= 0:
+            raise ValueError("slots harus lebih besar dari 0")
+        self.name = name
+        self.shape = (height, width, channels) if channels > 1 else (height, width)
+        self.slots = slots
+        self.stride = slot_stride(height, width, channels)
+        self.shm = buat_shm(name, HEADER_SIZE + slots * self.stride)
+        self.buf = self.shm.buf
+        self.write_seq = 0
+        self._images = [_slot_image(self.buf, i, self.stride, self.shape) for i in range(slots)]
+        # Header ditulis terakhir: magic menandakan ring siap dibaca
+        _FRAME_HEADER_STRUCT.pack_into(self.buf, 0, 0, SHARE_VERSION, HEADER_SIZE, SLOT_HEADER_SIZE,
+                                       slots, height, width, channels, self.stride)
+        _U32.pack_into(self.buf, 0, FRAME_MAGIC)
+
+    def publish(self, frame, timestamp=0.0, frame_index=0, speed_kmh=0.0, displacement=0.0,
+                confidence=0.0, tracking=False):
+        if frame.shape != self.shape:
+            raise ValueError(f"Ukuran frame {frame.shape} tidak sama dengan ukuran ring {self.shape}")
+        n = self.write_seq + 1
+        slot = (n - 1) % self.slots
+        offset = HEADER_SIZE + slot * self.stride
+
+        _U64.pack_into(self.buf, offset, 2 * n - 1)  # Slot sedang ditulis
+        _META_STRUCT.pack_into(self.buf, offset + _META_OFFSET, timestamp, frame_index,
+                               speed_kmh, displacement, confidence, int(bool(tracking)))
+        np.copyto(self._images[slot], frame)
+        _U64.pack_into(self.buf, offset, 2 * n)      # Slot lengkap
+        _U64.pack_into(self.buf, _FRAME_WRITE_SEQ_OFFSET, n)
+        self.write_seq = n
+        return n
+
+    def close(self, unlink=True):
+        self._images = None
+        self.buf = None
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+def _slot_image(buf, slot, stride, shape):
+    offset = HEADER_SIZE + slot * stride + SLOT_HEADER_SIZE
+    return np.ndarray(shape, dtype=np.uint8, buffer=buf, offset=offset)
+
+
+class FrameRingReader:
+    """Pembaca ring frame. Frame dikembalikan sebagai dict dengan `image` berupa
+    view ke shared memory (tanpa salinan); periksa `valid()` setelah dipakai."""
+
+    def __init__(self, name=SHARE_NAME + "_frames", start_at_latest=True):
+        self.shm = buka_shm(name)
+        self.buf = self.shm.buf
+        (magic, version, header_size, slot_header, slots,
+         height, width, channels, stride) = _FRAME_HEADER_STRUCT.unpack_from(self.buf, 0)
+        if magic != FRAME_MAGIC:
+            self.close()
+            raise ValueError(f"Shared memory '{name}' bukan ring frame (magic {magic:#x})")
+        if version != SHARE_VERSION or header_size != HEADER_SIZE or slot_header != SLOT_HEADER_SIZE:
+            self.close()
+            raise ValueError(f"Versi/layout ring frame tidak didukung: versi {version}, "
+                             f"header {header_size}, header slot {slot_header}")
+        self.slots = slots
+        self.stride = stride
+        self.shape = (height, width, channels) if channels > 1 else (height, width)
+        self._images = [_slot_image(self.buf, i, stride, self.shape) for i in range(slots)]
+        self.next_seq = self.write_seq() + 1 if start_at_latest else 1
+        self.missed = 0
+        self.torn_reads = 0
+
+    def write_seq(self):
+        return _U64.unpack_from(self.buf, _FRAME_WRITE_SEQ_OFFSET)[0]
+
+    def _slot_seq(self, n):
+        return _U64.unpack_from(self.buf, HEADER_SIZE + ((n - 1) % self.slots) * self.stride)[0]
+
+    def _read_frame(self, n):
+        # Kembalikan (status, frame); status: "ok", "missed", atau "pending"
+        slot = (n - 1) % self.slots
+        offset = HEADER_SIZE + slot * self.stride
+        deadline = time.monotonic() + SPIN_TIMEOUT
+        while True:
+            seq_before = _U64.unpack_from(self.buf, offset)[0]
+            if seq_before > 2 * n:
+                return "missed", None
+            if seq_before < 2 * n:
+                if seq_before == 2 * n - 1 and time.monotonic() < deadline:
+                    continue  # Penulis sedang di tengah slot ini, coba lagi
+                return "pending", None  # Belum ditulis, atau penulis berhenti di tengah slot
+            meta = _META_STRUCT.unpack_from(self.buf, offset + _META_OFFSET)
+            if _U64.unpack_from(self.buf, offset)[0] == seq_before:
+                timestamp, frame_index, speed_kmh, displacement, confidence, tracking = meta
+                return "ok", {"seq": n, "timestamp": timestamp, "frame_index": frame_index,
+                              "speed_kmh": speed_kmh, "displacement": displacement,
+                              "confidence": confidence, "tracking": bool(tracking),
+                              "image": self._images[slot]}
+            self.torn_reads += 1
+
+    def latest(self):
+        """Frame terbaru yang sudah lengkap, atau None jika belum ada."""
+        deadline = time.monotonic() + SPIN_TIMEOUT
+        while time.monotonic() < deadline:
+            n = self.write_seq()
+            if n == 0:
+                return None
+            status, frame = self._read_frame(n)
+            if status == "ok":
+                self.next_seq = max(self.next_seq, n + 1)
+                return frame
+            # "missed": penulis sudah memutari slot ini, ambil write_seq baru
+        return None
+
+    def next(self):
+        """Frame berikutnya yang belum dibaca (urut seq), atau None jika belum ada."""
+        latest = self.write_seq()
+        oldest_available = latest - self.slots + 1
+        if self.next_seq < oldest_available:
+            self.missed += oldest_available - self.next_seq
+            self.next_seq = oldest_available
+        while self.next_seq <= latest:
+            status, frame = self._read_frame(self.next_seq)
+            if status == "pending":
+                return None
+            self.next_seq += 1
+            if status == "ok":
+                return frame
+            self.missed += 1
+        return None
+
+    def valid(self, frame):
+        """True jika slot frame belum mulai ditimpa sejak frame diambil."""
+        if self._slot_seq(frame["seq"]) == 2 * frame["seq"]:
+            return True
+        self.torn_reads += 1
+        return False
+
+    def copy(self, frame):
+        """Salinan piksel frame, atau None jika slotnya tertimpa saat disalin."""
+        image = frame["image"].copy()
+        return image if self.valid(frame) else None
+
+    def close(self):
+        self._images = None
+        self.buf = None
+        self.shm.close()
+
+
+# --- EKOR PANORAMA ---
+class PanoramaTailWriter:
+    """Menyimpan `capacity` kolom terakhir panorama di shared memory."""
+
+    def __init__(self, name, height, channels=3, capacity=DEFAULT_TAIL_COLUMNS):
+        if capacity <= 0:
+            raise ValueError("capacity harus lebih besar dari 0")
+        self.name = name
+        self.capacity = capacity
+        self.shm = buat_shm(name, HEADER_SIZE + height * 2 * capacity * channels)
+        self.buf = self.shm.buf
+        self.data = _tail_image(self.buf, height, capacity, channels)
+        self.width = 0
+        self.generation = 0
+        _TAIL_HEADER_STRUCT.pack_into(self.buf, 0, 0, SHARE_VERSION, HEADER_SIZE, capacity, height, channels)
+        _U32.pack_into(self.buf, 0, TAIL_MAGIC)
+
+    def append(self, columns):
+        if columns.ndim == self.data.ndim - 1:
+            columns = columns[:, np.newaxis]
+        n = columns.shape[1]
+        start = self.width
+        end = start + n
+        # Umumkan dulu kolom yang akan ditimpa, baru tulis pikselnya
+        _U64.pack_into(self.buf, _TAIL_BEGIN_OFFSET, end)
+        if n > self.capacity:
+            columns = columns[:, n - self.capacity:]
+            start = end - self.capacity
+        cap = self.capacity
+        done = 0
+        while done < columns.shape[1]:
+            pos = (start + done) % cap
+            k = min(columns.shape[1] - done, cap - pos)
+            chunk = columns[:, done:done + k]
+            self.data[:, pos:pos + k] = chunk
+            self.data[:, pos + cap:pos + cap + k] = chunk
+            done += k
+        _U64.pack_into(self.buf, _TAIL_WIDTH_OFFSET, end)
+        self.width = end
+
+    def clear(self):
+        # Generasi ganjil selama pengosongan, agar pembaca yang sedang memegang
+        # view tahu isinya batal dan pembaca baru menunggu lebar yang konsisten
+        _U64.pack_into(self.buf, _TAIL_GENERATION_OFFSET, self.generation + 1)
+        _U64.pack_into(self.buf, _TAIL_BEGIN_OFFSET, 0)
+        _U64.pack_into(self.buf, _TAIL_WIDTH_OFFSET, 0)
+        self.generation += 2
+        _U64.pack_into(self.buf, _TAIL_GENERATION_OFFSET, self.generation)
+        self.width = 0
+
+    def close(self, unlink=True):
+        self.data = None
+        self.buf = None
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+def _tail_image(buf, height, capacity, channels):
+    shape = (height, 2 * capacity, channels) if channels > 1 else (height, 2 * capacity)
+    return np.ndarray(shape, dtype=np.uint8, buffer=buf, offset=HEADER_SIZE)
+
+
+class PanoramaTailReader:
+    """Pembaca ekor panorama; `latest()` mengembalikan view tanpa salinan."""
+
+    def __init__(self, name=SHARE_NAME + "_pano"):
+        self.shm = buka_shm(name)
+        self.buf = self.shm.buf
+        magic, version, header_size, capacity, height, channels = _TAIL_HEADER_STRUCT.unpack_from(self.buf, 0)
+        if magic != TAIL_MAGIC:
+            self.close()
+            raise ValueError(f"Shared memory '{name}' bukan ekor panorama (magic {magic:#x})")
+        if version != SHARE_VERSION or header_size != HEADER_SIZE:
+            self.close()
+            raise ValueError(f"Versi/layout ekor panorama tidak didukung: versi {version}, header {header_size}")
+        self.capacity = capacity
+        self.height = height
+        self.data = _tail_image(self.buf, height, capacity, channels)
+        self.torn_reads = 0
+
+    def width(self):
+        return _U64.unpack_from(self.buf, _TAIL_WIDTH_OFFSET)[0]
+
+    def latest(self, columns=None):
+        """Kolom terakhir panorama (paling banyak `columns`, default seluruh kapasitas).
+
+        Kembalikan dict {"generation", "start", "width", "image"}; `image`
+        berisi kolom start..width-1 dalam urutan panorama. None jika penulis
+        berhenti di tengah pengosongan panorama.
+        """
+        columns = self.capacity if columns is None else min(columns, self.capacity)
+        deadline = time.monotonic() + SPIN_TIMEOUT
+        while True:
+            if time.monotonic() > deadline:
+                return None
+            generation = _U64.unpack_from(self.buf, _TAIL_GENERATION_OFFSET)[0]
+            if generation % 2:
+                continue  # Penulis sedang mengosongkan panorama
+            width = self.width()
+            if _U64.unpack_from(self.buf, _TAIL_GENERATION_OFFSET)[0] == generation:
+                break
+        start = max(0, width - columns)
+        pos = start % self.capacity
+        return {"generation": generation, "start": start, "width": width,
+                "image": self.data[:, pos:pos + width - start]}
+
+    def valid(self, tail):
+        """True jika belum ada kolom view yang mulai ditimpa atau dikosongkan."""
+        generation = _U64.unpack_from(self.buf, _TAIL_GENERATION_OFFSET)[0]
+        begin = _U64.unpack_from(self.buf, _TAIL_BEGIN_OFFSET)[0]
+        if generation == tail["generation"] and begin - tail["start"] <= self.capacity:
+            return True
+        self.torn_reads += 1
+        return False
+
+    def copy(self, tail):
+        if tail is None:
+            return None
+        image = tail["image"].copy()
+        return image if self.valid(tail) else None
+
+    def close(self):
+        self.data = None
+        self.buf = None
+        self.shm.close()
+
+
+# --- PENERBIT UNTUK LOOP PEMINDAI ---
+class SharedPanorama:
+    """Membungkus panorama (PanoramaBuffer/TiledPanoramaWriter): setiap
+    append dan clear juga diteruskan ke ekor panorama di shared memory."""
+
+    def __init__(self, panorama, tail):
+        self.panorama = panorama
+        self.tail = tail
+
+    def append(self, columns):
+        self.panorama.append(columns)
+        self.tail.append(columns)
+
+    def clear(self):
+        self.panorama.clear()
+        self.tail.clear()
+
+    def __len__(self):
+        return len(self.panorama)
+
+    def __getattr__(self, name):
+        return getattr(self.panorama, name)
+
+
+class FrameSharePublisher:
+    """Ring frame NAME_frames plus ekor panorama NAME_pano untuk satu sumber.
+
+    Pakai `publisher.panorama` sebagai panorama engine, lalu panggil
+    `publish()` setelah setiap `engine.process()`.
+    """
+
+    def __init__(self, name, width, height, panorama, slots=DEFAULT_SLOTS, tail_columns=DEFAULT_TAIL_COLUMNS):
+        self.name = name
+        self.frames = FrameRingWriter(f"{name}_frames", width, height, slots=slots)
+        self.tail = PanoramaTailWriter(f"{name}_pano", height, capacity=tail_columns)
+        if panorama.width:
+            # Lanjutan (mis. --resume): kolom di ekor tetap bernomor seperti di panorama
+            existing = panorama.view()[:, -tail_columns:]
+            self.tail.width = panorama.width - existing.shape[1]
+            self.tail.append(existing)
+        self.panorama = SharedPanorama(panorama, self.tail)
+
+    def publish(self, frame, timestamp, frame_index, engine):
+        return self.frames.publish(frame, timestamp, frame_index, engine.instant_speed_kmh,
+                                   engine.displacement, engine.confidence, engine.is_tracking)
+
+    def close(self):
+        self.frames.close()
+        self.tail.close()
+
+
+def tambah_argumen_share(parser):
+    # Argumen baris perintah yang sama untuk pano.py, panoVideo.py, dan multi_pano.py
+    parser.add_argument("--share", metavar="NAME",
+                        help="Bagikan frame dan ekor panorama lewat shared memory NAME_frames/NAME_pano, "
+                             "di multi_pano.py NAME_N_* per sumber (baca dengan: python frame_share.py NAME)")
+    parser.add_argument("--share-slots", type=int, default=DEFAULT_SLOTS, help="Jumlah slot ring frame")
+    parser.add_argument("--share-columns", type=int, default=DEFAULT_TAIL_COLUMNS,
+                        help="Jumlah kolom terakhir panorama yang dibagikan")
+
+
+# --- CONTOH KONSUMEN ---
+def main():
+    parser = argparse.ArgumentParser(description="Contoh konsumen frame dan panorama dari shared memory.")
+    parser.add_argument("name", nargs="?", default=SHARE_NAME, help="Nama yang dipakai penerbit (--share)")
+    parser.add_argument("--save-tail", help="Simpan ekor panorama terakhir ke file gambar saat keluar")
+    parser.add_argument("--interval", type=float, default=1.0, help="Detik antar baris status")
+    args = parser.parse_args()
+
+    frames = FrameRingReader(f"{args.name}_frames")
+    tail = PanoramaTailReader(f"{args.name}_pano")
+    print(f"Terhubung ke '{args.name}': frame {frames.shape}, {frames.slots} slot; "
+          f"ekor panorama {tail.capacity} kolom.")
+    received = 0
+    last_status = time.time()
+    last_tail = None
+    frame = None
+    try:
+        while True:
+            frame = frames.next()
+            if frame is None:
+                time.sleep(0.002)
+            else:
+                # Pemrosesan langsung di atas view shared memory, lalu divalidasi
+                brightness = float(frame["image"].mean())
+                if frames.valid(frame):
+                    received += 1
+            now = time.time()
+            if frame is not None and now - last_status >= args.interval:
+                last_status = now
+                print(f"#{frame['seq']} frame {frame['frame_index']}: {frame['speed_kmh']:.2f} km/jam, "
+                      f"kecerahan {brightness:.1f}, panorama {tail.width()} kolom | "
+                      f"diterima {received}, terlewat {frames.missed}, tertimpa {frames.torn_reads}")
+                if args.save_tail:
+                    image = tail.copy(tail.latest())
+                    if image is not None and image.shape[1] > 0:
+                        last_tail = image
+    except KeyboardInterrupt:
+        print(f"\nSelesai. Diterima {received}, terlewat {frames.missed}, tertimpa {frames.torn_reads}")
+    finally:
+        if args.save_tail:
+            image = tail.copy(tail.latest())
+            if image is not None and image.shape[1] > 0:
+                last_tail = image
+            if last_tail is not None:
+                cv2.imwrite(args.save_tail, last_tail)
+                print(f"Ekor panorama ({last_tail.shape[1]} kolom) disimpan di {args.save_tail}")
+        frame = None  # View ke shared memory harus dilepas sebelum close()
+        frames.close()
+        tail.close()
+
+
+if __name__ == "__main__":
+    main()
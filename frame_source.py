@@ -0,0 +1,171 @@
+# frame_source.py (Pipeline Capture/Decode Berbasis Thread)
+
+import queue
+import threading
+import time
+
+import cv2
+
+# --- KEBIJAKAN ANTREAN PENUH ---
+DROP_OLDEST = "drop_oldest"  # Kamera live: buang frame tertua agar latensi tetap rendah
+BLOCK = "block"              # File video: tunggu konsumen agar tidak ada frame yang hilang
+QUEUE_POLICIES = (DROP_OLDEST, BLOCK)
+
+DEFAULT_QUEUE_SIZE = 4
+
+_END_OF_STREAM = object()
+
+
+def waktu_video(cap, frame_index, fps):
+    # Waktu (detik) dari timestamp video itu sendiri, bukan jam dinding,
+    # sehingga hasil pemrosesan selalu sama untuk rekaman yang sama.
+    pos_msec = cap.get(cv2.CAP_PROP_POS_MSEC)
+    if pos_msec > 0 or frame_index == 0:
+        return pos_msec / 1000.0
+    return frame_index / fps if fps > 0 else 0.0
+
+
+class ThreadedFrameSource:
+    """Thread produsen yang membaca frame ke antrean terbatas.
+
+    `cap.read()` (I/O kamera + decode) berjalan di thread sendiri sehingga
+    tidak menahan template matching di thread utama. Setiap item antrean
+    berisi (frame, timestamp, frame_index). Timestamp diambil dari jam dinding
+    saat frame diterima (`use_video_time=False`, untuk kamera) atau dari
+    timestamp video (`use_video_time=True`, untuk file rekaman).
+
+    Untuk file video, `start_frame`/`end_frame` membatasi pembacaan ke satu
+    segmen (seek dengan `CAP_PROP_POS_FRAMES`, `end_frame` eksklusif).
+    """
+
+    def __init__(self, source, queue_size=DEFAULT_QUEUE_SIZE, policy=DROP_OLDEST,
+                 use_video_time=False, api_preference=None, start_frame=0, end_frame=None):
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"Kebijakan antrean tidak dikenal: {policy!r} (pilih {QUEUE_POLICIES})")
+        if queue_size <= 0:
+            raise ValueError("queue_size harus lebih besar dari 0")
+
+        if api_preference is None:
+            self.cap = cv2.VideoCapture(source)
+        else:
+            self.cap = cv2.VideoCapture(source, api_preference)
+        self.source = source
+        self.policy = policy
+        self.use_video_time = use_video_time
+        self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS)
+        self.start_frame = start_frame
+        self.end_frame = end_frame
+        if start_frame > 0:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        # --- PENGHITUNG STATISTIK ---
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self.frames_consumed = 0
+        self.max_queue_depth = 0
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def get(self, prop_id):
+        return self.cap.get(prop_id)
+
+    @property
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    # --- THREAD PRODUSEN ---
+    def start(self):
+        if self._thread is not None:
+            return self
+        self._thread = threading.Thread(target=self._run, name="frame-capture", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        frame_index = self.start_frame
+        while not self._stop_event.is_set():
+            if self.end_frame is not None and frame_index >= self.end_frame:
+                break
+            ret, frame = self.cap.read()
+            if not ret:
+                break
+            if self.use_video_time:
+                timestamp = waktu_video(self.cap, frame_index, self.fps)
+            else:
+                timestamp = time.time()
+            self.frames_captured += 1
+            self._put((frame, timestamp, frame_index))
+            frame_index += 1
+        self._put(_END_OF_STREAM, is_marker=True)
+
+    def _put(self, item, is_marker=False):
+        if self.policy == BLOCK:
+            while not self._stop_event.is_set():
+                try:
+                    self._queue.put(item, timeout=0.1)
+                    self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+                    return
+                except queue.Full:
+                    continue
+            if not is_marker:
+                return
+        # DROP_OLDEST, atau penanda akhir setelah release(): selalu masuk antrean
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                break
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.frames_dropped += 1
+                except queue.Empty:
+                    pass
+        self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+
+    # --- KONSUMEN ---
+    def read(self, timeout=None):
+        """Ambil frame berikutnya: (ret, frame, timestamp, frame_index).
+
+        `ret` bernilai False jika sumber habis, dihentikan, atau `timeout` lewat.
+        """
+        if self._thread is None:
+            self.start()
+        try:
+            item = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return False, None, None, None
+        if item is _END_OF_STREAM:
+            # Kembalikan penanda agar pemanggilan read() berikutnya juga selesai
+            self._queue.put(_END_OF_STREAM)
+            return False, None, None, None
+        self.frames_consumed += 1
+        frame, timestamp, frame_index = item
+        return True, frame, timestamp, frame_index
+
+    def stats(self):
+        return {
+            "captured": self.frames_captured,
+            "consumed": self.frames_consumed,
+            "dropped": self.frames_dropped,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+        }
+
+    def release(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            # Kosongkan antrean agar produsen yang sedang menunggu bisa keluar
+            while self._thread.is_alive():
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    pass
+                self._thread.join(timeout=0.05)
+        self.cap.release()
@@ -1,88 +1,144 @@
-# speed_writer.py (Template Matching + Shared Memory)
+# speed_writer.py (Template Matching + Shared Memory Ring)
 
 import cv2
 import numpy as np
 import time
+import argparse
 from math import sqrt
 import sys
-import struct
+from frame_source import ThreadedFrameSource, DROP_OLDEST
+from stage_metrics import buat_metrics, tambah_argumen_metrics
+from displacement import buat_estimator, ESTIMATOR_LK
+from display import DisplayLimiter, DEFAULT_DISPLAY_FPS
 
 # --- PENGATURAN IPC ---
-# Pastikan library pywin32 sudah terinstal: pip install pywin32
-from multiprocessing import shared_memory
-import win32event
-import win32security
-
-SHM_NAME = "speed_shm"
-SEM_NAME = "speed_sem"
-DATA_SIZE = 8 # 8 bytes untuk tipe data double
+# Ring telemetri lock-free (seqlock) di shared memory, jalan di Windows dan Linux.
+# Layout lengkap ada di telemetry_ring.py; dibaca oleh main_reader.cpp.
+from telemetry_ring import TelemetryWriter, RING_SHM_NAME
 
 # --- PENGATURAN DAN KALIBRASI ---
 PIXELS_PER_METER = 500  # Sesuaikan dengan kalibrasi Anda
 
 def main():
+    parser = argparse.ArgumentParser(description="Deteksi kecepatan dan publikasi ke ring telemetri.")
+    parser.add_argument("--tracker", choices=("template", ESTIMATOR_LK), default="template",
+                        help="template = ambil ulang template tiap 1 detik (lama), "
+                             "lk = optical flow titik fitur, kecepatan sesaat per frame")
+    parser.add_argument("--roi", action="store_true",
+                        help="Hanya flip dan grayscale pita pencarian, bukan seluruh frame")
+    parser.add_argument("--headless", action="store_true",
+                        help="Tanpa jendela: hanya publikasi ke ring telemetri (Ctrl+C untuk berhenti)")
+    parser.add_argument("--display-fps", type=float, default=DEFAULT_DISPLAY_FPS,
+                        help="Batas refresh jendela per detik (0 = setiap frame)")
+    tambah_argumen_metrics(parser)
+    args = parser.parse_args()
+    metrics = buat_metrics(args.metrics, args.metrics_format, args.metrics_interval, prefix="speed_writer")
+
     # --- INISIALISASI ---
-    cap = cv2.VideoCapture(0)
+    # Thread capture dengan antrean terbatas; frame tertua dibuang agar latensi rendah
+    cap = ThreadedFrameSource(0, policy=DROP_OLDEST)
     if not cap.isOpened():
         print("Error: Tidak bisa membuka kamera.")
         return
 
     template = None
     last_capture_time = time.time()
+    last_frame_time = None
     speed_kmh = 0.0
+    max_val = 0.0
 
-    frame_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    frame_width = cap.width
+    frame_height = cap.height
 
     box_size = 100
     w, h = box_size, box_size
     x_box = int((frame_width - w) / 2)
     y_box = int((frame_height - h) / 2)
 
-    # --- SETUP SHARED MEMORY & SEMAPHORE ---
-    try:
-        shm = shared_memory.SharedMemory(name=SHM_NAME, create=True, size=DATA_SIZE)
-        print(f"Blok Shared Memory '{SHM_NAME}' dibuat.")
-    except FileExistsError:
-        shm = shared_memory.SharedMemory(name=SHM_NAME, create=False, size=DATA_SIZE)
-        print(f"Blok Shared Memory '{SHM_NAME}' sudah ada.")
-
-    sa = win32security.SECURITY_ATTRIBUTES()
-    sa.bInheritHandle = False
-    sem = win32event.CreateSemaphore(sa, 1, 1, SEM_NAME)
-    print(f"Semaphore '{SEM_NAME}' dibuat.")
+    # Definisikan koordinat search area
+    search_area_height = 110
+    center_y = frame_height // 2
+    center_x = frame_width // 2
+    y1_search = max(0, center_y - (search_area_height // 2))
+    y2_search = min(frame_height, center_y + (search_area_height // 2))
+    x1_search = max(0, center_x - (search_area_height // 2))
+
+    # Mode lk: titik fitur dilacak terus antar frame tanpa reset berkala
+    estimator = None
+    if args.tracker == ESTIMATOR_LK:
+        estimator = buat_estimator(ESTIMATOR_LK, frame_width, frame_height, box_size, band_input=args.roi)
+
+    # --- BUFFER PRAALOKASI ---
+    # Frame di-flip ke satu buffer tetap dan overlay digambar langsung di
+    # sana setelah matching selesai, jadi tidak ada salinan frame per iterasi.
+    # Template disalin ke buffernya sendiri karena buffer frame ditimpa.
+    # Mode ROI: hanya pita pencarian (pita estimator untuk lk) yang di-flip
+    # dan diubah ke grayscale; frame penuh baru di-flip saat jendela digambar.
+    if args.roi:
+        band_y0, band_y1 = (estimator.band_y0, estimator.band_y1) if estimator else (y1_search, y2_search)
+        band_buffer = np.empty((band_y1 - band_y0, frame_width, 3), dtype=np.uint8)
+        gray_band = np.empty((band_y1 - band_y0, frame_width), dtype=np.uint8)
+        template_buffer = np.empty((h, w), dtype=np.uint8)
+    else:
+        template_buffer = np.empty((h, w, 3), dtype=np.uint8)
+    frame_buffer = None if args.headless and args.roi else np.empty((frame_height, frame_width, 3), dtype=np.uint8)
+    limiter = DisplayLimiter(args.display_fps)
+    match_box = None  # (kiri_atas, nilai match) hasil template matching terakhir
+
+    # --- SETUP SHARED MEMORY ---
+    telemetry = TelemetryWriter(RING_SHM_NAME)
 
     try:
         # --- LOOP UTAMA PROGRAM ---
+        cap.start()
         while True:
-            ret, frame = cap.read()
+            t = metrics.now()
+            ret, frame, current_time, frame_index = cap.read()
+            metrics.record("read", t)
             if not ret:
                 break
 
-            frame = cv2.flip(frame, 1)
-            display_frame = frame.copy()
-            current_time = time.time()
+            t = metrics.now()
+            if args.roi:
+                cv2.flip(frame[band_y0:band_y1], 1, dst=band_buffer)
+                image = cv2.cvtColor(band_buffer, cv2.COLOR_BGR2GRAY, dst=gray_band)
+                y_offset = band_y0
+            else:
+                image = cv2.flip(frame, 1, dst=frame_buffer)
+                y_offset = 0
+            metrics.record("flip", t)
             delta_time = current_time - last_capture_time
 
+            if estimator is not None:
+                # --- OPTICAL FLOW: pergeseran per frame, tanpa ambil ulang template ---
+                t = metrics.now()
+                if estimator.position is None:
+                    estimator.start(image, y_offset, current_time)
+                    speed_kmh = 0.0
+                    max_val = 0.0
+                else:
+                    max_val, shift = estimator.update(image, y_offset, current_time)
+                    frame_dt = current_time - last_frame_time
+                    speed_kmh = 0.0
+                    if shift is not None and frame_dt > 0:
+                        speed_kmh = abs(shift) / PIXELS_PER_METER / frame_dt * 3.6
+                metrics.record("flow", t)
             # Ambil template baru setiap 1 detik
-            if delta_time >= 1:
-                template = frame[y_box : y_box + h, x_box : x_box + w]
+            elif delta_time >= 1:
+                template = template_buffer
+                np.copyto(template, image[y_box - y_offset : y_box - y_offset + h, x_box : x_box + w])
                 last_capture_time = current_time
                 speed_kmh = 0.0
-            
-            # Definisikan koordinat search area
-            search_area_height = 110
-            center_y = frame_height // 2
-            center_x = frame_width // 2
-            y1_search = max(0, center_y - (search_area_height // 2))
-            y2_search = min(frame_height, center_y + (search_area_height // 2))
-            x1_search = max(0, center_x - (search_area_height // 2))
+                max_val = 0.0
+                metrics.count("template_reset")
             
             if template is not None:
                 # Lakukan template matching dan hitung kecepatan
-                search_area = frame[y1_search:y2_search, x1_search:]
+                search_area = image[y1_search - y_offset:y2_search - y_offset, x1_search:]
+                t = metrics.now()
                 res = cv2.matchTemplate(search_area, template, cv2.TM_CCOEFF_NORMED)
                 min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(res)
+                metrics.record("match", t)
                 
                 top_left_global = (max_loc[0] + x1_search, max_loc[1] + y1_search)
                 
@@ -96,18 +152,38 @@ def main():
                     speed_mps = meter_distance / delta_time
                     speed_kmh = speed_mps * 3.6
 
-                # Gambar kotak hijau di lokasi yang cocok
-                bottom_right_global = (top_left_global[0] + w, top_left_global[1] + h)
-                cv2.rectangle(display_frame, top_left_global, bottom_right_global, (0, 255, 0), 2)
-                cv2.putText(display_frame, f"Match: {max_val:.2f}", (top_left_global[0], top_left_global[1]-10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+                match_box = (top_left_global, max_val)
 
             # --- PUBLISH DATA KE SHARED MEMORY ---
-            win32event.WaitForSingleObject(sem, win32event.INFINITE)
-            packed_data = struct.pack("d", speed_kmh)
-            shm.buf[:DATA_SIZE] = packed_data
-            win32event.ReleaseSemaphore(sem, 1)
+            # Tidak pernah menunggu pembaca; pembaca mendeteksi sendiri record yang terlewat
+            t = metrics.now()
+            telemetry.publish(speed_kmh, max_val, frame_index)
+            metrics.record("publish", t)
+            last_frame_time = current_time
+
+            if args.headless or not limiter.due():
+                metrics.count("frames")
+                metrics.maybe_flush()
+                continue
 
             # --- VISUALISASI ---
+            # Mode ROI: frame penuh baru di-flip di sini, hanya saat jendela di-refresh
+            if args.roi:
+                t = metrics.now()
+                cv2.flip(frame, 1, dst=frame_buffer)
+                metrics.record("flip", t)
+            display_frame = frame_buffer
+
+            if estimator is not None and estimator.position is not None:
+                x, y = estimator.position
+                cv2.rectangle(display_frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
+            if template is not None and match_box is not None:
+                # Gambar kotak hijau di lokasi yang cocok
+                top_left_global, match_val = match_box
+                bottom_right_global = (top_left_global[0] + w, top_left_global[1] + h)
+                cv2.rectangle(display_frame, top_left_global, bottom_right_global, (0, 255, 0), 2)
+                cv2.putText(display_frame, f"Match: {match_val:.2f}", (top_left_global[0], top_left_global[1]-10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+
             # Kotak kuning untuk area capture template
             cv2.rectangle(display_frame, (x_box, y_box), (x_box + w, y_box + h), (0, 255, 255), 2)
             
@@ -119,16 +195,25 @@ def main():
             cv2.putText(display_frame, speed_text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2, cv2.LINE_AA)
             
             if template is not None:
-                roi_h, roi_w, _ = template.shape
+                roi_h, roi_w = template.shape[:2]
                 start_y = frame_height - roi_h - 10
                 start_x = frame_width - roi_w - 10
-                display_frame[start_y : start_y + roi_h, start_x : start_x + roi_w] = template
+                # Template mode ROI berupa grayscale, disebar ke tiga kanal
+                display_frame[start_y : start_y + roi_h, start_x : start_x + roi_w] = (
+                    template if template.ndim == 3 else template[:, :, np.newaxis])
                 cv2.rectangle(display_frame, (start_x, start_y), (start_x + roi_w, start_y + roi_h), (255, 0, 0), 1)
                 cv2.putText(display_frame, "Template", (start_x - 10, start_y - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 0), 1)
 
+            t = metrics.now()
             cv2.imshow("Deteksi Kecepatan - Python Writer", display_frame)
-
-            if cv2.waitKey(1) & 0xFF == ord('q'):
+            metrics.record("imshow", t)
+
+            t = metrics.now()
+            key = cv2.waitKey(1) & 0xFF
+            metrics.record("waitkey", t)
+            metrics.count("frames")
+            metrics.maybe_flush()
+            if key == ord('q'):
                 break
 
     except KeyboardInterrupt:
@@ -136,11 +221,14 @@ def main():
     finally:
         # --- CLEANUP SEMUA RESOURCE ---
         print("Membersihkan resources...")
-        shm.close()
-        shm.unlink()
-        if sem: sem.Close()
+        stats = cap.stats()
+        print(f"Statistik antrean: {stats['captured']} frame ditangkap, {stats['dropped']} dibuang, "
+              f"kedalaman maks {stats['max_queue_depth']}")
+        metrics.close()
+        telemetry.close()
         cap.release()
-        cv2.destroyAllWindows()
+        if not args.headless:
+            cv2.destroyAllWindows()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,120 @@
+# load_governor.py (Penahan Beban Adaptif untuk Kamera Live)
+#
+# Di PC lini yang lemah, waktu proses per frame bisa melebihi interval kamera
+# sehingga kecepatan dan slit makin tertinggal dari kenyataan. LoadGovernor
+# mengukur latensi setiap frame (waktu selesai diproses dikurangi timestamp
+# saat frame diterima thread capture) dan menurunkan beban bertahap:
+#
+#   level 1  tampilan dikurangi ke `shed_display_fps` (dikorbankan pertama)
+#   level 2  + match dilewati pada frame yang prediksi gerakannya < 1 piksel
+#   level 3  + estimator mode kasar (level piramida lebih kecil / tanpa cek mundur)
+#
+# Level naik setelah `escalate_frames` frame berturut-turut di atas target,
+# dan turun lagi setelah `recover_frames` frame berturut-turut di bawah
+# `recover_ratio` x target. Kecepatan dan kolom slit tetap dihitung dari
+# timestamp asli frame, jadi akurasinya tidak bergantung pada latensi.
+#
+#   governor = LoadGovernor(target_latency=0.1)
+#   ...
+#   engine.process(frame, waktu_frame)
+#   governor.update(time.time() - waktu_frame, engine, limiter)
+
+from stage_metrics import buat_metrics
+
+LEVEL_NORMAL = 0
+LEVEL_SHED_DISPLAY = 1
+LEVEL_SKIP_MATCH = 2
+LEVEL_COARSE = 3
+LEVEL_NAMES = ("normal", "shed_display", "skip_match", "coarse")
+
+DEFAULT_TARGET_LATENCY = 0.1    # Detik
+DEFAULT_SHED_DISPLAY_FPS = 2.0
+DEFAULT_ESCALATE_FRAMES = 5
+DEFAULT_RECOVER_FRAMES = 60
+DEFAULT_RECOVER_RATIO = 0.5
+
+
+class LoadGovernor:
+    """Menaikkan/menurunkan level degradasi berdasarkan latensi per frame.
+
+    `level_frames[n]` menghitung berapa frame diproses di level n, dan
+    `escalations` berapa kali level naik; keduanya dicetak oleh `report()`.
+    """
+
+    def __init__(self, target_latency=DEFAULT_TARGET_LATENCY, shed_display_fps=DEFAULT_SHED_DISPLAY_FPS,
+                 escalate_frames=DEFAULT_ESCALATE_FRAMES, recover_frames=DEFAULT_RECOVER_FRAMES,
+                 recover_ratio=DEFAULT_RECOVER_RATIO, metrics=None):
+        if target_latency <= 0:
+            raise ValueError("target_latency harus lebih besar dari 0")
+        self.target_latency = target_latency
+        self.shed_display_fps = shed_display_fps
+        self.escalate_frames = escalate_frames
+        self.recover_frames = recover_frames
+        self.recover_ratio = recover_ratio
+        self.metrics = metrics if metrics is not None else buat_metrics()
+
+        self.level = LEVEL_NORMAL
+        self.level_frames = [0] * len(LEVEL_NAMES)
+        self.escalations = 0
+        self.max_latency = 0.0
+        self._over = 0
+        self._under = 0
+        self._display_fps = None  # Batas tampilan asli, dipulihkan saat kembali ke normal
+
+    def update(self, latency, engine, limiter=None):
+        """Catat latensi frame terakhir, lalu terapkan level ke engine dan limiter."""
+        self.max_latency = max(self.max_latency, latency)
+        if latency > self.target_latency:
+            self._over += 1
+            self._under = 0
+        elif latency < self.target_latency * self.recover_ratio:
+            self._under += 1
+            self._over = 0
+        else:
+            self._over = self._under = 0
+
+        if self._over >= self.escalate_frames and self.level < LEVEL_COARSE:
+            self._set_level(self.level + 1, engine, limiter)
+            self.escalations += 1
+            self.metrics.count("degrade_" + LEVEL_NAMES[self.level])
+        elif self._under >= self.recover_frames and self.level > LEVEL_NORMAL:
+            self._set_level(self.level - 1, engine, limiter)
+
+        self.level_frames[self.level] += 1
+        return self.level
+
+    def _set_level(self, level, engine, limiter):
+        self.level = level
+        self._over = self._under = 0
+        if limiter is not None:
+            if self._display_fps is None:
+                self._display_fps = limiter.max_fps
+            if level >= LEVEL_SHED_DISPLAY:
+                # Batas yang sudah lebih rendah dari shed_display_fps tidak boleh dinaikkan
+                shed_fps = self.shed_display_fps
+                if self._display_fps > 0:
+                    shed_fps = min(shed_fps, self._display_fps)
+                limiter.set_max_fps(shed_fps)
+            else:
+                limiter.set_max_fps(self._display_fps)
+        engine.skip_small_motion = level >= LEVEL_SKIP_MATCH
+        if engine.coarse != (level >= LEVEL_COARSE):
+            engine.set_coarse(level >= LEVEL_COARSE)
+
+    def report(self, engine=None):
+        total = sum(self.level_frames)
+        degraded = total - self.level_frames[LEVEL_NORMAL]
+        parts = [f"{name} {n}" for name, n in zip(LEVEL_NAMES[1:], self.level_frames[1:])]
+        text = (f"Penahan beban: {degraded}/{total} frame terdegradasi ({', '.join(parts)}), "
+                f"naik level {self.escalations} kali, latensi maks {self.max_latency * 1000:.0f} ms")
+        if engine is not None:
+            text += f"; match dilewati {engine.skipped_matches}, match kasar {engine.coarse_matches}"
+        return text
+
+
+def tambah_argumen_adaptif(parser):
+    # Argumen baris perintah yang sama untuk pano.py dan multi_pano.py
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Turunkan beban (tampilan, lalu match, lalu resolusi) jika latensi melebihi target")
+    parser.add_argument("--target-latency", type=float, default=DEFAULT_TARGET_LATENCY,
+                        help="Target latensi frame untuk --adaptive (detik)")
@@ -1,8 +1,22 @@
-// main_reader.cpp (SUDAH DIPERBAIKI)
+// main_reader.cpp (Pembaca Ring Telemetri Kecepatan)
+// Layout shared memory sama persis dengan telemetry_ring.py (versi 1).
+// Build Linux:   g++ -O2 -std=c++17 main_reader.cpp -o main_reader -lrt
+// Build Windows: cl /O2 /std:c++17 main_reader.cpp
+//
+// Mode:
+//   main_reader                 event-driven: spin singkat lalu tidur di futex (Linux)
+//   main_reader --poll-ms 1000  perilaku lama, polling berkala
+//   Opsi lain: --spin-us N, --report-s N, --verbose
 #include <iostream>
 #include <string>
 #include <chrono>
 #include <thread>
+#include <atomic>
+#include <algorithm>
+#include <csignal>
+#include <cstdint>
+#include <cstdlib>
+#include <cstring>
 
 #ifdef _WIN32
     #include <windows.h>
@@ -11,107 +25,391 @@
     #include <sys/mman.h>
     #include <sys/stat.h>
     #include <unistd.h>
-    #include <semaphore.h>
+    #include <time.h>
+#endif
+#ifdef __linux__
+    #include <linux/futex.h>
+    #include <sys/syscall.h>
+#endif
+#if defined(__x86_64__) || defined(_M_X64) || defined(__i386__)
+    #include <immintrin.h>
 #endif
 
 // DIUBAH: Menjadi WCHAR untuk kompatibilitas Unicode Windows
 #ifdef _WIN32
-    const WCHAR* SHM_NAME = L"speed_shm";
-    const WCHAR* SEM_NAME = L"speed_sem";
+    const WCHAR* SHM_NAME = L"speed_ring";
 #else
-    const char* SHM_NAME = "speed_shm";
-    const char* SEM_NAME = "speed_sem";
+    const char* SHM_NAME = "/speed_ring";
 #endif
 
-const int DATA_SIZE = 8; // 8 bytes for a double
+// --- LAYOUT RING (lihat telemetry_ring.py) ---
+const uint32_t RING_MAGIC = 0x52445053; // "SPDR"
+const uint32_t RING_VERSION = 1;
+const uint32_t HEADER_SIZE = 64;
+const uint32_t RECORD_SIZE = 48;
+const size_t WAITERS_OFFSET = 20;
+const size_t WRITE_SEQ_OFFSET = 24;
+const size_t PAYLOAD_OFFSET = 8;
+const uint64_t SPIN_TIMEOUT_NS = 100000000; // Slot yang lebih lama "sedang ditulis" dianggap ditinggal penulis
+
+struct RingHeader {
+    uint32_t magic;
+    uint32_t version;
+    uint32_t header_size;
+    uint32_t record_size;
+    uint32_t capacity;
+    uint32_t waiters;
+};
+
+struct RecordPayload {
+    uint64_t timestamp_ns; // jam monotonic penulis
+    uint64_t frame_index;
+    double speed_kmh;
+    double confidence;
+};
+
+struct SpeedRecord {
+    uint64_t seq;
+    RecordPayload payload;
+};
 
-int main() {
+static inline uint64_t load_u64_acquire(const uint8_t* p) {
+#if defined(_MSC_VER)
+    uint64_t v = *reinterpret_cast<const volatile uint64_t*>(p);
+    std::atomic_thread_fence(std::memory_order_acquire);
+    return v;
+#else
+    return __atomic_load_n(reinterpret_cast<const uint64_t*>(p), __ATOMIC_ACQUIRE);
+#endif
+}
+
+// Jam monotonic yang sama dengan time.monotonic_ns() di sisi Python
+static inline uint64_t monotonic_ns() {
 #ifdef _WIN32
-    // --- Implementasi Windows ---
-    // Kode di bawah ini tidak berubah, karena variabel di atas sudah benar tipenya
-    HANDLE hSem = OpenSemaphore(SEMAPHORE_ALL_ACCESS, FALSE, SEM_NAME);
-    if (hSem == NULL) {
-        std::cerr << "Error: Gagal membuka Semaphore. Pastikan publisher (Python) sudah berjalan." << std::endl;
-        return 1;
+    return static_cast<uint64_t>(std::chrono::duration_cast<std::chrono::nanoseconds>(
+        std::chrono::steady_clock::now().time_since_epoch()).count());
+#else
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return static_cast<uint64_t>(ts.tv_sec) * 1000000000ull + static_cast<uint64_t>(ts.tv_nsec);
+#endif
+}
+
+static inline void cpu_relax() {
+#if defined(__x86_64__) || defined(_M_X64) || defined(__i386__)
+    _mm_pause();
+#else
+    std::this_thread::yield();
+#endif
+}
+
+// Tunggu sampai write_seq berubah dari `seen`: spin dulu selama `spin_ns`,
+// lalu tidur di futex (Linux) dengan batas waktu agar sinyal tetap diproses.
+static void wait_for_update(uint8_t* base, uint64_t seen, uint64_t spin_ns, int timeout_ms) {
+    uint64_t deadline = monotonic_ns() + spin_ns;
+    while (load_u64_acquire(base + WRITE_SEQ_OFFSET) == seen) {
+        if (monotonic_ns() >= deadline) break;
+        cpu_relax();
+    }
+    if (load_u64_acquire(base + WRITE_SEQ_OFFSET) != seen) return;
+
+#ifdef __linux__
+    uint32_t* waiters = reinterpret_cast<uint32_t*>(base + WAITERS_OFFSET);
+    uint32_t* futex_word = reinterpret_cast<uint32_t*>(base + WRITE_SEQ_OFFSET); // 32 bit bawah (little-endian)
+    __atomic_fetch_add(waiters, 1, __ATOMIC_SEQ_CST);
+    // Cek ulang setelah mendaftar; penulis memanggil FUTEX_WAKE setelah setiap publish,
+    // dan FUTEX_WAIT langsung kembali jika write_seq sudah berubah dari `seen`
+    if (load_u64_acquire(base + WRITE_SEQ_OFFSET) == seen) {
+        struct timespec timeout;
+        timeout.tv_sec = timeout_ms / 1000;
+        timeout.tv_nsec = (timeout_ms % 1000) * 1000000L;
+        syscall(SYS_futex, futex_word, FUTEX_WAIT, static_cast<uint32_t>(seen), &timeout, nullptr, 0);
+    }
+    __atomic_fetch_sub(waiters, 1, __ATOMIC_SEQ_CST);
+#else
+    // Tanpa futex lintas proses: tidur singkat lalu kembali mengecek
+    (void)timeout_ms;
+    std::this_thread::sleep_for(std::chrono::microseconds(100));
+#endif
+}
+
+// --- STATISTIK LATENSI PUBLISH -> CONSUME ---
+// Histogram log-bucket: memori tetap berapa pun lamanya pembaca berjalan.
+// 8 sub-bucket per pangkat dua, jadi galat relatif persentil <= 12.5%.
+struct LatencyHistogram {
+    static const int SUB_BITS = 3;
+    static const int SUB = 1 << SUB_BITS;
+    static const int BUCKETS = 64 * SUB;
+    uint64_t counts[BUCKETS] = {};
+    uint64_t n = 0;
+    uint64_t max_ns = 0;
+
+    static int bucket(uint64_t ns) {
+        if (ns < SUB) return static_cast<int>(ns);
+        int msb = 0;
+        for (uint64_t v = ns >> 1; v != 0; v >>= 1) ++msb;
+        int shift = msb - SUB_BITS;
+        return (shift + 1) * SUB + static_cast<int>((ns >> shift) - SUB);
+    }
+
+    static uint64_t upper_bound(int b) {
+        // Nilai terbesar yang masuk bucket b
+        if (b < SUB) return static_cast<uint64_t>(b);
+        int shift = b / SUB - 1;
+        uint64_t low = static_cast<uint64_t>(b % SUB + SUB) << shift;
+        return low + ((uint64_t(1) << shift) - 1);
+    }
+
+    void add(uint64_t ns) {
+        ++counts[bucket(ns)];
+        ++n;
+        if (ns > max_ns) max_ns = ns;
+    }
+
+    void reset() {
+        std::memset(counts, 0, sizeof(counts));
+        n = 0;
+        max_ns = 0;
+    }
+
+    double percentile_us(double p) const {
+        if (n == 0) return 0.0;
+        uint64_t k = static_cast<uint64_t>(p / 100.0 * (n - 1) + 0.5);
+        uint64_t seen = 0;
+        for (int b = 0; b < BUCKETS; ++b) {
+            seen += counts[b];
+            if (seen > k) return std::min(upper_bound(b), max_ns) / 1000.0;
+        }
+        return max_ns / 1000.0;
+    }
+
+    void report(const char* label) const {
+        if (n == 0) return;
+        std::cout << label << " n=" << n
+                  << " p50=" << percentile_us(50) << "us"
+                  << " p90=" << percentile_us(90) << "us"
+                  << " p99=" << percentile_us(99) << "us"
+                  << " p99.9=" << percentile_us(99.9) << "us"
+                  << " max=" << max_ns / 1000.0 << "us" << std::endl;
+    }
+};
+
+struct LatencyStats {
+    LatencyHistogram window;  // Sejak laporan terakhir
+    LatencyHistogram total;   // Seluruh sesi
+
+    void add(uint64_t ns) { window.add(ns); total.add(ns); }
+};
+
+static std::atomic<bool> g_stop(false);
+static void handle_signal(int) { g_stop = true; }
+
+enum class ReadStatus { Ok, Missed, Pending };
+
+class RingReader {
+public:
+    RingReader(const uint8_t* base, uint32_t capacity)
+        : base_(base), capacity_(capacity) {
+        next_seq_ = write_seq() + 1; // Mulai dari data terbaru
+    }
+
+    uint64_t write_seq() const { return load_u64_acquire(base_ + WRITE_SEQ_OFFSET); }
+    uint64_t last_consumed() const { return next_seq_ - 1; }
+
+    // Protokol seqlock: seq harus 2n sebelum dan sesudah payload disalin
+    ReadStatus read_record(uint64_t n, SpeedRecord& out) {
+        const uint8_t* slot = base_ + HEADER_SIZE + ((n - 1) % capacity_) * RECORD_SIZE;
+        uint64_t deadline = monotonic_ns() + SPIN_TIMEOUT_NS;
+        while (true) {
+            uint64_t seq_before = load_u64_acquire(slot);
+            if (seq_before > 2 * n) return ReadStatus::Missed;
+            if (seq_before < 2 * n) {
+                // Penulis sedang di slot ini; jika terlalu lama, anggap penulis berhenti
+                if (seq_before == 2 * n - 1 && monotonic_ns() < deadline) continue;
+                return ReadStatus::Pending;
+            }
+            std::memcpy(&out.payload, slot + PAYLOAD_OFFSET, sizeof(RecordPayload));
+            std::atomic_thread_fence(std::memory_order_acquire);
+            uint64_t seq_after = load_u64_acquire(slot);
+            if (seq_after == seq_before) {
+                out.seq = n;
+                return ReadStatus::Ok;
+            }
+            ++torn_reads;
+        }
     }
 
-    HANDLE hShm = OpenFileMapping(FILE_MAP_ALL_ACCESS, FALSE, SHM_NAME);
+    // Panggil `handler` untuk setiap record baru; kembalikan jumlah record yang dibaca
+    template <typename Handler>
+    size_t poll(Handler handler) {
+        size_t count = 0;
+        uint64_t latest = write_seq();
+        if (latest >= capacity_ && next_seq_ < latest - capacity_ + 1) {
+            missed += (latest - capacity_ + 1) - next_seq_;
+            next_seq_ = latest - capacity_ + 1;
+        }
+        SpeedRecord record;
+        while (next_seq_ <= latest) {
+            ReadStatus status = read_record(next_seq_, record);
+            if (status == ReadStatus::Pending) break;
+            if (status == ReadStatus::Missed) {
+                ++missed;
+            } else {
+                handler(record);
+                ++count;
+            }
+            ++next_seq_;
+        }
+        return count;
+    }
+
+    uint64_t missed = 0;
+    uint64_t torn_reads = 0;
+
+private:
+    const uint8_t* base_;
+    uint32_t capacity_;
+    uint64_t next_seq_;
+};
+
+int main(int argc, char** argv) {
+    // --- ARGUMEN ---
+    int poll_ms = 0;          // 0 = event-driven
+    uint64_t spin_us = 50;
+    double report_s = 1.0;
+    bool verbose = false;
+    for (int i = 1; i < argc; ++i) {
+        std::string arg = argv[i];
+        if (arg == "--poll-ms" && i + 1 < argc) poll_ms = std::atoi(argv[++i]);
+        else if (arg == "--spin-us" && i + 1 < argc) spin_us = std::strtoull(argv[++i], nullptr, 10);
+        else if (arg == "--report-s" && i + 1 < argc) report_s = std::atof(argv[++i]);
+        else if (arg == "--verbose") verbose = true;
+        else {
+            std::cerr << "Penggunaan: " << argv[0]
+                      << " [--poll-ms N] [--spin-us N] [--report-s N] [--verbose]" << std::endl;
+            return 1;
+        }
+    }
+    std::signal(SIGINT, handle_signal);
+    std::signal(SIGTERM, handle_signal);
+
+#ifdef _WIN32
+    // --- Implementasi Windows ---
+    HANDLE hShm = OpenFileMapping(FILE_MAP_READ | FILE_MAP_WRITE, FALSE, SHM_NAME);
     if (hShm == NULL) {
         std::cerr << "Error: Gagal membuka Shared Memory. Pastikan publisher (Python) sudah berjalan." << std::endl;
-        CloseHandle(hSem);
         return 1;
     }
 
-    void* pBuf = MapViewOfFile(hShm, FILE_MAP_ALL_ACCESS, 0, 0, DATA_SIZE);
+    // Peta seluruh mapping (ukuran 0 = sampai akhir), lalu validasi header
+    void* pBuf = MapViewOfFile(hShm, FILE_MAP_READ | FILE_MAP_WRITE, 0, 0, 0);
     if (pBuf == NULL) {
         std::cerr << "Error: Gagal memetakan view dari Shared Memory." << std::endl;
         CloseHandle(hShm);
-        CloseHandle(hSem);
         return 1;
     }
+    MEMORY_BASIC_INFORMATION info;
+    VirtualQuery(pBuf, &info, sizeof(info));
+    size_t map_size = info.RegionSize;
 
 #else
     // --- Implementasi Linux/macOS (POSIX) ---
-    std::string sem_posix_name = "/" + std::string(SEM_NAME);
-    sem_t* sem = sem_open(sem_posix_name.c_str(), 0);
-    if (sem == SEM_FAILED) {
-        perror("sem_open");
-        std::cerr << "Error: Gagal membuka Semaphore. Pastikan publisher (Python) sudah berjalan." << std::endl;
-        return 1;
-    }
-
+    // Dibuka read-write karena pembaca menaikkan/menurunkan penghitung `waiters`
     int shm_fd = shm_open(SHM_NAME, O_RDWR, 0666);
     if (shm_fd == -1) {
         perror("shm_open");
         std::cerr << "Error: Gagal membuka Shared Memory. Pastikan publisher (Python) sudah berjalan." << std::endl;
-        sem_close(sem);
         return 1;
     }
 
-    void* pBuf = mmap(0, DATA_SIZE, PROT_READ | PROT_WRITE, MAP_SHARED, shm_fd, 0);
+    struct stat st;
+    if (fstat(shm_fd, &st) == -1) {
+        perror("fstat");
+        close(shm_fd);
+        return 1;
+    }
+    size_t map_size = static_cast<size_t>(st.st_size);
+
+    void* pBuf = mmap(0, map_size, PROT_READ | PROT_WRITE, MAP_SHARED, shm_fd, 0);
     if (pBuf == MAP_FAILED) {
         perror("mmap");
         std::cerr << "Error: Gagal memetakan Shared Memory." << std::endl;
         close(shm_fd);
-        sem_close(sem);
         return 1;
     }
 #endif
 
-    std::cout << "Berhasil terhubung ke Shared Memory dan Semaphore." << std::endl;
-    std::cout << "Membaca data kecepatan..." << std::endl;
+    uint8_t* base = static_cast<uint8_t*>(pBuf);
+    RingHeader header;
+    std::memcpy(&header, base, sizeof(header));
+    int exit_code = 0;
 
-    try {
-        while (true) {
-#ifdef _WIN32
-            WaitForSingleObject(hSem, INFINITE);
-#else
-            sem_wait(sem);
-#endif
-            
-            double speed = *(static_cast<double*>(pBuf));
-            std::cout << "Kecepatan diterima: " << speed << " km/jam" << std::endl;
+    if (map_size < HEADER_SIZE || header.magic != RING_MAGIC || header.version != RING_VERSION ||
+        header.header_size != HEADER_SIZE || header.record_size != RECORD_SIZE ||
+        map_size < HEADER_SIZE + static_cast<size_t>(header.capacity) * RECORD_SIZE) {
+        std::cerr << "Error: Layout Shared Memory tidak dikenal (magic/versi/ukuran tidak cocok)." << std::endl;
+        exit_code = 1;
+    } else {
+        std::cout << "Berhasil terhubung ke ring telemetri (" << header.capacity << " slot)." << std::endl;
+        std::cout << "Membaca data kecepatan ("
+                  << (poll_ms > 0 ? "polling " + std::to_string(poll_ms) + " ms" : std::string("event-driven"))
+                  << ")..." << std::endl;
 
-#ifdef _WIN32
-            ReleaseSemaphore(hSem, 1, NULL);
-#else
-            sem_post(sem);
-#endif
-            
-            std::this_thread::sleep_for(std::chrono::milliseconds(1000));
-        }
-    } catch (...) {}
+        RingReader reader(base, header.capacity);
+        LatencyStats latency;
+        SpeedRecord last{};
+        uint64_t received = 0;
+        uint64_t report_ns = static_cast<uint64_t>(report_s * 1e9);
+        uint64_t next_report = monotonic_ns() + report_ns;
+        try {
+            while (!g_stop) {
+                // Setiap update diproses; latensi diukur dari timestamp publish penulis
+                reader.poll([&](const SpeedRecord& r) {
+                    uint64_t now = monotonic_ns();
+                    latency.add(now > r.payload.timestamp_ns ? now - r.payload.timestamp_ns : 0);
+                    last = r;
+                    ++received;
+                    if (verbose) {
+                        std::cout << "#" << r.seq << " frame " << r.payload.frame_index
+                                  << ": " << r.payload.speed_kmh << " km/jam" << std::endl;
+                    }
+                });
+
+                uint64_t now = monotonic_ns();
+                if (now >= next_report) {
+                    if (latency.window.n > 0) {
+                        std::cout << "Kecepatan diterima: " << last.payload.speed_kmh << " km/jam"
+                                  << " (frame " << last.payload.frame_index
+                                  << ", match " << last.payload.confidence
+                                  << ", terlewat " << reader.missed
+                                  << ", torn " << reader.torn_reads << ")" << std::endl;
+                        latency.window.report("  latensi");
+                        latency.window.reset();
+                    }
+                    next_report = now + report_ns;
+                }
+
+                if (poll_ms > 0) {
+                    std::this_thread::sleep_for(std::chrono::milliseconds(poll_ms));
+                } else {
+                    wait_for_update(base, reader.last_consumed(), spin_us * 1000, 100);
+                }
+            }
+        } catch (...) {}
+
+        std::cout << "\nTotal " << received << " record, terlewat " << reader.missed
+                  << ", torn " << reader.torn_reads << std::endl;
+        latency.total.report("Latensi total");
+    }
 
 #ifdef _WIN32
     UnmapViewOfFile(pBuf);
     CloseHandle(hShm);
-    CloseHandle(hSem);
 #else
-    munmap(pBuf, DATA_SIZE);
+    munmap(pBuf, map_size);
     close(shm_fd);
-    sem_close(sem);
 #endif
-    
+
     std::cout << "\nProgram reader berhenti." << std::endl;
-    return 0;
-}
\ No newline at end of file
+    return exit_code;
+}
@@ -0,0 +1,246 @@
+# multi_pano.py (Pemindaian Banyak Kamera dalam Satu Proses)
+#
+# Setiap sumber (indeks kamera, URL stream, atau file video) punya thread
+# capture sendiri, SlitScanEngine sendiri, panorama sendiri, dan kanal
+# kecepatan sendiri (log biner dan/atau ring telemetri). Pelacakan semua
+# sumber berbagi satu thread pool terbatas; OpenCV melepas GIL selama
+# matchTemplate/optical flow, jadi throughput total ikut naik dengan jumlah
+# core. Contoh:
+#   python multi_pano.py 0 1 rtsp://10.0.0.5/line3 --output-dir hasil --workers 4
+#   python multi_pano.py rekaman1.mp4 rekaman2.mp4 --output-dir hasil --speed-bin
+#
+# Tanpa GUI: tekan Ctrl+C untuk berhenti dan menyimpan semua panorama.
+
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import cv2
+
+from panorama_buffer import PanoramaBuffer
+from tiled_writer import TiledPanoramaWriter, DEFAULT_TILE_WIDTH
+from frame_source import ThreadedFrameSource, DROP_OLDEST, BLOCK, DEFAULT_QUEUE_SIZE
+from tracker import TRACKER_FULL
+from displacement import ESTIMATOR_MODES
+from slitscan_engine import SlitScanEngine
+from speed_stats import SpeedLog, format_ringkasan
+from telemetry_ring import TelemetryWriter, RING_SHM_NAME
+from load_governor import LoadGovernor, tambah_argumen_adaptif
+from frame_share import FrameSharePublisher, tambah_argumen_share, DEFAULT_SLOTS, DEFAULT_TAIL_COLUMNS
+
+DEFAULT_BATCH = 8               # Frame maksimum per tugas sebelum worker dilepas ke sumber lain
+POLL_INTERVAL = 0.005           # Detik; jeda penjadwal saat tidak ada sumber yang siap
+STATUS_INTERVAL = 5.0           # Detik antar baris status
+
+
+def buka_sumber(spec, queue_size):
+    # Angka = indeks kamera, file yang ada = rekaman, selain itu URL stream.
+    # Rekaman memakai BLOCK + timestamp video (tanpa frame hilang); kamera dan
+    # stream memakai DROP_OLDEST agar sumber yang tertinggal hanya membuang
+    # frame miliknya sendiri.
+    if spec.isdigit():
+        return ThreadedFrameSource(int(spec), queue_size=queue_size, policy=DROP_OLDEST)
+    if os.path.isfile(spec):
+        return ThreadedFrameSource(spec, queue_size=queue_size, policy=BLOCK, use_video_time=True)
+    return ThreadedFrameSource(spec, queue_size=queue_size, policy=DROP_OLDEST)
+
+
+class ScanChannel:
+    """Satu sumber: thread capture, engine, panorama, dan kanal kecepatan.
+
+    `pump()` dijalankan di thread pool, tetapi penjadwal menjamin paling
+    banyak satu `pump()` aktif per kanal, jadi frame diproses berurutan dan
+    engine tidak perlu lock.
+    """
+
+    def __init__(self, index, spec, output_dir, tracker_mode=TRACKER_FULL, roi_only=False,
+                 queue_size=DEFAULT_QUEUE_SIZE, stream=False, tile_width=DEFAULT_TILE_WIDTH,
+                 speed_bin=False, ring=False, target_latency=None, share=None,
+                 share_slots=DEFAULT_SLOTS, share_columns=DEFAULT_TAIL_COLUMNS):
+        self.name = f"src{index}"
+        self.spec = spec
+        self.cap = buka_sumber(spec, queue_size)
+        self.opened = self.cap.isOpened()
+        self.done = not self.opened
+        self.frames = 0
+        self.output_path = os.path.join(output_dir, f"{self.name}.png")
+        self.stream_dir = os.path.join(output_dir, self.name) if stream else None
+        if not self.opened:
+            return
+
+        height = self.cap.height
+        if self.stream_dir:
+            self.panorama = TiledPanoramaWriter(self.stream_dir, height, tile_width=tile_width)
+        else:
+            self.panorama = PanoramaBuffer(height)
+        # Frame dan ekor panorama sumber ini di shared memory SHARE_N_frames/SHARE_N_pano
+        self.share = None
+        if share:
+            self.share = FrameSharePublisher(f"{share}_{index}", self.cap.width, height, self.panorama,
+                                             slots=share_slots, tail_columns=share_columns)
+            self.panorama = self.share.panorama
+        self.engine = SlitScanEngine(self.cap.width, height, self.panorama, scanning=True,
+                                     tracker_mode=tracker_mode, roi_only=roi_only)
+
+        # --- KANAL KECEPATAN ---
+        self.speed_bin_path = os.path.join(output_dir, f"{self.name}.spdlog") if speed_bin else None
+        # Kamera/stream menambahkan ke log shift yang ada; rekaman selalu menulis ulang
+        self.speed_bin = (SpeedLog(self.speed_bin_path, append=not os.path.isfile(spec))
+                          if speed_bin else None)
+        self.ring = TelemetryWriter(f"{RING_SHM_NAME}_{index}") if ring else None
+
+        # Penahan beban hanya untuk sumber live (timestamp jam dinding)
+        live = not os.path.isfile(spec)
+        self.governor = LoadGovernor(target_latency) if target_latency and live else None
+
+    def ready(self):
+        # Ada frame (atau penanda akhir) yang menunggu di antrean
+        return self.cap.queue_depth > 0
+
+    def pump(self, max_frames=DEFAULT_BATCH):
+        # Proses frame yang sudah ada di antrean, paling banyak `max_frames`
+        engine = self.engine
+        for _ in range(max_frames):
+            if self.cap.queue_depth == 0:
+                break
+            ret, frame, timestamp, frame_index = self.cap.read(timeout=0)
+            if not ret:
+                self.done = self.cap.queue_depth > 0  # Penanda akhir tetap di antrean
+                break
+            engine.process(frame, timestamp, frame_index)
+            self.frames += 1
+            if self.speed_bin is not None:
+                self.speed_bin.append(frame_index, timestamp, engine.displacement, engine.confidence,
+                                      engine.instant_speed_kmh, engine.display_speed_kmh, engine.is_tracking)
+            if self.ring is not None:
+                self.ring.publish(engine.instant_speed_kmh, engine.confidence, frame_index)
+            if self.share is not None:
+                self.share.publish(frame, timestamp, frame_index, engine)
+            if self.governor is not None:
+                self.governor.update(time.time() - timestamp, engine)
+
+    def status(self):
+        if not self.opened:
+            return f"{self.name}: tidak bisa dibuka"
+        stats = self.cap.stats()
+        return (f"{self.name}: {self.frames} frame, {self.panorama.width} kolom, "
+                f"{self.engine.display_speed_kmh:.2f} km/jam, dibuang {stats['dropped']}")
+
+    def close(self):
+        if not self.opened:
+            return
+        self.cap.release()
+        if self.speed_bin is not None:
+            self.speed_bin.close()
+        if self.ring is not None:
+            self.ring.close()
+        if self.share is not None:
+            self.share.close()
+        if self.stream_dir:
+            self.panorama.close()
+            print(f"{self.name}: {self.panorama.width} kolom tersimpan sebagai tile di '{self.stream_dir}'")
+        elif self.panorama.width > 1:
+            cv2.imwrite(self.output_path, self.panorama.view())
+            print(f"{self.name}: gambar disimpan di {self.output_path}")
+        else:
+            print(f"{self.name}: tidak ada kolom yang terpindai, gambar tidak disimpan.")
+        print(f"{self.name}: {format_ringkasan(self.engine.speed_stats.summary())}")
+        if self.governor is not None:
+            print(f"{self.name}: {self.governor.report(self.engine)}")
+
+
+def jalankan(channels, workers, batch=DEFAULT_BATCH, duration=None):
+    # Penjadwal: kirim satu tugas pump() untuk setiap kanal yang siap dan
+    # tidak sedang diproses. Tugas dibatasi `batch` frame, sehingga sumber
+    # yang berat tidak memonopoli worker dan sumber yang lambat/macet tidak
+    # pernah menahan sumber lain.
+    for channel in channels:
+        if channel.opened:
+            channel.cap.start()
+    start = time.time()
+    last_status = start
+    pending = {}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scan") as pool:
+        try:
+            while any(not c.done for c in channels) or pending:
+                busy = set(pending.values())
+                for channel in channels:
+                    if not channel.done and channel not in busy and channel.ready():
+                        pending[pool.submit(channel.pump, batch)] = channel
+
+                if pending:
+                    finished, _ = wait(pending, timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        pending.pop(future)
+                        future.result()
+                else:
+                    time.sleep(POLL_INTERVAL)
+
+                now = time.time()
+                if now - last_status >= STATUS_INTERVAL:
+                    last_status = now
+                    print(" | ".join(c.status() for c in channels))
+                if duration is not None and now - start >= duration:
+                    break
+        except KeyboardInterrupt:
+            print("Dihentikan oleh pengguna.")
+        # Tunggu tugas yang masih berjalan sebelum kanal ditutup
+        wait(pending)
+    return time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pemindai slit-scan untuk banyak kamera sekaligus.")
+    parser.add_argument("sources", nargs="+", help="Indeks kamera, URL stream, atau file video")
+    parser.add_argument("--output-dir", default=".", help="Folder hasil (srcN.png, srcN.spdlog, srcN/)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="Jumlah thread pelacakan bersama (default: jumlah CPU)")
+    parser.add_argument("--batch", type=int, default=DEFAULT_BATCH,
+                        help="Frame maksimum per tugas sebelum worker pindah ke sumber lain")
+    parser.add_argument("--tracker", choices=ESTIMATOR_MODES, default=TRACKER_FULL, help="Mode pelacak")
+    parser.add_argument("--roi", action="store_true",
+                        help="Hanya flip dan grayscale pita pencarian, bukan seluruh frame")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE,
+                        help="Kapasitas antrean frame per sumber")
+    parser.add_argument("--stream", action="store_true",
+                        help="Tulis panorama setiap sumber sebagai tile ke OUTPUT_DIR/srcN/")
+    parser.add_argument("--tile-width", type=int, default=DEFAULT_TILE_WIDTH, help="Lebar tile (kolom)")
+    parser.add_argument("--speed-bin", action="store_true",
+                        help="Simpan log kecepatan biner per sumber ke OUTPUT_DIR/srcN.spdlog")
+    parser.add_argument("--ring", action="store_true",
+                        help=f"Publikasikan kecepatan setiap sumber ke shared memory '{RING_SHM_NAME}_N'")
+    parser.add_argument("--duration", type=float, help="Berhenti otomatis setelah N detik")
+    tambah_argumen_adaptif(parser)
+    tambah_argumen_share(parser)
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    channels = []
+    for i, spec in enumerate(args.sources):
+        channel = ScanChannel(i, spec, args.output_dir, tracker_mode=args.tracker, roi_only=args.roi,
+                              queue_size=args.queue_size, stream=args.stream, tile_width=args.tile_width,
+                              speed_bin=args.speed_bin, ring=args.ring,
+                              target_latency=args.target_latency if args.adaptive else None,
+                              share=args.share, share_slots=args.share_slots,
+                              share_columns=args.share_columns)
+        if channel.opened:
+            print(f"{channel.name}: '{spec}' {channel.cap.width}x{channel.cap.height}")
+        else:
+            print(f"Error: Tidak bisa membuka sumber '{spec}' ({channel.name}), dilewati.")
+        channels.append(channel)
+
+    if not any(c.opened for c in channels):
+        return
+    workers = max(1, args.workers or 1)
+    print(f"{sum(c.opened for c in channels)} sumber, {workers} worker. Tekan Ctrl+C untuk berhenti.")
+    elapsed = jalankan(channels, workers, args.batch, args.duration)
+
+    for channel in channels:
+        channel.close()
+    total = sum(c.frames for c in channels)
+    print(f"{total} frame diproses dalam {elapsed:.2f} s ({total / elapsed if elapsed > 0 else 0.0:.1f} fps total).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+# offline_pano.py (Penyusunan Panorama Dua Tahap untuk Rekaman)
+#
+# panoVideo.py --headless men-decode, mem-flip, dan menyalin setiap frame
+# resolusi penuh, padahal panorama hanya butuh beberapa kolom dari frame
+# yang objeknya bergerak. Untuk rekaman, pekerjaan dibagi dua tahap:
+#
+#   1. Lintasan gerak: hanya setiap `decimate` frame yang diambil (frame lain
+#      cukup grab() tanpa konversi warna), lalu pita pencarian diubah ke
+#      grayscale, diperkecil `scale` kali, dan dilacak dengan estimator yang
+#      sama dengan engine (displacement.py).
+#   2. Ekstraksi: lintasan dihaluskan dan diinterpolasi ke setiap frame,
+#      jumlah kolom per frame dihitung dengan aturan SlitCapture yang sama,
+#      lalu hanya frame yang menyumbang kolom yang di-decode (seek untuk
+#      celah panjang) dan hanya strip di sekitar slit yang diambil.
+#
+#   python offline_pano.py rekaman.mp4 hasil.png --decimate 2 --scale 2
+#   python panoVideo.py rekaman.mp4 hasil.png --headless --two-pass
+
+import argparse
+import csv
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from panorama_buffer import PanoramaBuffer
+from slit_capture import SlitCapture
+from frame_source import waktu_video
+from tracker import TRACKER_FULL
+from displacement import buat_estimator, ESTIMATOR_MODES
+from slitscan_engine import (PIXELS_PER_METER, SPEED_THRESHOLD_KMH, CAPTURE_DISTANCE_PIXELS,
+                             TRACKING_CONFIDENCE_THRESHOLD, DEFAULT_BOX_SIZE, TRACKING_RESET_INTERVAL)
+
+DEFAULT_DECIMATE = 2            # Lacak setiap N frame di tahap 1
+DEFAULT_SCALE = 2               # Faktor perkecil pita di tahap 1
+DEFAULT_SMOOTH = 3              # Lebar jendela rata-rata bergerak lintasan (sampel)
+MAX_FILL_GAP = 2                # Celah sampel tak terukur (reset/gagal) yang diisi interpolasi
+SEEK_MIN_GAP = 120              # Celah frame minimum agar seek lebih murah daripada grab() berurutan
+MIN_BOX_SIZE = 16
+
+
+class MotionTrack:
+    """Hasil tahap 1: pergeseran (piksel resolusi penuh, arah flip) antar sampel.
+
+    `frames[j]`/`times[j]` adalah frame sampel ke-j; `shifts[j]` pergeseran
+    dari sampel j-1 ke j, dan `valid[j]` False jika interval itu tidak
+    terukur (pelacakan baru dimulai, di-reset, atau gagal).
+    """
+
+    def __init__(self, frames, times, shifts, valid, total_frames, fps):
+        self.frames = np.asarray(frames, dtype=np.int64)
+        self.times = np.asarray(times, dtype=np.float64)
+        self.shifts = np.asarray(shifts, dtype=np.float64)
+        self.valid = np.asarray(valid, dtype=bool)
+        self.total_frames = total_frames
+        self.fps = fps
+
+    def per_frame(self, smooth=DEFAULT_SMOOTH, max_fill_gap=MAX_FILL_GAP):
+        """Kembalikan (pergeseran, kecepatan_kmh) untuk setiap frame 0..total-1.
+
+        Kecepatan per interval sampel dihitung dari timestamp video. Interval
+        tak terukur yang diapit interval valid (paling banyak `max_fill_gap`)
+        diisi interpolasi linear, sisanya dianggap diam. Kecepatan lalu
+        dihaluskan dengan rata-rata bergerak `smooth` sampel dan dibagi rata
+        ke frame-frame di dalam intervalnya.
+        """
+        shifts = np.zeros(self.total_frames)
+        speeds = np.zeros(self.total_frames)
+        if len(self.frames) < 2:
+            return shifts, speeds
+
+        span = np.diff(self.frames).astype(np.float64)      # Frame per interval
+        dt = np.diff(self.times)
+        velocity = self.shifts[1:] / span                     # Piksel per frame
+        valid = self.valid[1:].copy()
+
+        # --- ISI CELAH PENDEK ---
+        idx = np.flatnonzero(valid)
+        if len(idx):
+            filled = np.interp(np.arange(len(velocity)), idx, velocity[idx])
+            run_start = None
+            for j in range(len(valid) + 1):
+                if j < len(valid) and not valid[j]:
+                    if run_start is None:
+                        run_start = j
+                    continue
+                if run_start is not None:
+                    inside = run_start > 0 and j < len(valid)
+                    if not inside or j - run_start > max_fill_gap:
+                        filled[run_start:j] = 0.0
+                    run_start = None
+            velocity = filled
+        else:
+            velocity = np.zeros_like(velocity)
+
+        # --- PENGHALUSAN ---
+        if smooth > 1 and len(velocity) >= smooth:
+            kernel = np.ones(smooth)
+            total = np.convolve(velocity, kernel, mode="same")
+            count = np.convolve(np.ones_like(velocity), kernel, mode="same")
+            velocity = total / count
+
+        # --- INTERPOLASI KE SETIAP FRAME ---
+        frame_time = np.where(dt > 0, dt / span, 1.0 / self.fps if self.fps > 0 else 0.0)
+        for j in range(len(velocity)):
+            f0, f1 = self.frames[j] + 1, self.frames[j + 1] + 1
+            shifts[f0:f1] = velocity[j]
+            if frame_time[j] > 0:
+                speeds[f0:f1] = abs(velocity[j]) / frame_time[j] / PIXELS_PER_METER * 3.6
+        return shifts, speeds
+
+
+def lacak_gerakan(video_path, tracker_mode=TRACKER_FULL, decimate=DEFAULT_DECIMATE, scale=DEFAULT_SCALE,
+                  box_size=DEFAULT_BOX_SIZE, confidence_threshold=TRACKING_CONFIDENCE_THRESHOLD,
+                  reset_interval=TRACKING_RESET_INTERVAL):
+    # Tahap 1: lintasan gerak murah dari pita grayscale yang diperkecil
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        return None
+    W = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    H = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    small_w, small_h = W // scale, H // scale
+    estimator = buat_estimator(tracker_mode, small_w, small_h, max(MIN_BOX_SIZE, box_size // scale),
+                               confidence_threshold, band_input=True)
+    band_h = estimator.band_y1 - estimator.band_y0
+    y0, y1 = estimator.band_y0 * scale, min(H, estimator.band_y1 * scale)
+    x_scale = W / small_w
+
+    # --- BUFFER PRAALOKASI ---
+    gray = np.empty((y1 - y0, W), dtype=np.uint8)
+    small = np.empty((band_h, small_w), dtype=np.uint8)
+    flipped = np.empty_like(small)
+
+    frames, times, shifts, valid = [], [], [], []
+    tracking = False
+    last_reset = None
+    frame_index = 0
+    while True:
+        if frame_index % decimate:
+            if not cap.grab():
+                break
+            frame_index += 1
+            continue
+        ret, frame = cap.read()
+        if not ret:
+            break
+        t = waktu_video(cap, frame_index, fps)
+        cv2.cvtColor(frame[y0:y1], cv2.COLOR_BGR2GRAY, dst=gray)
+        cv2.resize(gray, (small_w, band_h), dst=small, interpolation=cv2.INTER_AREA)
+        cv2.flip(small, 1, dst=flipped)  # Arah gerak sama dengan engine (frame di-flip)
+
+        if last_reset is None:
+            last_reset = t
+        if estimator.needs_periodic_reset and t - last_reset >= reset_interval:
+            tracking = False
+            last_reset = t
+
+        shift, ok = 0.0, False
+        if not tracking:
+            tracking = estimator.start(flipped, estimator.band_y0, t)
+        else:
+            _, pixel_shift = estimator.update(flipped, estimator.band_y0, t)
+            if pixel_shift is None:
+                tracking = False
+            else:
+                shift, ok = pixel_shift * x_scale, True
+        frames.append(frame_index)
+        times.append(t)
+        shifts.append(shift)
+        valid.append(ok)
+        frame_index += 1
+    cap.release()
+    return MotionTrack(frames, times, shifts, valid, frame_index, fps), (W, H)
+
+
+def rencana_kolom(shifts, speeds, frame_width, capture_distance=CAPTURE_DISTANCE_PIXELS,
+                  speed_threshold_kmh=SPEED_THRESHOLD_KMH):
+    # Jumlah kolom per frame dengan aturan akumulasi SlitCapture yang sama
+    slit = SlitCapture(None, frame_width // 2, capture_distance, mirrored=True)
+    columns = np.zeros(len(shifts), dtype=np.int64)
+    for f in np.flatnonzero(speeds > speed_threshold_kmh):
+        columns[f] = slit.columns_due(shifts[f])
+    return columns
+
+
+def ekstrak_strip(video_path, shifts, columns, frame_size, capture_distance=CAPTURE_DISTANCE_PIXELS,
+                  seek_min_gap=SEEK_MIN_GAP):
+    # Tahap 2: decode hanya frame yang menyumbang kolom
+    W, H = frame_size
+    cap = cv2.VideoCapture(video_path)
+    panorama = PanoramaBuffer(H)
+    slit = SlitCapture(panorama, W // 2, capture_distance, mirrored=True)
+    contributing = np.flatnonzero(columns > 0)
+    panorama.reserve(int(columns.sum()))
+
+    position = 0  # Indeks frame yang akan dibaca berikutnya
+    decoded = seeks = 0
+    for f in contributing:
+        gap = f - position
+        if gap > seek_min_gap:
+            last_good = position
+            cap.set(cv2.CAP_PROP_POS_FRAMES, int(f))
+            seeks += 1
+            position = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+            gap = f - position  # Backend yang seek ke keyframe sebelumnya
+            if gap < 0:
+                # Seek melewati f: kembali ke posisi terakhir yang benar lalu grab
+                # maju, dan seek tidak dipakai lagi untuk video ini
+                seek_min_gap = float("inf")
+                cap.set(cv2.CAP_PROP_POS_FRAMES, last_good)
+                position = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+                if position > f:
+                    # Seek mundur pun tidak bisa dipercaya: decode ulang dari awal
+                    cap.release()
+                    cap = cv2.VideoCapture(video_path)
+                    position = 0
+                gap = f - position
+        for _ in range(max(0, gap)):
+            cap.grab()
+        ret, frame = cap.read()
+        if not ret:
+            break
+        position = f + 1
+        decoded += 1
+        panorama.append(slit.extract_strip(frame, int(columns[f]), shifts[f]))
+    cap.release()
+    return panorama, decoded, seeks
+
+
+def proses_dua_tahap(video_path, output_path, tracker_mode=TRACKER_FULL, decimate=DEFAULT_DECIMATE,
+                     scale=DEFAULT_SCALE, smooth=DEFAULT_SMOOTH, seek_min_gap=SEEK_MIN_GAP, track_csv=None):
+    start = time.time()
+    hasil = lacak_gerakan(video_path, tracker_mode, decimate, scale)
+    if hasil is None:
+        print(f"Error: Tidak bisa membuka file video '{video_path}'")
+        return None
+    track, frame_size = hasil
+    shifts, speeds = track.per_frame(smooth)
+    columns = rencana_kolom(shifts, speeds, frame_size[0])
+    pass1 = time.time() - start
+    print(f"Tahap 1: {track.total_frames} frame, {len(track.frames)} sampel dilacak "
+          f"({frame_size[0] // scale}px, tiap {decimate} frame) dalam {pass1:.2f} s")
+
+    if track_csv:
+        with open(track_csv, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame", "pergeseran_px", "kecepatan_kmh", "kolom"])
+            for i in range(track.total_frames):
+                writer.writerow([i, f"{shifts[i]:.4f}", f"{speeds[i]:.4f}", int(columns[i])])
+
+    t = time.time()
+    panorama, decoded, seeks = ekstrak_strip(video_path, shifts, columns, frame_size, seek_min_gap=seek_min_gap)
+    pass2 = time.time() - t
+    print(f"Tahap 2: {decoded} frame di-decode ({seeks} seek), {panorama.width} kolom dalam {pass2:.2f} s")
+
+    if panorama.width > 1:
+        cv2.imwrite(output_path, panorama.view())
+        print(f"Gambar berhasil disimpan di: {output_path}")
+    else:
+        print("Tidak ada kolom yang terpindai, gambar tidak disimpan.")
+    elapsed = time.time() - start
+    return {"frames": track.total_frames, "columns": panorama.width, "elapsed": elapsed,
+            "decoded": decoded, "seeks": seeks}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Panorama dari rekaman dalam dua tahap "
+                                                 "(lintasan gerak murah, lalu ekstraksi strip).")
+    parser.add_argument("input", help="File video masukan")
+    parser.add_argument("output", help="File gambar hasil pindaian")
+    parser.add_argument("--tracker", choices=ESTIMATOR_MODES, default=TRACKER_FULL, help="Mode pelacak tahap 1")
+    parser.add_argument("--decimate", type=int, default=DEFAULT_DECIMATE, help="Lacak setiap N frame")
+    parser.add_argument("--scale", type=int, default=DEFAULT_SCALE, help="Faktor perkecil pita pelacakan")
+    parser.add_argument("--smooth", type=int, default=DEFAULT_SMOOTH,
+                        help="Lebar rata-rata bergerak lintasan (sampel, 1 = tanpa penghalusan)")
+    parser.add_argument("--seek-gap", type=int, default=SEEK_MIN_GAP,
+                        help="Celah frame minimum untuk seek di tahap 2")
+    parser.add_argument("--track-csv", help="Simpan lintasan per frame ke file CSV")
+    args = parser.parse_args()
+    if args.decimate < 1 or args.scale < 1:
+        parser.error("--decimate dan --scale minimal 1")
+
+    hasil = proses_dua_tahap(args.input, args.output, args.tracker, args.decimate, args.scale,
+                             args.smooth, args.seek_gap, args.track_csv)
+    if hasil is None:
+        sys.exit(1)
+    print(f"{hasil['frames']} frame diproses dalam {hasil['elapsed']:.2f} s, {hasil['columns']} kolom.")
+
+
+if __name__ == "__main__":
+    main()
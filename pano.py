@@ -1,14 +1,46 @@
 import cv2
 import numpy as np
+import argparse
 import time
-from collections import deque # Menggunakan deque untuk efisiensi
-
-# --- PENGATURAN DAN KALIBRASI ---
-PIXELS_PER_METER = 500
-SPEED_THRESHOLD_KMH = 0.15
-CAPTURE_DISTANCE_PIXELS = 1.0
-TRACKING_CONFIDENCE_THRESHOLD = 0.8 
-
+from panorama_buffer import PanoramaBuffer
+from tiled_writer import TiledPanoramaWriter, DEFAULT_TILE_WIDTH
+from frame_source import ThreadedFrameSource, QUEUE_POLICIES, DROP_OLDEST, DEFAULT_QUEUE_SIZE
+from tracker import TRACKER_FULL
+from displacement import ESTIMATOR_MODES
+from stage_metrics import buat_metrics, tambah_argumen_metrics
+from speed_stats import SpeedLog, format_ringkasan
+from load_governor import LoadGovernor, tambah_argumen_adaptif
+from frame_share import FrameSharePublisher, tambah_argumen_share
+from slitscan_engine import SlitScanEngine
+from display import (DisplayLimiter, PanoramaView, gambar_overlay, PESAN_EVENT,
+                     DEFAULT_DISPLAY_FPS, DEFAULT_VIEWPORT_WIDTH)
+
+# --- ARGUMEN BARIS PERINTAH ---
+parser = argparse.ArgumentParser(description="Pemindai slit-scan dari kamera live.")
+parser.add_argument("--camera", type=int, default=0, help="Indeks kamera")
+parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE, help="Kapasitas antrean frame")
+parser.add_argument("--queue-policy", choices=QUEUE_POLICIES, default=DROP_OLDEST,
+                    help="Perilaku saat antrean penuh (drop_oldest = latensi rendah, block = tanpa frame hilang)")
+parser.add_argument("--tracker", choices=ESTIMATOR_MODES, default=TRACKER_FULL,
+                    help="Mode pelacak (predictive = jendela sempit + piramida, "
+                         "lk = optical flow titik fitur tanpa reset berkala)")
+parser.add_argument("--stream-dir", help="Tulis panorama sebagai tile ke folder ini selama pemindaian "
+                                         "(memori tetap, tahan crash)")
+parser.add_argument("--tile-width", type=int, default=DEFAULT_TILE_WIDTH, help="Lebar tile (kolom)")
+parser.add_argument("--roi", action="store_true",
+                    help="Hanya flip dan grayscale pita pencarian, bukan seluruh frame")
+parser.add_argument("--display-fps", type=float, default=DEFAULT_DISPLAY_FPS,
+                    help="Batas refresh jendela per detik (0 = setiap frame)")
+parser.add_argument("--viewport-width", type=int, default=DEFAULT_VIEWPORT_WIDTH,
+                    help="Lebar viewport ekor panorama di jendela hasil (kolom)")
+parser.add_argument("--speed-bin", help="Simpan log kecepatan per frame ke file biner append-only "
+                                        "(baca dengan: python speed_stats.py FILE)")
+tambah_argumen_adaptif(parser)
+tambah_argumen_share(parser)
+tambah_argumen_metrics(parser)
+args = parser.parse_args()
+# Timer per tahap; tanpa --metrics semua pemanggilan metrics.* kosong
+metrics = buat_metrics(args.metrics, args.metrics_format, args.metrics_interval)
 
 # --- TAMPILAN INSTRUKSI ---
 print("Program Pemindai Adaptif Cerdas (v4 - Kecepatan Stabil & Reset)")
@@ -19,14 +51,15 @@ print("Tekan 'q' untuk KELUAR dan menyimpan gambar.")
 print("-------------------------------------")
 
 # --- INISIALISASI ---
-# cap = cv2.VideoCapture(1, cv2.CAP_DSHOW)
-cap = cv2.VideoCapture(0)
+# cap = ThreadedFrameSource(1, api_preference=cv2.CAP_DSHOW)
+# Thread capture mengisi antrean terbatas; loop utama hanya memproses frame
+cap = ThreadedFrameSource(args.camera, queue_size=args.queue_size, policy=args.queue_policy)
 if not cap.isOpened():
     print("Error: Tidak bisa membuka kamera.")
     exit()
 
-frame_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+frame_width = cap.width
+frame_height = cap.height
 print(f"Resolusi Kamera: {frame_width}x{frame_height}")
 
 # --- MEMBUAT PLACEHOLDER ---
@@ -34,138 +67,82 @@ placeholder = np.zeros((frame_height, 500, 3), dtype=np.uint8)
 cv2.putText(placeholder, "Hasil akan muncul di sini...", (50, frame_height // 2), 
             cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
 
-# --- VARIABEL STATUS ---
-is_scanning_mode_active = False
-hasil_scan = placeholder.copy()
-is_first_capture = True
-posisi_slit = frame_width // 2
-accumulated_pixel_shift = 0.0
-is_tracking = False
-last_known_position = None
-last_frame_time = time.time()
-template = None
-
-# --- VARIABEL BARU UNTUK KECEPATAN RATA-RATA ---
-speed_buffer = deque() # Buffer untuk menyimpan (waktu, kecepatan_mps)
-display_speed_kmh = 0.0 # Kecepatan yang akan ditampilkan di layar
-last_speed_update_time = time.time()
-
-# --- VARIABEL BARU UNTUK RESET PELACAKAN ---
-last_tracking_reset_time = time.time()
-
-# --- PENGATURAN KOTAK ---
-box_size = 100
-w, h = box_size, box_size
-x_box_init = (frame_width - w) // 2
-y_box_init = (frame_height - h) // 2
+# --- ENGINE PEMINDAI ---
+if args.stream_dir:
+    panorama = TiledPanoramaWriter(args.stream_dir, frame_height, tile_width=args.tile_width)
+else:
+    panorama = PanoramaBuffer(frame_height) # Kolom hasil pindaian (prealokasi)
+# Frame live dan ekor panorama untuk proses inspeksi/ML (lihat frame_share.py)
+share = None
+if args.share:
+    share = FrameSharePublisher(args.share, frame_width, frame_height, panorama,
+                                slots=args.share_slots, tail_columns=args.share_columns)
+    panorama = share.panorama
+engine = SlitScanEngine(frame_width, frame_height, panorama, tracker_mode=args.tracker,
+                        roi_only=args.roi, metrics=metrics)
+# Tampilan di-refresh terpisah dari pemrosesan, maksimal --display-fps per detik
+limiter = DisplayLimiter(args.display_fps)
+pano_view = PanoramaView(frame_height, args.viewport_width)
+# Log biner per frame untuk analisis kecepatan satu shift (ditambahkan ke file yang ada)
+speed_bin = SpeedLog(args.speed_bin, append=True) if args.speed_bin else None
+# Penahan beban: latensi = selesai diproses dikurangi waktu frame diterima
+governor = LoadGovernor(args.target_latency, metrics=metrics) if args.adaptive else None
 
 # --- LOOP UTAMA ---
-cv2.imshow('Hasil Pindaian', hasil_scan)
+cv2.imshow('Hasil Pindaian', placeholder)
+cap.start()
 while True:
-    ret, frame = cap.read()
+    # current_time = waktu frame diterima di thread capture, bukan waktu diproses
+    t = metrics.now()
+    ret, frame, current_time, frame_index = cap.read()
+    metrics.record("read", t)
     if not ret: break
 
-    frame = cv2.flip(frame, 1)
-    display_frame = frame.copy()
-    current_time = time.time()
-    delta_time = current_time - last_frame_time
-    last_frame_time = current_time
-
-    # --- BLOK BARU: LOGIKA RESET PELACAKAN SETIAP DETIK ---
-    if is_scanning_mode_active and (current_time - last_tracking_reset_time >= 1.0):
-        is_tracking = False
-        template = None
-        last_known_position = None
-        last_tracking_reset_time = current_time # Perbarui timer agar reset lagi 1 detik dari sekarang
-        print("INFO: Posisi pelacakan di-reset ke tengah.")
-    # --- AKHIR BLOK BARU ---
-
-    instant_speed_mps = 0.0 # Kecepatan sesaat per frame
-
-    # --- LOGIKA UTAMA ---
-    if is_scanning_mode_active:
-        if not is_tracking:
-            template = frame[y_box_init : y_box_init + h, x_box_init : x_box_init + w]
-            gray_template = cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
-            if cv2.Laplacian(gray_template, cv2.CV_64F).var() > 20:
-                is_tracking = True
-                last_known_position = (x_box_init, y_box_init)
-                print("Objek terdeteksi, memulai pelacakan...")
-        
-        else: # Jika sudah is_tracking
-            search_area = frame[y_box_init - 20 : y_box_init + h + 20, :]
-            res = cv2.matchTemplate(search_area, template, cv2.TM_CCOEFF_NORMED)
-            _, max_val, _, max_loc = cv2.minMaxLoc(res)
-
-            if max_val >= TRACKING_CONFIDENCE_THRESHOLD:
-                current_pos = (max_loc[0], max_loc[1] + y_box_init - 20)
-                pixel_distance = abs(current_pos[0] - last_known_position[0])
-                
-                if delta_time > 0:
-                    instant_speed_mps = (pixel_distance / PIXELS_PER_METER) / delta_time
-
-                if (instant_speed_mps * 3.6) > SPEED_THRESHOLD_KMH:
-                    accumulated_pixel_shift += pixel_distance
-                    while accumulated_pixel_shift >= CAPTURE_DISTANCE_PIXELS:
-                        irisan = frame[:, posisi_slit:posisi_slit+1]
-                        if is_first_capture:
-                            hasil_scan = irisan
-                            is_first_capture = False
-                        else:
-                            hasil_scan = np.concatenate((hasil_scan, irisan), axis=1)
-                        accumulated_pixel_shift -= CAPTURE_DISTANCE_PIXELS
-                
-                last_known_position = current_pos
-                template = frame[current_pos[1]:current_pos[1]+h, current_pos[0]:current_pos[0]+w]
-                cv2.rectangle(display_frame, current_pos, (current_pos[0] + w, current_pos[1] + h), (0, 255, 0), 2)
-            
-            else:
-                is_tracking = False
-                print("Pelacakan gagal, mencari objek baru...")
-
-    # --- MODIFIKASI: BLOK PERHITUNGAN KECEPATAN RATA-RATA ---
-    speed_buffer.append((current_time, instant_speed_mps))
-    while speed_buffer and current_time - speed_buffer[0][0] > 1.0:
-        speed_buffer.popleft()
-
-    if current_time - last_speed_update_time >= 1.0:
-        if speed_buffer and is_tracking:
-            avg_speed_mps = sum(item[1] for item in speed_buffer) / len(speed_buffer)
-            display_speed_kmh = avg_speed_mps * 3.6
-        else:
-            display_speed_kmh = 0.0
-        last_speed_update_time = current_time
+    for event in engine.process(frame, current_time):
+        print(PESAN_EVENT[event])
+    if speed_bin is not None:
+        speed_bin.append(frame_index, current_time, engine.displacement, engine.confidence,
+                         engine.instant_speed_kmh, engine.display_speed_kmh, engine.is_tracking)
+    if share is not None:
+        share.publish(frame, current_time, frame_index, engine)
+    if governor is not None:
+        governor.update(time.time() - current_time, engine, limiter)
+    metrics.count("frames")
+    metrics.maybe_flush()
+    if not limiter.due():
+        continue
 
     # --- VISUALISASI ---
-    cv2.line(display_frame, (posisi_slit, 0), (posisi_slit, frame_height), (0, 255, 0), 1)
-    scan_status_text = f"SCAN MODE: {'ACTIVE' if is_scanning_mode_active else 'OFF'}"
-    tracking_status_text = "TRACKING" if is_tracking else "WAITING FOR OBJECT"
-    speed_text = f"Kecepatan: {display_speed_kmh:.2f} km/jam" 
-    
-    cv2.putText(display_frame, scan_status_text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-    if is_scanning_mode_active:
-        cv2.putText(display_frame, tracking_status_text, (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
-        cv2.putText(display_frame, speed_text, (10, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-    
-    if not is_tracking and is_scanning_mode_active:
-        cv2.rectangle(display_frame, (x_box_init, y_box_init), (x_box_init + w, y_box_init + h), (255, 255, 0), 2)
-
+    # Overlay digambar langsung di buffer tampilan engine, tanpa salinan frame
+    t = metrics.now()
+    display_frame = engine.display_frame()
+    metrics.record("copy", t)
+    gambar_overlay(display_frame, engine)
+    queue_text = f"Antrean: {cap.queue_depth} | Dibuang: {cap.frames_dropped}"
+    cv2.putText(display_frame, queue_text, (10, frame_height - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
+
+    t = metrics.now()
+    pano_image = pano_view.render(panorama)
+    metrics.record("render", t)
+
+    t = metrics.now()
     cv2.imshow('Pemindai Adaptif Cerdas', display_frame)
-    cv2.imshow('Hasil Pindaian', hasil_scan)
+    cv2.imshow('Hasil Pindaian', pano_image if pano_image is not None else placeholder)
+    metrics.record("imshow", t)
 
     # --- KONTROL KEYBOARD ---
+    t = metrics.now()
     key = cv2.waitKey(1) & 0xFF
+    metrics.record("waitkey", t)
     if key == ord('s'):
-        is_scanning_mode_active = not is_scanning_mode_active
-        if not is_scanning_mode_active:
-            is_tracking = False; display_speed_kmh = 0.0; template = None
+        engine.set_scanning(not engine.scanning)
+        if not engine.scanning:
             print("Mode pemindaian NONAKTIF.")
         else:
             print("Mode pemindaian AKTIF. Arahkan objek ke tengah untuk memulai.")
             
     elif key == ord('c'):
-        hasil_scan = placeholder.copy()
-        is_first_capture = True
+        panorama.clear()
         print("Hasil pindaian dihapus.")
         
     elif key == ord('q'):
@@ -173,9 +150,25 @@ while True:
         break
 
 # --- PEMBERSIHAN DAN PENYIMPANAN ---
-if not is_first_capture and hasil_scan.shape[1] > 1:
-    cv2.imwrite('hasil_pindaian_cerdas.png', hasil_scan)
+metrics.close()
+if speed_bin is not None:
+    speed_bin.close()
+    print(f"{speed_bin.records} record kecepatan ditambahkan ke: {args.speed_bin}")
+if share is not None:
+    share.close()
+print(format_ringkasan(engine.speed_stats.summary()))
+if governor is not None:
+    print(governor.report(engine))
+if args.stream_dir:
+    panorama.close()
+    print(f"{panorama.width} kolom tersimpan sebagai tile di '{args.stream_dir}' "
+          f"(susun dengan: python tiled_writer.py {args.stream_dir} --output hasil.png)")
+elif panorama.width > 1:
+    cv2.imwrite('hasil_pindaian_cerdas.png', panorama.view())
     print("Gambar berhasil disimpan sebagai 'hasil_pindaian_cerdas.png'")
 
+stats = cap.stats()
+print(f"Statistik antrean: {stats['captured']} frame ditangkap, {stats['dropped']} dibuang, "
+      f"kedalaman maks {stats['max_queue_depth']}")
 cap.release()
 cv2.destroyAllWindows()
\ No newline at end of file
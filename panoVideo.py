@@ -1,204 +1,412 @@
 import cv2
 import numpy as np
 import time
-from collections import deque
-from tkinter import Tk, filedialog # <-- Diubah: Menambah filedialog
-
-# --- PENGATURAN DAN KALIBRASI ---
-PIXELS_PER_METER = 500
-SPEED_THRESHOLD_KMH = 0.15
-CAPTURE_DISTANCE_PIXELS = 1.0
-TRACKING_CONFIDENCE_THRESHOLD = 0.8 
-
-# --- TAMPILAN INSTRUKSI ---
-print("Program Pemindai Adaptif Cerdas (v4.3 - Simpan Hasil Kustom)")
-print("-------------------------------------")
-print("Tekan 's' untuk AKTIFKAN/NONAKTIFKAN mode pemindaian.")
-print("Tekan 'c' untuk MENGHAPUS hasil pindaian.")
-print("Tekan 'q' untuk KELUAR dan memilih lokasi penyimpanan gambar.")
-print("-------------------------------------")
-
-# --- Membuka File Explorer untuk memilih video ---
-Tk().withdraw() 
-video_path = filedialog.askopenfilename(title="Pilih file video Anda", 
-                                       filetypes=[("Video Files", "*.mp4 *.avi *.mkv *.mov"), 
-                                                  ("All files", ".")])
-
-if not video_path:
-    print("Tidak ada file yang dipilih. Program berhenti.")
-    exit()
-
-# --- INISIALISASI ---
-cap = cv2.VideoCapture(video_path) 
-if not cap.isOpened():
-    print(f"Error: Tidak bisa membuka file video '{video_path}'")
-    exit()
-
-frame_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-print(f"Resolusi Video: {frame_width}x{frame_height}")
-
-# --- MEMBUAT PLACEHOLDER ---
-placeholder = np.zeros((frame_height, 500, 3), dtype=np.uint8)
-cv2.putText(placeholder, "Hasil akan muncul di sini...", (50, frame_height // 2), 
-            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-
-# --- VARIABEL STATUS ---
-is_scanning_mode_active = False
-hasil_scan = placeholder.copy()
-is_first_capture = True
-posisi_slit = frame_width // 2
-accumulated_pixel_shift = 0.0
-is_tracking = False
-last_known_position = None
-last_frame_time = time.time()
-template = None
-speed_buffer = deque()
-display_speed_kmh = 0.0
-last_speed_update_time = time.time()
-last_tracking_reset_time = time.time()
-
-# --- PENGATURAN KOTAK ---
-box_size = 100
-w, h = box_size, box_size
-x_box_init = (frame_width - w) // 2
-y_box_init = (frame_height - h) // 2
-
-# --- LOOP UTAMA ---
-cv2.imshow('Hasil Pindaian', hasil_scan)
-while True:
-    ret, frame = cap.read()
-    if not ret: 
-        print("Video selesai diproses.")
-        break
-
-    frame = cv2.flip(frame, 1) 
-    
-    display_frame = frame.copy()
-    current_time = time.time()
-    delta_time = current_time - last_frame_time
-    last_frame_time = current_time
-
-    # --- BLOK LOGIKA RESET PELACAKAN ---
-    if is_scanning_mode_active and (current_time - last_tracking_reset_time >= 1.0):
-        is_tracking = False
-        template = None
-        last_known_position = None
-        last_tracking_reset_time = current_time
-        print("INFO: Posisi pelacakan di-reset ke tengah.")
-    
-    instant_speed_mps = 0.0
-
-    # --- LOGIKA UTAMA ---
-    if is_scanning_mode_active:
-        if not is_tracking:
-            template = frame[y_box_init : y_box_init + h, x_box_init : x_box_init + w]
-            gray_template = cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
-            if cv2.Laplacian(gray_template, cv2.CV_64F).var() > 20:
-                is_tracking = True
-                last_known_position = (x_box_init, y_box_init)
-                print("Objek terdeteksi, memulai pelacakan...")
-        
-        else:
-            search_area = frame[y_box_init - 20 : y_box_init + h + 20, :]
-            res = cv2.matchTemplate(search_area, template, cv2.TM_CCOEFF_NORMED)
-            _, max_val, _, max_loc = cv2.minMaxLoc(res)
-
-            if max_val >= TRACKING_CONFIDENCE_THRESHOLD:
-                current_pos = (max_loc[0], max_loc[1] + y_box_init - 20)
-                pixel_distance = abs(current_pos[0] - last_known_position[0])
-                
-                if delta_time > 0:
-                    instant_speed_mps = (pixel_distance / PIXELS_PER_METER) / delta_time
-
-                if (instant_speed_mps * 3.6) > SPEED_THRESHOLD_KMH:
-                    accumulated_pixel_shift += pixel_distance
-                    while accumulated_pixel_shift >= CAPTURE_DISTANCE_PIXELS:
-                        irisan = frame[:, posisi_slit:posisi_slit+1]
-                        if is_first_capture:
-                            hasil_scan = irisan
-                            is_first_capture = False
-                        else:
-                            hasil_scan = np.concatenate((hasil_scan, irisan), axis=1)
-                        accumulated_pixel_shift -= CAPTURE_DISTANCE_PIXELS
-                
-                last_known_position = current_pos
-                template = frame[current_pos[1]:current_pos[1]+h, current_pos[0]:current_pos[0]+w]
-                cv2.rectangle(display_frame, current_pos, (current_pos[0] + w, current_pos[1] + h), (0, 255, 0), 2)
-            
-            else:
-                is_tracking = False
-                print("Pelacakan gagal, mencari objek baru...")
-
-    # --- BLOK PERHITUNGAN KECEPATAN ---
-    speed_buffer.append((current_time, instant_speed_mps))
-    while speed_buffer and current_time - speed_buffer[0][0] > 1.0:
-        speed_buffer.popleft()
-
-    if current_time - last_speed_update_time >= 1.0:
-        if speed_buffer and is_tracking:
-            avg_speed_mps = sum(item[1] for item in speed_buffer) / len(speed_buffer)
-            display_speed_kmh = avg_speed_mps * 3.6
-        else:
-            display_speed_kmh = 0.0
-        last_speed_update_time = current_time
-
-    # --- VISUALISASI ---
-    cv2.line(display_frame, (posisi_slit, 0), (posisi_slit, frame_height), (0, 255, 0), 1)
-    scan_status_text = f"SCAN MODE: {'ACTIVE' if is_scanning_mode_active else 'OFF'}"
-    tracking_status_text = "TRACKING" if is_tracking else "WAITING FOR OBJECT"
-    speed_text = f"Kecepatan: {display_speed_kmh:.2f} km/jam" 
-    
-    cv2.putText(display_frame, scan_status_text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-    if is_scanning_mode_active:
-        cv2.putText(display_frame, tracking_status_text, (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
-        cv2.putText(display_frame, speed_text, (10, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-    
-    if not is_tracking and is_scanning_mode_active:
-        cv2.rectangle(display_frame, (x_box_init, y_box_init), (x_box_init + w, y_box_init + h), (255, 255, 0), 2)
-
-    cv2.imshow('Pemindai Adaptif Cerdas', display_frame)
-    cv2.imshow('Hasil Pindaian', hasil_scan)
-
-    # --- KONTROL KEYBOARD ---
-    key = cv2.waitKey(1) & 0xFF
-    if key == ord('s'):
-        is_scanning_mode_active = not is_scanning_mode_active
-        if not is_scanning_mode_active:
-            is_tracking = False; display_speed_kmh = 0.0; template = None
-            print("Mode pemindaian NONAKTIF.")
-        else:
-            print("Mode pemindaian AKTIF. Arahkan objek ke tengah untuk memulai.")
-            
-    elif key == ord('c'):
-        hasil_scan = placeholder.copy()
-        is_first_capture = True
-        print("Hasil pindaian dihapus.")
-        
-    elif key == ord('q'):
-        print("Keluar dari program.")
-        break
-
-# --- PERUBAHAN: PEMBERSIHAN DAN PENYIMPANAN ---
-# Hanya coba menyimpan jika ada sesuatu yang sudah dipindai
-if not is_first_capture and hasil_scan.shape[1] > 1:
+import sys
+import csv
+import argparse
+import os
+from panorama_buffer import PanoramaBuffer
+from tiled_writer import TiledPanoramaWriter, TiledPanoramaReader, DEFAULT_TILE_WIDTH
+from frame_source import ThreadedFrameSource, QUEUE_POLICIES, BLOCK, DEFAULT_QUEUE_SIZE
+from tracker import TRACKER_FULL
+from displacement import ESTIMATOR_MODES
+from stage_metrics import buat_metrics, tambah_argumen_metrics
+from speed_stats import SpeedLog, format_ringkasan
+from offline_pano import proses_dua_tahap
+from frame_share import FrameSharePublisher, tambah_argumen_share, DEFAULT_SLOTS, DEFAULT_TAIL_COLUMNS
+from checkpoint import (Checkpointer, muat_checkpoint, cek_kecocokan, cek_log, DEFAULT_CHECKPOINT_INTERVAL,
+                        TILES_DIR)
+from slitscan_engine import SlitScanEngine, PIXELS_PER_METER  # noqa: F401 (PIXELS_PER_METER dipakai bench_slitscan.py)
+from display import (DisplayLimiter, PanoramaView, gambar_overlay, PESAN_EVENT,
+                     DEFAULT_DISPLAY_FPS, DEFAULT_VIEWPORT_WIDTH)
+
+def tampilkan_instruksi():
+    # --- TAMPILAN INSTRUKSI ---
+    print("Program Pemindai Adaptif Cerdas (v4.3 - Simpan Hasil Kustom)")
+    print("-------------------------------------")
+    print("Tekan 's' untuk AKTIFKAN/NONAKTIFKAN mode pemindaian.")
+    print("Tekan 'c' untuk MENGHAPUS hasil pindaian.")
+    print("Tekan 'q' untuk KELUAR dan memilih lokasi penyimpanan gambar.")
+    print("-------------------------------------")
+
+
+def pilih_video():
+    # --- Membuka File Explorer untuk memilih video ---
+    # tkinter hanya diimpor di mode GUI agar mode headless bisa jalan tanpa display
+    from tkinter import Tk, filedialog # <-- Diubah: Menambah filedialog
+    root = Tk()
+    root.withdraw()
+    video_path = filedialog.askopenfilename(parent=root, title="Pilih file video Anda",
+                                            filetypes=[("Video Files", "*.mp4 *.avi *.mkv *.mov"),
+                                                       ("All files", ".")])
+    root.destroy()
+    return video_path
+
+
+def pilih_lokasi_simpan():
+    from tkinter import Tk, filedialog
+    root = Tk()
+    root.withdraw()
     # Membuka dialog 'Save As' untuk memilih lokasi dan nama file
     save_path = filedialog.asksaveasfilename(
+        parent=root,
         title="Simpan hasil pindaian sebagai...",
         defaultextension=".png", # Ekstensi file default
-        filetypes=[("PNG Image", "*.png"), 
-                   ("JPEG Image", "*.jpg"), 
+        filetypes=[("PNG Image", "*.png"),
+                   ("JPEG Image", "*.jpg"),
                    ("All Files", ".")]
     )
+    root.destroy()
+    return save_path
+
+
+def posisi_log(speed_log_file, speed_bin):
+    # Ukuran file log saat ini (byte) untuk checkpoint
+    csv_size = None
+    if speed_log_file is not None:
+        speed_log_file.flush()
+        csv_size = speed_log_file.tell()
+    return {"speed_csv": csv_size, "speed_bin": speed_bin.size() if speed_bin is not None else None}
+
 
-    # Jika pengguna memilih lokasi (tidak menekan cancel)
-    if save_path:
-        cv2.imwrite(save_path, hasil_scan)
-        print(f"Gambar berhasil disimpan di: {save_path}")
+def proses_video(video_path, headless=False, output_path=None, speed_log_path=None,
+                 queue_size=DEFAULT_QUEUE_SIZE, queue_policy=BLOCK,
+                 start_frame=0, end_frame=None, warmup_frames=0, tracker_mode=TRACKER_FULL,
+                 stream_dir=None, tile_width=DEFAULT_TILE_WIDTH, frame_source=None, roi_only=False,
+                 display_fps=DEFAULT_DISPLAY_FPS, viewport_width=DEFAULT_VIEWPORT_WIDTH, metrics=None,
+                 speed_bin_path=None, checkpoint_dir=None, checkpoint_interval=DEFAULT_CHECKPOINT_INTERVAL,
+                 resume=False, share_name=None, share_slots=DEFAULT_SLOTS,
+                 share_columns=DEFAULT_TAIL_COLUMNS):
+    # --- INISIALISASI ---
+    # Decode berjalan di thread capture; mode headless memakai timestamp video.
+    # Untuk segmen, pelacakan dimulai `warmup_frames` lebih awal tetapi kolom
+    # dan log kecepatan baru dicatat mulai `start_frame`, agar sambungan antar
+    # segmen tidak kehilangan kolom saat pelacak baru mengunci objek.
+    # `frame_source` boleh diisi sumber lain dengan antarmuka ThreadedFrameSource
+    # (misalnya video sintetis untuk benchmark); `video_path` lalu hanya label.
+    # `metrics` (lihat stage_metrics.py) mencatat waktu tiap tahap loop utama.
+    # `roi_only` hanya mem-flip pita pencarian (lihat SlitScanEngine).
+    # Di mode GUI jendela di-refresh paling banyak `display_fps` kali per detik.
+    # `speed_bin_path` menulis log biner per frame (lihat speed_stats.py).
+    # `checkpoint_dir` menyimpan checkpoint berkala (lihat checkpoint.py);
+    # panorama lalu ditulis sebagai tile di subfolder `tiles` (kecuali
+    # `stream_dir` diberikan). Dengan `resume` pemrosesan dilanjutkan dari
+    # checkpoint terakhir di folder itu.
+    # `share_name` membagikan frame dan ekor panorama ke proses lain lewat
+    # shared memory (lihat frame_share.py).
+    if metrics is None:
+        metrics = buat_metrics()
+    capture_start_frame = start_frame
+    start_frame = max(0, start_frame - warmup_frames)
+    resume_state = None
+    if checkpoint_dir:
+        stream_dir = stream_dir or os.path.join(checkpoint_dir, TILES_DIR)
+        if resume:
+            resume_state = muat_checkpoint(checkpoint_dir)
+            if resume_state is None:
+                print(f"Belum ada checkpoint di '{checkpoint_dir}', mulai dari awal.")
+            else:
+                start_frame = capture_start_frame = resume_state["next_frame"]
+                print(f"Melanjutkan dari checkpoint: frame {start_frame}, "
+                      f"{resume_state['panorama']['flushed_width'] + resume_state['panorama']['pending'].shape[1]} kolom.")
+    if frame_source is not None:
+        cap = frame_source
     else:
-        print("Penyimpanan dibatalkan oleh pengguna.")
+        cap = ThreadedFrameSource(video_path, queue_size=queue_size, policy=queue_policy,
+                                  use_video_time=headless, start_frame=start_frame, end_frame=end_frame)
+    if not cap.isOpened():
+        print(f"Error: Tidak bisa membuka file video '{video_path}'")
+        return None
+
+    frame_width = cap.width
+    frame_height = cap.height
+    print(f"Resolusi Video: {frame_width}x{frame_height}")
+
+    checkpointer = None
+    if checkpoint_dir:
+        video_info = {"path": video_path, "width": frame_width, "height": frame_height, "fps": cap.fps}
+        settings = {"tracker_mode": tracker_mode, "roi_only": roi_only}
+        if resume_state is not None:
+            error = cek_kecocokan(resume_state, video_info, settings)
+            # Log yang hilang/lebih pendek tidak boleh diperpanjang dengan byte NUL
+            error = (error or cek_log(speed_log_path, resume_state["logs"].get("speed_csv"))
+                     or cek_log(speed_bin_path, resume_state["logs"].get("speed_bin")))
+            if error:
+                print(f"Error: {error}")
+                cap.release()
+                return None
+        checkpointer = Checkpointer(checkpoint_dir, video_info, settings, checkpoint_interval)
+
+    # --- MEMBUAT PLACEHOLDER ---
+    placeholder = np.zeros((frame_height, 500, 3), dtype=np.uint8)
+    cv2.putText(placeholder, "Hasil akan muncul di sini...", (50, frame_height // 2),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+
+    # --- LOG KECEPATAN PER FRAME (OPSIONAL) ---
+    # Saat resume, baris yang ditulis setelah checkpoint terakhir dibuang
+    resume_logs = resume_state["logs"] if resume_state is not None else {}
+    speed_log_file = None
+    speed_log = None
+    if speed_log_path:
+        if resume_logs.get("speed_csv") is not None:
+            speed_log_file = open(speed_log_path, "a", newline="")
+            speed_log_file.truncate(resume_logs["speed_csv"])
+            speed_log = csv.writer(speed_log_file)
+        else:
+            speed_log_file = open(speed_log_path, "w", newline="")
+            speed_log = csv.writer(speed_log_file)
+            speed_log.writerow(["frame", "waktu_s", "kecepatan_sesaat_kmh", "kecepatan_rata_kmh", "tracking"])
+    speed_bin = None
+    if speed_bin_path:
+        if resume_logs.get("speed_bin") is not None:
+            speed_bin = SpeedLog(speed_bin_path, append=True)
+            speed_bin.truncate(resume_logs["speed_bin"])
+        else:
+            speed_bin = SpeedLog(speed_bin_path)
+
+    # --- ENGINE PEMINDAI ---
+    if stream_dir:
+        # Tile penuh langsung ditulis ke disk, memori tetap berapa pun panjang videonya
+        panorama = TiledPanoramaWriter(stream_dir, frame_height, tile_width=tile_width,
+                                       resume=resume_state is not None)
+        if resume_state is not None:
+            panorama.load_state(resume_state["panorama"])
+    else:
+        panorama = PanoramaBuffer(frame_height) # Kolom hasil pindaian (prealokasi)
+    share = None
+    if share_name:
+        share = FrameSharePublisher(share_name, frame_width, frame_height, panorama,
+                                    slots=share_slots, tail_columns=share_columns)
+        panorama = share.panorama
+    # Mode headless langsung memindai tanpa menunggu tombol 's'
+    engine = SlitScanEngine(frame_width, frame_height, panorama, scanning=headless,
+                            tracker_mode=tracker_mode, capture_start_frame=capture_start_frame,
+                            roi_only=roi_only, metrics=metrics)
+    if resume_state is not None:
+        engine.load_state(resume_state["engine"])
+    limiter = DisplayLimiter(display_fps)
+    pano_view = PanoramaView(frame_height, viewport_width)
+    frames_processed = 0
+    frames_in_range = 0  # Tanpa frame pemanasan sebelum capture_start_frame
+    next_frame = start_frame
+    start_wall_time = time.time()
+
+    # --- LOOP UTAMA ---
+    if not headless:
+        cv2.imshow('Hasil Pindaian', placeholder)
+    cap.start()
+    while True:
+        t = metrics.now()
+        ret, frame, frame_time, frame_index = cap.read()
+        metrics.record("read", t)
+        if not ret:
+            print("Video selesai diproses.")
+            break
+
+        current_time = frame_time if headless else time.time()
+        events = engine.process(frame, current_time, frame_index)
+
+        if speed_log is not None and frame_index >= capture_start_frame:
+            speed_log.writerow([frame_index, f"{current_time:.6f}", f"{engine.instant_speed_kmh:.4f}",
+                                f"{engine.display_speed_kmh:.4f}", int(engine.is_tracking)])
+        if speed_bin is not None and frame_index >= capture_start_frame:
+            speed_bin.append(frame_index, current_time, engine.displacement, engine.confidence,
+                             engine.instant_speed_kmh, engine.display_speed_kmh, engine.is_tracking)
+        if share is not None:
+            share.publish(frame, current_time, frame_index, engine)
+        frames_processed += 1
+        if frame_index >= capture_start_frame:
+            frames_in_range += 1
+        next_frame = frame_index + 1
+        metrics.count("frames")
+        metrics.maybe_flush()
+        if checkpointer is not None and checkpointer.due():
+            checkpointer.save(next_frame, engine, panorama, posisi_log(speed_log_file, speed_bin))
+
+        if headless:
+            continue
+
+        for event in events:
+            print(PESAN_EVENT[event])
+
+        # Refresh jendela (dan cek keyboard) hanya sesuai batas display_fps
+        if not limiter.due():
+            continue
+
+        # --- VISUALISASI ---
+        # Overlay digambar langsung di buffer tampilan engine, tanpa salinan frame
+        t = metrics.now()
+        display_frame = engine.display_frame()
+        metrics.record("copy", t)
+        gambar_overlay(display_frame, engine)
+
+        t = metrics.now()
+        pano_image = pano_view.render(panorama)
+        metrics.record("render", t)
+
+        t = metrics.now()
+        cv2.imshow('Pemindai Adaptif Cerdas', display_frame)
+        cv2.imshow('Hasil Pindaian', pano_image if pano_image is not None else placeholder)
+        metrics.record("imshow", t)
+
+        # --- KONTROL KEYBOARD ---
+        t = metrics.now()
+        key = cv2.waitKey(1) & 0xFF
+        metrics.record("waitkey", t)
+        if key == ord('s'):
+            engine.set_scanning(not engine.scanning)
+            if not engine.scanning:
+                print("Mode pemindaian NONAKTIF.")
+            else:
+                print("Mode pemindaian AKTIF. Arahkan objek ke tengah untuk memulai.")
+
+        elif key == ord('c'):
+            panorama.clear()
+            print("Hasil pindaian dihapus.")
+
+        elif key == ord('q'):
+            print("Keluar dari program.")
+            break
+
+    elapsed = time.time() - start_wall_time
+    if checkpointer is not None:
+        # Checkpoint akhir: rekaman yang bertambah bisa dilanjutkan dari sini
+        panorama.flush()
+        checkpointer.save(next_frame, engine, panorama, posisi_log(speed_log_file, speed_bin))
+        print(f"Checkpoint disimpan di '{checkpoint_dir}' (frame berikutnya {next_frame}, "
+              f"{checkpointer.saved} kali).")
+    metrics.close()
+    if speed_log_file is not None:
+        speed_log_file.close()
+    if speed_bin is not None:
+        speed_bin.close()
+        print(f"{speed_bin.records} record kecepatan tersimpan di: {speed_bin_path}")
+    if share is not None:
+        share.close()
+
+    # --- PERUBAHAN: PEMBERSIHAN DAN PENYIMPANAN ---
+    if stream_dir:
+        panorama.close()
+        print(f"{panorama.width} kolom tersimpan sebagai tile di '{stream_dir}'")
+        if output_path and panorama.width > 1:
+            TiledPanoramaReader(stream_dir).assemble(output_path)
+            print(f"Gambar berhasil disimpan di: {output_path}")
+    # Hanya coba menyimpan jika ada sesuatu yang sudah dipindai
+    elif panorama.width > 1:
+        save_path = output_path if headless else pilih_lokasi_simpan()
+
+        # Jika pengguna memilih lokasi (tidak menekan cancel)
+        if save_path:
+            cv2.imwrite(save_path, panorama.view())
+            print(f"Gambar berhasil disimpan di: {save_path}")
+        else:
+            print("Penyimpanan dibatalkan oleh pengguna.")
+    elif headless:
+        print("Tidak ada kolom yang terpindai, gambar tidak disimpan.")
+
+    # --- AKHIR PERUBAHAN ---
+
+    stats = cap.stats()
+    print(f"Statistik antrean: {stats['captured']} frame ditangkap, {stats['dropped']} dibuang, "
+          f"kedalaman maks {stats['max_queue_depth']}")
+    cap.release()
+    if not headless:
+        cv2.destroyAllWindows()
+
+    if headless:
+        print(f"{frames_processed} frame diproses dalam {elapsed:.2f} s "
+              f"({frames_processed / elapsed if elapsed > 0 else 0.0:.1f} fps), {panorama.width} kolom.")
+    print(format_ringkasan(engine.speed_stats.summary()))
+    return {"frames": frames_processed, "frames_in_range": frames_in_range,
+            "columns": panorama.width, "elapsed": elapsed,
+            "dropped": stats["dropped"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pemindai slit-scan dari file video.")
+    parser.add_argument("input", nargs="?", help="File video masukan (wajib untuk --headless)")
+    parser.add_argument("output", nargs="?",
+                        help="File gambar hasil pindaian (wajib untuk --headless tanpa --stream-dir)")
+    parser.add_argument("--headless", action="store_true",
+                        help="Tanpa GUI: langsung memindai secepat mungkin memakai timestamp video")
+    parser.add_argument("--speed-log", help="Simpan kecepatan per frame ke file CSV")
+    parser.add_argument("--two-pass", action="store_true",
+                        help="Mode headless dua tahap: lintasan gerak murah lalu decode hanya frame "
+                             "yang menyumbang kolom (lihat offline_pano.py)")
+    parser.add_argument("--checkpoint", help="Folder checkpoint (mode headless): status disimpan berkala "
+                                             "dan panorama ditulis sebagai tile di FOLDER/tiles")
+    parser.add_argument("--checkpoint-interval", type=float, default=DEFAULT_CHECKPOINT_INTERVAL,
+                        help="Interval checkpoint (detik)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Lanjutkan dari checkpoint terakhir (juga untuk memproses bagian baru "
+                             "dari rekaman yang terus bertambah)")
+    parser.add_argument("--speed-bin", help="Simpan log kecepatan per frame ke file biner append-only "
+                                            "(baca dengan: python speed_stats.py FILE)")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE, help="Kapasitas antrean frame")
+    parser.add_argument("--queue-policy", choices=QUEUE_POLICIES, default=BLOCK,
+                        help="Perilaku saat antrean penuh (block = tanpa frame hilang)")
+    parser.add_argument("--tracker", choices=ESTIMATOR_MODES, default=TRACKER_FULL,
+                        help="Mode pelacak (predictive = jendela sempit + piramida, "
+                             "lk = optical flow titik fitur tanpa reset berkala)")
+    parser.add_argument("--stream-dir", help="Tulis panorama sebagai tile ke folder ini selama pemindaian "
+                                             "(memori tetap, tahan crash)")
+    parser.add_argument("--tile-width", type=int, default=DEFAULT_TILE_WIDTH, help="Lebar tile (kolom)")
+    parser.add_argument("--roi", action="store_true",
+                        help="Hanya flip dan grayscale pita pencarian, bukan seluruh frame")
+    parser.add_argument("--display-fps", type=float, default=DEFAULT_DISPLAY_FPS,
+                        help="Batas refresh jendela per detik (0 = setiap frame)")
+    parser.add_argument("--viewport-width", type=int, default=DEFAULT_VIEWPORT_WIDTH,
+                        help="Lebar viewport ekor panorama di jendela hasil (kolom)")
+    tambah_argumen_share(parser)
+    tambah_argumen_metrics(parser)
+    args = parser.parse_args()
+    metrics = buat_metrics(args.metrics, args.metrics_format, args.metrics_interval)
+    if args.checkpoint and not args.headless:
+        parser.error("--checkpoint hanya untuk mode --headless (timestamp video)")
+    if args.resume and not args.checkpoint:
+        parser.error("--resume membutuhkan --checkpoint")
+
+    if args.headless:
+        if not args.input or not (args.output or args.stream_dir or args.checkpoint):
+            parser.error("--headless membutuhkan argumen input dan output (atau --stream-dir/--checkpoint)")
+        if args.two_pass:
+            if not args.output:
+                parser.error("--two-pass membutuhkan argumen output")
+            # Dua tahap hanya menghasilkan gambar panorama; opsi lain tidak didukung
+            ignored = [flag for flag, value in (("--speed-log", args.speed_log), ("--speed-bin", args.speed_bin),
+                                                ("--roi", args.roi), ("--stream-dir", args.stream_dir),
+                                                ("--checkpoint", args.checkpoint), ("--resume", args.resume),
+                                                ("--share", args.share)) if value]
+            if ignored:
+                parser.error(f"--two-pass tidak bisa digabung dengan {', '.join(ignored)}")
+            hasil = proses_dua_tahap(args.input, args.output, tracker_mode=args.tracker)
+            if hasil is None:
+                sys.exit(1)
+            return
+        hasil = proses_video(args.input, headless=True, output_path=args.output,
+                             speed_log_path=args.speed_log, queue_size=args.queue_size,
+                             queue_policy=args.queue_policy, tracker_mode=args.tracker,
+                             stream_dir=args.stream_dir, tile_width=args.tile_width,
+                             roi_only=args.roi, metrics=metrics, speed_bin_path=args.speed_bin,
+                             checkpoint_dir=args.checkpoint, checkpoint_interval=args.checkpoint_interval,
+                             resume=args.resume, share_name=args.share, share_slots=args.share_slots,
+                             share_columns=args.share_columns)
+        if hasil is None:
+            sys.exit(1)
+        return
+
+    tampilkan_instruksi()
+    video_path = args.input or pilih_video()
+    if not video_path:
+        print("Tidak ada file yang dipilih. Program berhenti.")
+        exit()
+    proses_video(video_path, speed_log_path=args.speed_log, queue_size=args.queue_size,
+                 queue_policy=args.queue_policy, tracker_mode=args.tracker,
+                 stream_dir=args.stream_dir, tile_width=args.tile_width, roi_only=args.roi,
+                 display_fps=args.display_fps, viewport_width=args.viewport_width, metrics=metrics,
+                 speed_bin_path=args.speed_bin, share_name=args.share, share_slots=args.share_slots,
+                 share_columns=args.share_columns)
 
-# --- AKHIR PERUBAHAN ---
 
-cap.release()
-cv2.destroyAllWindows()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
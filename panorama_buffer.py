@@ -0,0 +1,86 @@
+# panorama_buffer.py (Akumulator Panorama dengan Prealokasi)
+
+import numpy as np
+
+# --- PENGATURAN DEFAULT ---
+DEFAULT_INITIAL_CAPACITY = 1024  # Jumlah kolom awal yang dialokasikan
+DEFAULT_GROWTH_FACTOR = 2.0      # Kapasitas dikali faktor ini saat penuh
+
+
+class PanoramaBuffer:
+    """Penampung kolom panorama dengan kapasitas yang tumbuh secara geometris.
+
+    Menggantikan pola `np.concatenate((hasil_scan, irisan), axis=1)` yang
+    menyalin seluruh panorama untuk setiap kolom (O(n^2)). Di sini kolom baru
+    ditulis langsung ke array yang sudah dialokasikan, dan array hanya
+    diperbesar (disalin) saat kapasitas habis, sehingga biaya append rata-rata
+    konstan.
+    """
+
+    def __init__(self, height, channels=3, initial_capacity=DEFAULT_INITIAL_CAPACITY,
+                 growth_factor=DEFAULT_GROWTH_FACTOR, dtype=np.uint8):
+        if height <= 0:
+            raise ValueError("height harus lebih besar dari 0")
+        if initial_capacity <= 0:
+            raise ValueError("initial_capacity harus lebih besar dari 0")
+        if growth_factor <= 1.0:
+            raise ValueError("growth_factor harus lebih besar dari 1.0")
+
+        self.height = height
+        self.channels = channels
+        self.growth_factor = growth_factor
+        self.dtype = np.dtype(dtype)
+        self._data = np.zeros(self._shape(initial_capacity), dtype=self.dtype)
+        self._width = 0
+
+    def _shape(self, capacity):
+        if self.channels == 1:
+            return (self.height, capacity)
+        return (self.height, capacity, self.channels)
+
+    # --- INFORMASI UKURAN ---
+    @property
+    def width(self):
+        return self._width
+
+    @property
+    def capacity(self):
+        return self._data.shape[1]
+
+    def __len__(self):
+        return self._width
+
+    # --- MANAJEMEN KAPASITAS ---
+    def reserve(self, min_capacity):
+        """Pastikan kapasitas minimal `min_capacity` kolom (tumbuh geometris)."""
+        if min_capacity <= self.capacity:
+            return
+        new_capacity = self.capacity
+        while new_capacity < min_capacity:
+            new_capacity = max(new_capacity + 1, int(new_capacity * self.growth_factor))
+
+        new_data = np.zeros(self._shape(new_capacity), dtype=self.dtype)
+        new_data[:, :self._width] = self._data[:, :self._width]
+        self._data = new_data
+
+    # --- PENAMBAHAN KOLOM ---
+    def append(self, columns):
+        """Tambahkan satu atau beberapa kolom (H x k x C, atau H x C untuk satu kolom)."""
+        if columns.ndim == self._data.ndim - 1:
+            columns = columns[:, np.newaxis]
+        if columns.shape[0] != self.height:
+            raise ValueError(f"Tinggi kolom {columns.shape[0]} tidak sama dengan tinggi panorama {self.height}")
+
+        n = columns.shape[1]
+        self.reserve(self._width + n)
+        self._data[:, self._width:self._width + n] = columns
+        self._width += n
+
+    def clear(self):
+        """Kosongkan panorama tanpa membebaskan memori yang sudah dialokasikan."""
+        self._width = 0
+
+    # --- AKSES HASIL ---
+    def view(self):
+        """View (tanpa salinan) ke bagian panorama yang sudah terisi."""
+        return self._data[:, :self._width]
@@ -0,0 +1,74 @@
+# slit_capture.py (Pengambilan Strip Slit Secara Massal)
+
+import cv2
+
+
+class SlitCapture:
+    """Mengubah pergeseran objek menjadi kolom panorama dalam satu operasi.
+
+    Sebelumnya setiap kolom diambil dengan loop `while accumulated_pixel_shift
+    >= CAPTURE_DISTANCE_PIXELS`, satu iterasi Python dan satu alokasi per
+    kolom. Di sini jumlah kolom yang jatuh tempo dihitung sekaligus, lalu
+    diambil satu strip bersebelahan dari frame (piksel yang baru saja melewati
+    slit), di-resample bila lebar hasilnya tidak sama, dan ditulis ke
+    panorama dengan satu kali `append`.
+
+    Dengan `mirrored=True`, frame yang diberikan belum di-flip horizontal
+    (mode ROI). `posisi_slit` dan arah gerak tetap dalam koordinat flip;
+    strip diambil dari kolom cerminnya sehingga hasilnya sama tanpa perlu
+    mem-flip seluruh frame.
+    """
+
+    def __init__(self, panorama, posisi_slit, capture_distance=1.0, mirrored=False):
+        if capture_distance <= 0:
+            raise ValueError("capture_distance harus lebih besar dari 0")
+        self.panorama = panorama
+        self.posisi_slit = posisi_slit
+        self.capture_distance = capture_distance
+        self.mirrored = mirrored
+        self.accumulated_pixel_shift = 0.0
+
+    def reset(self):
+        self.accumulated_pixel_shift = 0.0
+
+    def columns_due(self, pixel_shift):
+        """Tambahkan pergeseran dan kembalikan jumlah kolom yang harus diambil."""
+        self.accumulated_pixel_shift += abs(pixel_shift)
+        n = int(self.accumulated_pixel_shift // self.capture_distance)
+        if n > 0:
+            self.accumulated_pixel_shift -= n * self.capture_distance
+        return n
+
+    def extract_strip(self, frame, n, direction):
+        # Piksel yang melewati slit sejak frame sebelumnya ada di sisi searah
+        # gerakan. Kolom terjauh dari slit melewatinya paling awal, jadi strip
+        # dibalik untuk gerakan ke kanan agar urutannya tetap kronologis.
+        frame_width = frame.shape[1]
+        strip_width = max(1, int(round(n * self.capture_distance)))
+        if direction >= 0:
+            x0 = self.posisi_slit
+            x1 = min(frame_width, x0 + strip_width)
+        else:
+            x1 = self.posisi_slit + 1
+            x0 = max(0, x1 - strip_width)
+        if self.mirrored:
+            # Kolom x di koordinat flip = kolom (lebar - 1 - x) di frame asli,
+            # jadi strip cermin sudah terbalik dan pembalikannya ikut berbalik
+            strip = frame[:, frame_width - x1:frame_width - x0]
+            reverse = direction < 0
+        else:
+            strip = frame[:, x0:x1]
+            reverse = direction >= 0
+
+        if strip.shape[1] != n:
+            strip = cv2.resize(strip, (n, frame.shape[0]), interpolation=cv2.INTER_LINEAR)
+        if reverse:
+            strip = strip[:, ::-1]
+        return strip
+
+    def capture(self, frame, pixel_shift):
+        """Catat pergeseran bertanda (piksel) dan tulis kolom yang jatuh tempo."""
+        n = self.columns_due(pixel_shift)
+        if n > 0:
+            self.panorama.append(self.extract_strip(frame, n, pixel_shift))
+        return n
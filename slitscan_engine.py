@@ -0,0 +1,331 @@
+# slitscan_engine.py (Inti Pemindai Slit-Scan Tanpa GUI)
+#
+# Logika pelacakan, perhitungan kecepatan, dan capture kolom yang dulu
+# tersalin di pano.py dan panoVideo.py. Modul ini tidak mengimpor tkinter
+# dan tidak menampilkan apa pun, sehingga bisa dipakai dari layanan lain
+# dengan sumber frame apa saja:
+#
+#   engine = SlitScanEngine(lebar, tinggi, scanning=True)
+#   for frame, waktu in sumber:
+#       for event in engine.process(frame, waktu):
+#           ...
+#   cv2.imwrite("hasil.png", engine.panorama.view())
+
+import cv2
+import numpy as np
+
+from panorama_buffer import PanoramaBuffer
+from slit_capture import SlitCapture
+from speed_stats import RollingSpeedStats
+from stage_metrics import buat_metrics
+from tracker import TRACKER_FULL
+from displacement import buat_estimator
+
+# --- PENGATURAN DAN KALIBRASI ---
+PIXELS_PER_METER = 500
+SPEED_THRESHOLD_KMH = 0.15
+CAPTURE_DISTANCE_PIXELS = 1.0
+TRACKING_CONFIDENCE_THRESHOLD = 0.8
+DEFAULT_BOX_SIZE = 100
+TRACKING_RESET_INTERVAL = 1.0   # Detik; template diambil ulang dari kotak tengah
+SPEED_WINDOW = 1.0              # Detik; jendela rata-rata kecepatan yang ditampilkan
+MIN_PREDICTED_MOTION_PX = 1.0   # Di bawah ini match boleh dilewati (skip_small_motion)
+MAX_SKIPPED_FRAMES = 3          # Match dilewati paling banyak sekian frame berturut-turut
+
+# --- EVENT YANG DIKEMBALIKAN process() ---
+EVENT_TRACKING_START = "tracking_start"
+EVENT_TRACKING_RESET = "tracking_reset"
+EVENT_TRACKING_FAIL = "tracking_fail"
+
+
+class SlitScanEngine:
+    """Pelacak + pengukur kecepatan + slit-capture untuk satu aliran frame.
+
+    Pergeseran per frame dihitung oleh estimator dari displacement.py
+    (`tracker_mode`: full, predictive, atau lk). Semua buffer per frame
+    (frame hasil flip, template, pita grayscale) dialokasikan sekali dan
+    dipakai ulang. Pita pencarian adalah view dari frame, bukan salinan.
+    Reset pelacakan berkala hanya dilakukan untuk estimator template. Status terakhir
+    bisa dibaca dari atribut (`is_tracking`, `position`, `confidence`,
+    `displacement`, `instant_speed_kmh`, `display_speed_kmh`, `frame`).
+    Statistik kecepatan bergulir dan agregat sesi ada di `speed_stats`.
+
+    Dengan `roi_only=True` frame penuh tidak pernah di-flip atau disalin:
+    hanya pita pencarian yang di-flip lalu diubah ke grayscale sekali, dan
+    pelacakan berjalan di pita grayscale itu. Kolom slit diambil dari kolom
+    cermin di frame asli. Frame penuh baru di-flip jika `display_frame()`
+    dipanggil, jadi tanpa tampilan lalu lintas memori per frame sebanding
+    dengan ukuran ROI, bukan ukuran frame.
+
+    Untuk menahan beban (lihat load_governor.py): `skip_small_motion`
+    melewati estimator pada frame yang prediksi gerakannya sejak pengukuran
+    terakhir di bawah satu piksel. Pergeseran frame itu ikut terukur di frame
+    berikutnya, dan kecepatannya dihitung dari selisih timestamp asli kedua
+    frame, jadi kolom slit tidak hilang. `set_coarse(True)` mengalihkan
+    estimator ke mode murahnya.
+    """
+
+    def __init__(self, frame_width, frame_height, panorama=None, scanning=False,
+                 tracker_mode=TRACKER_FULL, box_size=DEFAULT_BOX_SIZE, flip=True,
+                 capture_start_frame=0, pixels_per_meter=PIXELS_PER_METER,
+                 speed_threshold_kmh=SPEED_THRESHOLD_KMH, capture_distance=CAPTURE_DISTANCE_PIXELS,
+                 confidence_threshold=TRACKING_CONFIDENCE_THRESHOLD,
+                 reset_interval=TRACKING_RESET_INTERVAL, roi_only=False, metrics=None):
+        self.frame_width = frame_width
+        self.frame_height = frame_height
+        self.panorama = panorama if panorama is not None else PanoramaBuffer(frame_height)
+        self.scanning = scanning
+        self.flip = flip
+        self.capture_start_frame = capture_start_frame
+        self.pixels_per_meter = pixels_per_meter
+        self.speed_threshold_kmh = speed_threshold_kmh
+        self.confidence_threshold = confidence_threshold
+        self.reset_interval = reset_interval
+        self.roi_only = roi_only
+        self.metrics = metrics if metrics is not None else buat_metrics()
+
+        # --- PENGATURAN KOTAK ---
+        self.w = self.h = box_size
+        self.x_box_init = (frame_width - box_size) // 2
+        self.y_box_init = (frame_height - box_size) // 2
+        self.posisi_slit = frame_width // 2
+        self.estimator = buat_estimator(tracker_mode, frame_width, frame_height, box_size, confidence_threshold,
+                                        band_input=roi_only)
+        self.band_y0, self.band_y1 = self.estimator.band_y0, self.estimator.band_y1
+        self.slit = SlitCapture(self.panorama, self.posisi_slit, capture_distance, mirrored=roi_only and flip)
+
+        # --- BUFFER PRAALOKASI ---
+        if roi_only:
+            band_height = self.band_y1 - self.band_y0
+            self._flipped = None  # Baru dialokasikan jika display_frame() dipanggil
+            self._band = np.empty((band_height, frame_width, 3), dtype=np.uint8) if flip else None
+            self._gray_band = np.empty((band_height, frame_width), dtype=np.uint8)
+        else:
+            self._flipped = np.empty((frame_height, frame_width, 3), dtype=np.uint8)
+        self.events = []
+
+        # --- STATUS ---
+        self.frame = None
+        self.is_tracking = False
+        self.position = None
+        self.confidence = 0.0
+        self.displacement = 0.0
+        self.instant_speed_kmh = 0.0
+        self.display_speed_kmh = 0.0
+        self.frame_index = -1
+        self._last_measure_time = None  # Timestamp frame terakhir yang tidak dilewati
+        self._last_speed_update_time = None
+        self._last_tracking_reset_time = None
+        self.speed_stats = RollingSpeedStats(window=SPEED_WINDOW)
+
+        # --- PENAHAN BEBAN ---
+        self.skip_small_motion = False
+        self.coarse = False
+        self.skipped_matches = 0
+        self.coarse_matches = 0
+        self._velocity_px = None        # Piksel/detik dari pengukuran terakhir (None = belum ada)
+        self._skip_run = 0
+
+    # --- KONTROL ---
+    def set_scanning(self, active):
+        self.scanning = active
+        if not active:
+            self.is_tracking = False
+            self.display_speed_kmh = 0.0
+
+    def set_coarse(self, active):
+        self.coarse = active
+        self.estimator.set_coarse(active)
+
+    def _stop_tracking(self):
+        self.is_tracking = False
+        self.position = None
+        self._velocity_px = None
+
+    def _emit(self, event):
+        self.events.append(event)
+        self.metrics.count(event)
+
+    # --- LANGKAH PER FRAME ---
+    # `image` adalah gambar tempat pelacakan berjalan: frame flip penuh, atau
+    # pita grayscale di mode ROI (baris pertamanya = baris `y_offset` frame).
+    def _start_tracking(self, image, y_offset, timestamp):
+        # Kunci objek di kotak tengah (template bertekstur / titik fitur cukup)
+        t = self.metrics.now()
+        started = self.estimator.start(image, y_offset, timestamp)
+        self.metrics.record(self.estimator.start_stage, t)
+        if started:
+            self.is_tracking = True
+            self._velocity_px = None
+            self.position = self.estimator.position
+            self._emit(EVENT_TRACKING_START)
+
+    def _track(self, image, y_offset, timestamp, delta_time):
+        t = self.metrics.now()
+        confidence, pixel_shift = self.estimator.update(image, y_offset, timestamp)
+        self.metrics.record(self.estimator.update_stage, t)
+        if self.coarse:
+            self.coarse_matches += 1
+        self.confidence = confidence
+        self.displacement = pixel_shift if pixel_shift is not None else 0.0
+        if pixel_shift is None:
+            self._stop_tracking()
+            self._emit(EVENT_TRACKING_FAIL)
+            return 0.0
+
+        instant_speed_mps = 0.0
+        if delta_time > 0:
+            self._velocity_px = abs(pixel_shift) / delta_time
+            instant_speed_mps = self._velocity_px / self.pixels_per_meter
+
+        if self.frame_index >= self.capture_start_frame and instant_speed_mps * 3.6 > self.speed_threshold_kmh:
+            # Semua kolom yang jatuh tempo diambil sebagai satu strip
+            t = self.metrics.now()
+            self.slit.capture(self.frame, pixel_shift)
+            self.metrics.record("append", t)
+
+        self.position = self.estimator.position
+        return instant_speed_mps
+
+    def _prepare(self, frame):
+        # Kembalikan (image, y_offset) untuk pelacakan
+        if not self.roi_only:
+            if self.flip:
+                t = self.metrics.now()
+                frame = cv2.flip(frame, 1, dst=self._flipped)
+                self.metrics.record("flip", t)
+            self.frame = frame
+            return frame, 0
+
+        self.frame = frame
+        band = frame[self.band_y0:self.band_y1]
+        if self.flip:
+            t = self.metrics.now()
+            band = cv2.flip(band, 1, dst=self._band)
+            self.metrics.record("flip", t)
+        t = self.metrics.now()
+        cv2.cvtColor(band, cv2.COLOR_BGR2GRAY, dst=self._gray_band)
+        self.metrics.record("gray", t)
+        return self._gray_band, self.band_y0
+
+    # --- CHECKPOINT ---
+    def state_dict(self):
+        """Status pelacakan yang cukup untuk melanjutkan dari frame berikutnya."""
+        return {
+            "scanning": self.scanning,
+            "frame_index": self.frame_index,
+            "is_tracking": self.is_tracking,
+            "position": None if self.position is None else list(self.position),
+            "confidence": self.confidence,
+            "displacement": self.displacement,
+            "instant_speed_kmh": self.instant_speed_kmh,
+            "display_speed_kmh": self.display_speed_kmh,
+            "last_measure_time": self._last_measure_time,
+            "last_speed_update_time": self._last_speed_update_time,
+            "last_tracking_reset_time": self._last_tracking_reset_time,
+            "velocity_px": self._velocity_px,
+            "skip_run": self._skip_run,
+            "skipped_matches": self.skipped_matches,
+            "coarse_matches": self.coarse_matches,
+            "accumulated_pixel_shift": self.slit.accumulated_pixel_shift,
+            "estimator": self.estimator.state_dict(),
+            "speed_stats": self.speed_stats.state_dict(),
+        }
+
+    def load_state(self, state):
+        self.scanning = state["scanning"]
+        self.frame_index = state["frame_index"]
+        self.is_tracking = state["is_tracking"]
+        self.position = None if state["position"] is None else tuple(state["position"])
+        self.confidence = state["confidence"]
+        self.displacement = state["displacement"]
+        self.instant_speed_kmh = state["instant_speed_kmh"]
+        self.display_speed_kmh = state["display_speed_kmh"]
+        self._last_measure_time = state["last_measure_time"]
+        self._last_speed_update_time = state["last_speed_update_time"]
+        self._last_tracking_reset_time = state["last_tracking_reset_time"]
+        self._velocity_px = state["velocity_px"]
+        self._skip_run = state["skip_run"]
+        self.skipped_matches = state["skipped_matches"]
+        self.coarse_matches = state["coarse_matches"]
+        self.slit.accumulated_pixel_shift = state["accumulated_pixel_shift"]
+        self.estimator.load_state(state["estimator"])
+        self.speed_stats.load_state(state["speed_stats"])
+
+    def display_frame(self):
+        """Frame terakhir dalam arah tampilan, untuk digambari overlay.
+
+        Hanya boleh dipakai setelah `process()` selesai; buffer yang sama
+        dipakai ulang setiap frame (tanpa ROI: buffer flip milik engine).
+        """
+        if not self.roi_only or not self.flip:
+            return self.frame
+        if self._flipped is None:
+            self._flipped = np.empty((self.frame_height, self.frame_width, 3), dtype=np.uint8)
+        return cv2.flip(self.frame, 1, dst=self._flipped)
+
+    def _should_skip(self, timestamp):
+        # Lewati match jika gerakan yang diprediksi sejak pengukuran terakhir < 1 piksel
+        if not self.skip_small_motion or self._velocity_px is None or self._skip_run >= MAX_SKIPPED_FRAMES:
+            return False
+        return self._velocity_px * (timestamp - self._last_measure_time) < MIN_PREDICTED_MOTION_PX
+
+    def _update_speed(self, timestamp):
+        # Statistik bergulir diperbarui O(1) per frame; angka tampilan tetap
+        # rata-rata jendela yang disegarkan sekali per SPEED_WINDOW
+        self.speed_stats.add(timestamp, self.instant_speed_kmh)
+        if timestamp - self._last_speed_update_time >= SPEED_WINDOW:
+            if self.is_tracking:
+                self.display_speed_kmh = self.speed_stats.mean()
+            else:
+                self.display_speed_kmh = 0.0
+            self._last_speed_update_time = timestamp
+
+    def process(self, frame, timestamp, frame_index=None):
+        """Proses satu frame BGR; kembalikan daftar event yang terjadi di frame ini.
+
+        `timestamp` dalam detik (jam apa pun yang monoton). Daftar yang
+        dikembalikan dipakai ulang dan dikosongkan pada panggilan berikutnya.
+        """
+        self.events.clear()
+        self.frame_index = self.frame_index + 1 if frame_index is None else frame_index
+
+        image, y_offset = self._prepare(frame)
+
+        if self._last_measure_time is None:
+            self._last_measure_time = timestamp
+            self._last_speed_update_time = timestamp
+            self._last_tracking_reset_time = timestamp
+        delta_time = timestamp - self._last_measure_time
+
+        # --- RESET PELACAKAN BERKALA ---
+        if (self.scanning and self.estimator.needs_periodic_reset
+                and timestamp - self._last_tracking_reset_time >= self.reset_interval):
+            self._stop_tracking()
+            self._last_tracking_reset_time = timestamp
+            self._emit(EVENT_TRACKING_RESET)
+
+        self.displacement = 0.0
+        instant_speed_mps = 0.0
+        skipped = False
+        if self.scanning:
+            if not self.is_tracking:
+                self._start_tracking(image, y_offset, timestamp)
+            elif self._should_skip(timestamp):
+                # Kecepatan diprediksi dari pengukuran terakhir; pergeseran
+                # frame ini terukur bersama frame berikutnya
+                skipped = True
+                self.skipped_matches += 1
+                self.metrics.count("match_skipped")
+                instant_speed_mps = self._velocity_px / self.pixels_per_meter
+            else:
+                instant_speed_mps = self._track(image, y_offset, timestamp, delta_time)
+        if skipped:
+            self._skip_run += 1
+        else:
+            self._skip_run = 0
+            self._last_measure_time = timestamp
+
+        self.instant_speed_kmh = instant_speed_mps * 3.6
+        self._update_speed(timestamp)
+        return self.events
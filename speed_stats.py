@@ -0,0 +1,358 @@
+# speed_stats.py (Statistik Kecepatan Bergulir O(1) dan Log Biner Per Frame)
+#
+# RollingSpeedStats menggantikan deque (waktu, kecepatan) yang dijumlah ulang
+# dengan generator setiap detik. SpeedLog menyimpan setiap frame ke file biner
+# append-only agar kecepatan selama satu shift bisa dianalisis tanpa parsing
+# output print. Ringkasan atau ekspor CSV dari file log:
+#   python speed_stats.py kecepatan.spdlog
+#   python speed_stats.py kecepatan.spdlog --csv kecepatan.csv
+
+import argparse
+import json
+import math
+import os
+from collections import deque
+
+import numpy as np
+
+DEFAULT_WINDOW = 1.0            # Detik
+DEFAULT_EWMA_TAU = 1.0          # Konstanta waktu EWMA (detik)
+DEFAULT_HIST_MAX_KMH = 50.0     # Batas atas histogram persentil (di atasnya masuk bin terakhir)
+DEFAULT_HIST_BINS = 1000        # Resolusi persentil = HIST_MAX / BINS (0.05 km/jam)
+MEAN_EPSILON = 1e-9             # Rata-rata jendela di bawah ini dianggap nol (sisa pembulatan)
+
+
+class _Histogram:
+    # Sketsa persentil: jumlah sampel per bin lebar tetap
+    def __init__(self, max_value, bins):
+        self.max_value = max_value
+        self.bins = bins
+        self.scale = bins / max_value
+        self.counts = np.zeros(bins + 1, dtype=np.int64)  # Bin terakhir = >= max_value
+        self.total = 0
+
+    def bin(self, value):
+        return min(self.bins, max(0, int(value * self.scale)))
+
+    def add(self, index, n=1):
+        self.counts[index] += n
+        self.total += n
+
+    def percentile(self, p):
+        if self.total == 0:
+            return None
+        target = max(1, math.ceil(p / 100.0 * self.total))
+        index = int(np.searchsorted(np.cumsum(self.counts), target))
+        # Nilai tengah bin (bin overflow dilaporkan sebagai batas atas)
+        return min(self.max_value, (index + 0.5) / self.scale)
+
+
+class _MonotonicDeque:
+    # Min (atau max) jendela bergulir, amortized O(1) per sampel
+    def __init__(self, keep_smaller):
+        self.items = deque()
+        self.keep_smaller = keep_smaller
+
+    def push(self, seq, value):
+        items = self.items
+        if self.keep_smaller:
+            while items and items[-1][1] >= value:
+                items.pop()
+        else:
+            while items and items[-1][1] <= value:
+                items.pop()
+        items.append((seq, value))
+
+    def evict_through(self, seq):
+        while self.items and self.items[0][0] <= seq:
+            self.items.popleft()
+
+    def value(self):
+        return self.items[0][1] if self.items else None
+
+
+class RollingSpeedStats:
+    """Statistik kecepatan di jendela waktu bergulir plus agregat sepanjang sesi.
+
+    Setiap `add()` bekerja dalam waktu konstan (amortized): jumlah berjalan
+    untuk rata-rata, deque monoton untuk min/max, EWMA berbasis waktu, dan
+    histogram bin tetap untuk persentil. Agregat total (`total_*`) tidak
+    pernah dikurangi dan dipakai untuk ringkasan satu shift.
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW, ewma_tau=DEFAULT_EWMA_TAU,
+                 hist_max_kmh=DEFAULT_HIST_MAX_KMH, hist_bins=DEFAULT_HIST_BINS):
+        self.window = window
+        self.ewma_tau = ewma_tau
+        self._hist_args = (hist_max_kmh, hist_bins)
+        self.total_hist = _Histogram(hist_max_kmh, hist_bins)
+        self.reset()
+
+    def reset(self):
+        """Kosongkan jendela dan EWMA (agregat total tetap)."""
+        self._samples = deque()  # (seq, timestamp, value, bin)
+        self._seq = 0
+        self._sum = 0.0
+        self._evicted = 0        # Sampel yang dikurangkan dari _sum sejak dihitung ulang
+        self._min = _MonotonicDeque(keep_smaller=True)
+        self._max = _MonotonicDeque(keep_smaller=False)
+        self._hist = _Histogram(*self._hist_args)
+        self._ewma = None
+        self._last_time = None
+        if not hasattr(self, "total_count"):
+            self.total_count = 0
+            self.total_sum = 0.0
+            self.total_min = None
+            self.total_max = None
+
+    def add(self, timestamp, value):
+        # Buang sampel yang sudah keluar dari jendela
+        while self._samples and timestamp - self._samples[0][1] > self.window:
+            seq, _, old_value, old_index = self._samples.popleft()
+            self._sum -= old_value
+            self._evicted += 1
+            self._hist.add(old_index, -1)
+            self._min.evict_through(seq)
+            self._max.evict_through(seq)
+        # Tambah-kurang float membuat _sum bergeser; hitung ulang saat jendela
+        # kosong (gratis) atau setelah seluruh isi jendela berganti (O(1) amortisasi)
+        if not self._samples:
+            self._sum = 0.0
+            self._evicted = 0
+        elif self._evicted >= len(self._samples):
+            self._sum = math.fsum(sample[2] for sample in self._samples)
+            self._evicted = 0
+
+        self._seq += 1
+        index = self._hist.bin(value)
+        self._samples.append((self._seq, timestamp, value, index))
+        self._sum += value
+        self._min.push(self._seq, value)
+        self._max.push(self._seq, value)
+        self._hist.add(index)
+
+        # EWMA berbasis waktu: bobot sampel baru bergantung pada selang antar frame
+        if self._ewma is None:
+            self._ewma = value
+        else:
+            dt = max(0.0, timestamp - self._last_time)
+            alpha = 1.0 - math.exp(-dt / self.ewma_tau) if self.ewma_tau > 0 else 1.0
+            self._ewma += alpha * (value - self._ewma)
+        self._last_time = timestamp
+
+        self.total_count += 1
+        self.total_sum += value
+        self.total_min = value if self.total_min is None else min(self.total_min, value)
+        self.total_max = value if self.total_max is None else max(self.total_max, value)
+        self.total_hist.add(self.total_hist.bin(value))
+
+    # --- STATISTIK JENDELA ---
+    def __len__(self):
+        return len(self._samples)
+
+    def mean(self):
+        if not self._samples:
+            return 0.0
+        mean = _clamp(self._sum / len(self._samples), self.min(), self.max())
+        # Sisa pembulatan float (mis. -1e-17) jangan tampil sebagai "-0.00"
+        return 0.0 if abs(mean) < MEAN_EPSILON else mean
+
+    def ewma(self):
+        return self._ewma if self._ewma is not None else 0.0
+
+    def min(self):
+        return self._min.value()
+
+    def max(self):
+        return self._max.value()
+
+    def percentile(self, p):
+        return _clamp(self._hist.percentile(p), self.min(), self.max())
+
+    # --- CHECKPOINT ---
+    def state_dict(self):
+        return {
+            "samples": np.array(self._samples, dtype=np.float64).reshape(-1, 4),
+            "min": np.array(self._min.items, dtype=np.float64).reshape(-1, 2),
+            "max": np.array(self._max.items, dtype=np.float64).reshape(-1, 2),
+            "hist": self._hist.counts.copy(),
+            "total_hist": self.total_hist.counts.copy(),
+            "seq": self._seq,
+            "sum": self._sum,
+            "evicted": self._evicted,
+            "ewma": self._ewma,
+            "last_time": self._last_time,
+            "total_count": self.total_count,
+            "total_sum": self.total_sum,
+            "total_min": self.total_min,
+            "total_max": self.total_max,
+        }
+
+    def load_state(self, state):
+        self._samples = deque((int(s), t, v, int(b)) for s, t, v, b in state["samples"])
+        self._min.items = deque((int(s), v) for s, v in state["min"])
+        self._max.items = deque((int(s), v) for s, v in state["max"])
+        self._hist.counts[:] = state["hist"]
+        self._hist.total = len(self._samples)
+        self.total_hist.counts[:] = state["total_hist"]
+        self.total_hist.total = state["total_count"]
+        self._seq = state["seq"]
+        self._sum = state["sum"]
+        self._evicted = state.get("evicted", 0)
+        self._ewma = state["ewma"]
+        self._last_time = state["last_time"]
+        self.total_count = state["total_count"]
+        self.total_sum = state["total_sum"]
+        self.total_min = state["total_min"]
+        self.total_max = state["total_max"]
+
+    # --- AGREGAT SESI ---
+    def summary(self):
+        return {
+            "count": self.total_count,
+            "mean": self.total_sum / self.total_count if self.total_count else None,
+            "min": self.total_min,
+            "max": self.total_max,
+            "p50": _clamp(self.total_hist.percentile(50), self.total_min, self.total_max),
+            "p95": _clamp(self.total_hist.percentile(95), self.total_min, self.total_max),
+            "p99": _clamp(self.total_hist.percentile(99), self.total_min, self.total_max),
+        }
+
+
+def _clamp(value, low, high):
+    # Nilai tengah bin bisa sedikit di luar rentang sampel yang sebenarnya
+    if value is None:
+        return None
+    return min(max(value, low), high)
+
+
+def format_ringkasan(summary):
+    # Satu baris ringkasan agregat sesi untuk dicetak di akhir program
+    if not summary["count"]:
+        return "Tidak ada sampel kecepatan."
+    return (f"Kecepatan sesi ({summary['count']} frame): rata-rata {summary['mean']:.2f}, "
+            f"p50 {summary['p50']:.2f}, p95 {summary['p95']:.2f}, maks {summary['max']:.2f} km/jam")
+
+
+# --- LOG BINER PER FRAME ---
+# Layout file: header ASCII 256 byte (magic + JSON berisi deskripsi dtype,
+# diisi spasi), lalu record berurutan tanpa jeda. Jumlah record dihitung dari
+# ukuran file, jadi file yang terpotong karena crash tetap bisa dibaca
+# (maksimal satu blok terakhir yang belum di-flush hilang).
+LOG_MAGIC = b"SPDLOG1\n"
+LOG_HEADER_SIZE = 256
+LOG_DTYPE = np.dtype([
+    ("frame", "<i8"),
+    ("timestamp", "<f8"),       # Detik (timestamp video atau jam monotonic)
+    ("displacement", "<f4"),    # Pergeseran horizontal bertanda (piksel)
+    ("confidence", "<f4"),      # Nilai match / fraksi inlier optical flow
+    ("speed_kmh", "<f4"),       # Kecepatan sesaat
+    ("avg_speed_kmh", "<f4"),   # Kecepatan rata-rata yang ditampilkan
+    ("tracking", "u1"),
+])
+DEFAULT_LOG_BLOCK = 4096        # Record per blok yang di-flush ke disk
+
+
+class SpeedLog:
+    """Penulis log biner append-only; record ditampung di blok praalokasi."""
+
+    def __init__(self, path, block_size=DEFAULT_LOG_BLOCK, append=False):
+        self.path = path
+        exists = append and os.path.exists(path) and os.path.getsize(path) >= LOG_HEADER_SIZE
+        if exists:
+            _check_header(path)
+        self._file = open(path, "ab" if exists else "wb")
+        if not exists:
+            self._file.write(_make_header())
+        self._block = np.zeros(block_size, dtype=LOG_DTYPE)
+        self._fill = 0
+        self.records = 0
+
+    def append(self, frame, timestamp, displacement, confidence, speed_kmh, avg_speed_kmh, tracking):
+        self._block[self._fill] = (frame, timestamp, displacement, confidence, speed_kmh, avg_speed_kmh, tracking)
+        self._fill += 1
+        self.records += 1
+        if self._fill == len(self._block):
+            self.flush()
+
+    def flush(self):
+        if self._fill:
+            self._block[:self._fill].tofile(self._file)
+            self._fill = 0
+        self._file.flush()
+
+    def size(self):
+        """Flush lalu kembalikan ukuran file (byte), untuk dicatat di checkpoint."""
+        self.flush()
+        return self._file.tell()
+
+    def truncate(self, size):
+        # Buang record setelah posisi checkpoint; record baru ditambahkan sesudahnya
+        self.flush()
+        if size > self._file.tell():
+            raise ValueError(f"Posisi {size} melewati akhir log ({self._file.tell()} byte)")
+        self._file.truncate(max(LOG_HEADER_SIZE, size))
+        self._file.seek(0, os.SEEK_END)
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+
+def _make_header():
+    meta = json.dumps({"dtype": LOG_DTYPE.descr}).encode()
+    header = LOG_MAGIC + meta + b"\n"
+    if len(header) > LOG_HEADER_SIZE:
+        raise ValueError("Header log terlalu besar")
+    return header.ljust(LOG_HEADER_SIZE, b" ")
+
+
+def _check_header(path):
+    with open(path, "rb") as f:
+        header = f.read(LOG_HEADER_SIZE)
+    if not header.startswith(LOG_MAGIC):
+        raise ValueError(f"'{path}' bukan log kecepatan biner")
+    meta = json.loads(header[len(LOG_MAGIC):].split(b"\n", 1)[0])
+    dtype = np.dtype([tuple(field) for field in meta["dtype"]])
+    if dtype != LOG_DTYPE:
+        raise ValueError(f"Layout record '{path}' tidak didukung")
+    return dtype
+
+
+def baca_log(path):
+    """Buka log biner sebagai array terstruktur memory-mapped (hanya baca)."""
+    dtype = _check_header(path)
+    count = (os.path.getsize(path) - LOG_HEADER_SIZE) // dtype.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", offset=LOG_HEADER_SIZE, shape=(count,))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ringkasan atau ekspor log kecepatan biner.")
+    parser.add_argument("log", help="File log biner (.spdlog)")
+    parser.add_argument("--csv", help="Ekspor semua record ke file CSV ini")
+    args = parser.parse_args()
+
+    records = baca_log(args.log)
+    print(f"{len(records)} record di '{args.log}'")
+    if len(records) == 0:
+        return
+    duration = float(records["timestamp"][-1] - records["timestamp"][0])
+    tracking = records["tracking"].astype(bool)
+    speed = records["speed_kmh"][tracking & (records["speed_kmh"] > 0)]
+    print(f"Durasi {duration:.1f} s, frame {records['frame'][0]}-{records['frame'][-1]}, "
+          f"melacak {tracking.mean():.1%} frame")
+    if len(speed):
+        print(f"Kecepatan (saat bergerak): rata-rata {speed.mean():.2f}, p50 {np.percentile(speed, 50):.2f}, "
+              f"p95 {np.percentile(speed, 95):.2f}, maks {speed.max():.2f} km/jam")
+
+    if args.csv:
+        header = ",".join(LOG_DTYPE.names)
+        fmt = ["%d", "%.6f", "%.3f", "%.4f", "%.4f", "%.4f", "%d"]
+        np.savetxt(args.csv, records, fmt=fmt, delimiter=",", header=header, comments="")
+        print(f"CSV disimpan di: {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+# stage_metrics.py (Timer Per Tahap untuk Loop Utama)
+#
+# Pemakaian di loop:
+#   t = metrics.now()
+#   res = cv2.matchTemplate(...)
+#   metrics.record("match", t)
+#   metrics.count("tracking_fail")
+#   metrics.maybe_flush()
+#
+# Jika tidak diaktifkan, `buat_metrics()` mengembalikan NullStageMetrics yang
+# semua metodenya kosong, sehingga biayanya hanya satu pemanggilan fungsi.
+
+import bisect
+import json
+import os
+import time
+
+METRICS_FORMATS = ("jsonl", "prom")
+DEFAULT_FLUSH_INTERVAL = 10.0
+
+# Batas atas bucket histogram (detik), kira-kira logaritmik 10 us .. 1 s
+BUCKET_BOUNDS = (
+    0.00001, 0.00002, 0.00005,
+    0.0001, 0.0002, 0.0005,
+    0.001, 0.002, 0.005,
+    0.01, 0.02, 0.05,
+    0.1, 0.2, 0.5,
+    1.0,
+)
+
+
+class _StageHistogram:
+    def __init__(self):
+        n = len(BUCKET_BOUNDS) + 1  # Bucket terakhir = +Inf
+        self.total_buckets = [0] * n
+        self.total_count = 0
+        self.total_sum = 0.0
+        self.reset_window()
+
+    def reset_window(self):
+        self.window_buckets = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.window_count = 0
+        self.window_sum = 0.0
+        self.window_max = 0.0
+
+    def add(self, seconds):
+        i = bisect.bisect_left(BUCKET_BOUNDS, seconds)
+        self.total_buckets[i] += 1
+        self.total_count += 1
+        self.total_sum += seconds
+        self.window_buckets[i] += 1
+        self.window_count += 1
+        self.window_sum += seconds
+        if seconds > self.window_max:
+            self.window_max = seconds
+
+    def window_percentile(self, p):
+        # Perkiraan dari histogram: interpolasi linear di dalam bucket tempat
+        # persentil jatuh (seperti histogram_quantile di Prometheus)
+        if self.window_count == 0:
+            return None
+        target = p / 100.0 * self.window_count
+        running = 0
+        for i, c in enumerate(self.window_buckets):
+            if c and running + c >= target:
+                lower = BUCKET_BOUNDS[i - 1] if i > 0 else 0.0
+                upper = BUCKET_BOUNDS[i] if i < len(BUCKET_BOUNDS) else self.window_max
+                value = lower + (upper - lower) * (target - running) / c
+                return min(value, self.window_max)
+            running += c
+        return self.window_max
+
+
+class StageMetrics:
+    """Histogram waktu per tahap dan penghitung kejadian, ditulis berkala.
+
+    Format `jsonl` menambahkan satu baris JSON per interval (statistik jendela
+    interval itu). Format `prom` menimpa file teks gaya Prometheus berisi
+    histogram kumulatif, cocok untuk node_exporter textfile collector.
+    """
+
+    def __init__(self, output_path, fmt="jsonl", interval_s=DEFAULT_FLUSH_INTERVAL, prefix="slitscan"):
+        if fmt not in METRICS_FORMATS:
+            raise ValueError(f"Format metrik tidak dikenal: {fmt!r} (pilih {METRICS_FORMATS})")
+        self.enabled = True
+        self.output_path = output_path
+        self.fmt = fmt
+        self.interval_s = interval_s
+        self.prefix = prefix
+        self.stages = {}
+        self.counters = {}
+        self._window_counters = {}
+        self._last_flush = time.perf_counter()
+
+    # --- PENGUKURAN ---
+    def now(self):
+        return time.perf_counter()
+
+    def record(self, stage, start):
+        elapsed = time.perf_counter() - start
+        hist = self.stages.get(stage)
+        if hist is None:
+            hist = self.stages[stage] = _StageHistogram()
+        hist.add(elapsed)
+        return elapsed
+
+    def count(self, event, n=1):
+        self.counters[event] = self.counters.get(event, 0) + n
+        self._window_counters[event] = self._window_counters.get(event, 0) + n
+
+    # --- PENULISAN ---
+    def maybe_flush(self):
+        if time.perf_counter() - self._last_flush >= self.interval_s:
+            self.flush()
+
+    def flush(self):
+        self._last_flush = time.perf_counter()
+        if self.fmt == "jsonl":
+            self._write_jsonl()
+        else:
+            self._write_prometheus()
+        for hist in self.stages.values():
+            hist.reset_window()
+        self._window_counters = {}
+
+    def _write_jsonl(self):
+        def ms(v):
+            return None if v is None else round(v * 1000, 4)
+
+        stages = {}
+        for name, hist in self.stages.items():
+            if hist.window_count == 0:
+                continue
+            stages[name] = {
+                "count": hist.window_count,
+                "mean_ms": ms(hist.window_sum / hist.window_count),
+                "p50_ms": ms(hist.window_percentile(50)),
+                "p90_ms": ms(hist.window_percentile(90)),
+                "p99_ms": ms(hist.window_percentile(99)),
+                "max_ms": ms(hist.window_max),
+            }
+        line = {
+            "time": time.time(),
+            "interval_s": self.interval_s,
+            "stages": stages,
+            "events": dict(self._window_counters),
+            "events_total": dict(self.counters),
+        }
+        with open(self.output_path, "a") as f:
+            f.write(json.dumps(line) + "\n")
+
+    def _write_prometheus(self):
+        lines = [f"# TYPE {self.prefix}_stage_seconds histogram"]
+        for name, hist in sorted(self.stages.items()):
+            running = 0
+            for bound, c in zip(BUCKET_BOUNDS, hist.total_buckets):
+                running += c
+                lines.append(f'{self.prefix}_stage_seconds_bucket{{stage="{name}",le="{bound:g}"}} {running}')
+            lines.append(f'{self.prefix}_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {hist.total_count}')
+            lines.append(f'{self.prefix}_stage_seconds_sum{{stage="{name}"}} {hist.total_sum:.9f}')
+            lines.append(f'{self.prefix}_stage_seconds_count{{stage="{name}"}} {hist.total_count}')
+        lines.append(f"# TYPE {self.prefix}_events_total counter")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f'{self.prefix}_events_total{{event="{name}"}} {value}')
+
+        # Tulis ke file sementara lalu rename agar scraper tidak membaca file setengah jadi
+        tmp_path = self.output_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, self.output_path)
+
+    def close(self):
+        self.flush()
+
+
+class NullStageMetrics:
+    """Pengganti StageMetrics saat metrik dimatikan; semua metode kosong."""
+
+    enabled = False
+
+    def now(self):
+        return 0.0
+
+    def record(self, stage, start):
+        return 0.0
+
+    def count(self, event, n=1):
+        pass
+
+    def maybe_flush(self):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def buat_metrics(output_path=None, fmt=None, interval_s=DEFAULT_FLUSH_INTERVAL, prefix="slitscan"):
+    if not output_path:
+        return NullStageMetrics()
+    if fmt is None:
+        fmt = "prom" if output_path.endswith(".prom") else "jsonl"
+    return StageMetrics(output_path, fmt, interval_s, prefix)
+
+
+def tambah_argumen_metrics(parser):
+    # Argumen baris perintah yang sama untuk pano.py, panoVideo.py, dan kecepatan.py
+    parser.add_argument("--metrics", help="Aktifkan timer per tahap dan tulis ke file ini "
+                                          "(.prom = teks Prometheus, selain itu JSON lines)")
+    parser.add_argument("--metrics-format", choices=METRICS_FORMATS, default=None,
+                        help="Paksa format file metrik")
+    parser.add_argument("--metrics-interval", type=float, default=DEFAULT_FLUSH_INTERVAL,
+                        help="Interval penulisan metrik (detik)")
@@ -0,0 +1,249 @@
+# telemetry_ring.py (Ring Telemetri Kecepatan di Shared Memory, Tanpa Lock)
+#
+# Layout (little-endian), versi 1:
+#
+#   HEADER (64 byte)
+#     0  u32  magic        = 0x52445053 ("SPDR")
+#     4  u32  version      = 1
+#     8  u32  header_size  = 64
+#    12  u32  record_size  = 48
+#    16  u32  capacity     (jumlah slot record)
+#    20  u32  waiters      (jumlah pembaca yang sedang tidur di futex write_seq)
+#    24  u64  write_seq    (jumlah record yang sudah dipublikasikan; 32 bit
+#                           bawahnya dipakai sebagai kata futex di Linux)
+#    32  ...  padding
+#
+#   RECORD ke-n (n mulai dari 1) ada di slot (n - 1) % capacity (48 byte)
+#     0  u64  seq          (2n-1 = sedang ditulis, 2n = lengkap)
+#     8  u64  timestamp_ns (jam monotonic, CLOCK_MONOTONIC di Linux)
+#    16  u64  frame_index
+#    24  f64  speed_kmh
+#    32  f64  confidence  (nilai match template)
+#    40  u64  reserved
+#
+# Penulis tidak pernah menunggu pembaca (protokol seqlock per slot). Pembaca
+# membaca seq sebelum dan sesudah payload: jika berbeda berarti terbaca saat
+# sedang ditulis (torn read), jika lebih besar dari yang diharapkan berarti
+# record sudah tertimpa (missed). main_reader.cpp membaca layout yang sama.
+#
+# Di Linux, pembaca yang tidak ingin polling menaikkan `waiters` lalu tidur
+# dengan FUTEX_WAIT pada write_seq. Penulis memanggil FUTEX_WAKE setelah
+# setiap publish tanpa melihat `waiters`: dari Python tidak ada fence antara
+# simpan write_seq dan baca `waiters`, sehingga pembaca yang baru akan tidur
+# bisa terlewat dan baru bangun saat timeout. FUTEX_WAKE tanpa pembaca yang
+# tidur hanya satu syscall singkat, jadi penulis tetap tidak pernah menunggu.
+# `waiters` tetap diisi pembaca sebagai informasi diagnostik.
+
+import ctypes
+import os
+import struct
+import sys
+import time
+from multiprocessing import shared_memory
+
+RING_SHM_NAME = "speed_ring"
+RING_MAGIC = 0x52445053
+RING_VERSION = 1
+HEADER_SIZE = 64
+RECORD_SIZE = 48
+DEFAULT_CAPACITY = 1024
+SPIN_TIMEOUT = 0.1  # Detik; slot yang lebih lama "sedang ditulis" dianggap ditinggal penulis
+
+_HEADER_STRUCT = struct.Struct("<IIIIII")
+_WRITE_SEQ_OFFSET = 24
+_U64 = struct.Struct("<Q")
+_PAYLOAD_STRUCT = struct.Struct("<QQdd")  # timestamp_ns, frame_index, speed_kmh, confidence
+_PAYLOAD_OFFSET = 8
+
+
+def ring_size(capacity):
+    return HEADER_SIZE + capacity * RECORD_SIZE
+
+
+# --- FUTEX (HANYA LINUX) ---
+_FUTEX_WAKE = 1
+_SYS_FUTEX = {"x86_64": 202, "aarch64": 98, "i386": 240, "i686": 240, "armv7l": 240}
+
+
+def _futex_waker():
+    # Kembalikan fungsi wake(addr), atau None jika futex tidak tersedia
+    if not sys.platform.startswith("linux"):
+        return None
+    nr = _SYS_FUTEX.get(os.uname().machine)
+    if nr is None:
+        return None
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+    except OSError:
+        return None
+    syscall = libc.syscall
+    int_max = 0x7FFFFFFF
+    return lambda addr: syscall(nr, ctypes.c_void_p(addr), _FUTEX_WAKE, int_max, None, None, 0)
+
+
+# --- BLOK SHARED MEMORY (DIPAKAI JUGA OLEH frame_share.py) ---
+def buat_shm(name, size):
+    """Buat blok shared memory berisi nol; sisa penulis sebelumnya diganti."""
+    try:
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        print(f"Blok Shared Memory '{name}' dibuat.")
+    except FileExistsError:
+        # Sisa dari penulis sebelumnya yang tidak sempat dibersihkan
+        old = shared_memory.SharedMemory(name=name, create=False)
+        old.close()
+        old.unlink()
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        print(f"Blok Shared Memory '{name}' lama diganti.")
+    shm.buf[:size] = bytes(size)
+    return shm
+
+
+def buka_shm(name):
+    """Buka blok milik penulis lain; pembaca tidak ikut meng-unlink saat keluar."""
+    try:
+        return shared_memory.SharedMemory(name=name, create=False, track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name, create=False)
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        return shm
+
+
+class TelemetryWriter:
+    """Penulis ring telemetri; `publish()` tidak pernah menunggu pembaca."""
+
+    def __init__(self, name=RING_SHM_NAME, capacity=DEFAULT_CAPACITY):
+        if capacity <= 0:
+            raise ValueError("capacity harus lebih besar dari 0")
+        self.shm = buat_shm(name, ring_size(capacity))
+        self.name = name
+        self.capacity = capacity
+        self.buf = self.shm.buf
+        self.write_seq = 0
+        # Header ditulis terakhir: magic menandakan ring siap dibaca
+        _HEADER_STRUCT.pack_into(self.buf, 0, 0, RING_VERSION, HEADER_SIZE, RECORD_SIZE, capacity, 0)
+        _U64.pack_into(self.buf, _WRITE_SEQ_OFFSET, 0)
+        struct.pack_into("<I", self.buf, 0, RING_MAGIC)
+
+        self._futex_wake = _futex_waker()
+        self._futex_addr = None
+        if self._futex_wake is not None:
+            # Simpan alamatnya saja; objek ctypes dilepas agar shm.close() tetap bisa
+            word = ctypes.c_uint32.from_buffer(self.buf, _WRITE_SEQ_OFFSET)
+            self._futex_addr = ctypes.addressof(word)
+            del word
+
+    def publish(self, speed_kmh, confidence=0.0, frame_index=0, timestamp_ns=None):
+        if timestamp_ns is None:
+            timestamp_ns = time.monotonic_ns()
+        n = self.write_seq + 1
+        offset = HEADER_SIZE + ((n - 1) % self.capacity) * RECORD_SIZE
+
+        _U64.pack_into(self.buf, offset, 2 * n - 1)  # Slot sedang ditulis
+        _PAYLOAD_STRUCT.pack_into(self.buf, offset + _PAYLOAD_OFFSET,
+                                  timestamp_ns, frame_index, speed_kmh, confidence)
+        _U64.pack_into(self.buf, offset, 2 * n)      # Slot lengkap
+        _U64.pack_into(self.buf, _WRITE_SEQ_OFFSET, n)
+        self.write_seq = n
+        # Selalu bangunkan: cek `waiters` tanpa fence bisa melewatkan pembaca yang baru tidur
+        if self._futex_addr is not None:
+            self._futex_wake(self._futex_addr)
+        return n
+
+    def close(self, unlink=True):
+        self._futex_addr = None
+        self.buf = None
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+class TelemetryReader:
+    """Pembaca ring telemetri yang mendeteksi torn read dan record yang terlewat."""
+
+    def __init__(self, name=RING_SHM_NAME, start_at_latest=True):
+        self.shm = buka_shm(name)
+        self.buf = self.shm.buf
+        magic, version, header_size, record_size, capacity, _ = _HEADER_STRUCT.unpack_from(self.buf, 0)
+        if magic != RING_MAGIC:
+            self.close()
+            raise ValueError(f"Shared memory '{name}' bukan ring telemetri (magic {magic:#x})")
+        if version != RING_VERSION or header_size != HEADER_SIZE or record_size != RECORD_SIZE:
+            self.close()
+            raise ValueError(f"Versi/layout ring tidak didukung: versi {version}, "
+                             f"header {header_size}, record {record_size}")
+        self.capacity = capacity
+        self.next_seq = self.write_seq() + 1 if start_at_latest else 1
+        self.missed = 0
+        self.torn_reads = 0
+
+    def write_seq(self):
+        return _U64.unpack_from(self.buf, _WRITE_SEQ_OFFSET)[0]
+
+    def _read_record(self, n):
+        # Kembalikan (status, record); status: "ok", "missed", atau "pending"
+        offset = HEADER_SIZE + ((n - 1) % self.capacity) * RECORD_SIZE
+        deadline = time.monotonic() + SPIN_TIMEOUT
+        while True:
+            seq_before = _U64.unpack_from(self.buf, offset)[0]
+            if seq_before > 2 * n:
+                return "missed", None
+            if seq_before < 2 * n:
+                if seq_before == 2 * n - 1 and time.monotonic() < deadline:
+                    continue  # Penulis sedang di tengah slot ini, coba lagi
+                return "pending", None  # Belum ditulis, atau penulis berhenti di tengah slot
+            payload = _PAYLOAD_STRUCT.unpack_from(self.buf, offset + _PAYLOAD_OFFSET)
+            seq_after = _U64.unpack_from(self.buf, offset)[0]
+            if seq_after == seq_before:
+                timestamp_ns, frame_index, speed_kmh, confidence = payload
+                return "ok", {"seq": n, "timestamp_ns": timestamp_ns, "frame_index": frame_index,
+                              "speed_kmh": speed_kmh, "confidence": confidence}
+            self.torn_reads += 1
+
+    def poll(self):
+        """Ambil semua record baru sejak panggilan sebelumnya (urut seq)."""
+        records = []
+        latest = self.write_seq()
+        # Record yang sudah pasti tertimpa dilewati langsung
+        oldest_available = latest - self.capacity + 1
+        if self.next_seq < oldest_available:
+            self.missed += oldest_available - self.next_seq
+            self.next_seq = oldest_available
+
+        while self.next_seq <= latest:
+            status, record = self._read_record(self.next_seq)
+            if status == "pending":
+                break
+            if status == "missed":
+                self.missed += 1
+            else:
+                records.append(record)
+            self.next_seq += 1
+        return records
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+
+
+def main():
+    reader = TelemetryReader()
+    print(f"Terhubung ke ring '{RING_SHM_NAME}' ({reader.capacity} slot).")
+    try:
+        while True:
+            for record in reader.poll():
+                latency_ms = (time.monotonic_ns() - record["timestamp_ns"]) / 1e6
+                print(f"#{record['seq']} frame {record['frame_index']}: {record['speed_kmh']:.2f} km/jam "
+                      f"(match {record['confidence']:.2f}, latensi {latency_ms:.2f} ms)")
+            time.sleep(0.01)
+    except KeyboardInterrupt:
+        print(f"\nSelesai. Terlewat: {reader.missed}, torn read: {reader.torn_reads}")
+    finally:
+        reader.close()
+
+
+if __name__ == "__main__":
+    main()
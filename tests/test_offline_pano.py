@@ -0,0 +1,98 @@
+# test_offline_pano.py (Uji ekstrak_strip dengan capture tiruan)
+#
+#   python -m pytest tests
+#   python -m unittest discover tests
+
+import unittest
+from unittest import mock
+
+import cv2
+import numpy as np
+
+import offline_pano
+
+FRAME_COUNT = 1000
+FRAME_SIZE = (32, 8)  # (W, H)
+
+
+class StubCapture:
+    """VideoCapture tiruan: piksel frame ke-i bernilai i % 256.
+
+    `overshoot` frame ditambahkan ke setiap seek maju (atau ke semua seek bila
+    `overshoot_backward`), meniru backend yang mendarat setelah frame tujuan.
+    """
+
+    opened = 0
+
+    def __init__(self, overshoot=0, overshoot_backward=False):
+        StubCapture.opened += 1
+        self.overshoot = overshoot
+        self.overshoot_backward = overshoot_backward
+        self.pos = 0
+
+    def set(self, prop, value):
+        assert prop == cv2.CAP_PROP_POS_FRAMES
+        target = int(value)
+        if target > self.pos or self.overshoot_backward:
+            target += self.overshoot
+        self.pos = min(target, FRAME_COUNT)
+        return True
+
+    def get(self, prop):
+        assert prop == cv2.CAP_PROP_POS_FRAMES
+        return float(self.pos)
+
+    def grab(self):
+        if self.pos >= FRAME_COUNT:
+            return False
+        self.pos += 1
+        return True
+
+    def read(self):
+        if self.pos >= FRAME_COUNT:
+            return False, None
+        W, H = FRAME_SIZE
+        frame = np.full((H, W, 3), self.pos % 256, dtype=np.uint8)
+        self.pos += 1
+        return True, frame
+
+    def release(self):
+        pass
+
+
+class EkstrakStripTest(unittest.TestCase):
+    CONTRIBUTING = [0, 1, 200, 201, 450]
+
+    def jalankan(self, seek_min_gap, **stub_kwargs):
+        StubCapture.opened = 0
+        columns = np.zeros(FRAME_COUNT, dtype=np.int64)
+        columns[self.CONTRIBUTING] = 1
+        shifts = np.ones(FRAME_COUNT)
+        with mock.patch.object(offline_pano.cv2, "VideoCapture",
+                               side_effect=lambda path: StubCapture(**stub_kwargs)):
+            panorama, decoded, seeks = offline_pano.ekstrak_strip(
+                "stub.avi", shifts, columns, FRAME_SIZE, capture_distance=1.0, seek_min_gap=seek_min_gap)
+        return panorama.view()[0, :, 0].tolist(), decoded, seeks
+
+    def test_seek_tepat(self):
+        values, decoded, seeks = self.jalankan(seek_min_gap=10)
+        self.assertEqual(values, [f % 256 for f in self.CONTRIBUTING])
+        self.assertEqual(decoded, len(self.CONTRIBUTING))
+        self.assertEqual(seeks, 2)
+
+    def test_seek_melewati_frame(self):
+        values, decoded, seeks = self.jalankan(seek_min_gap=10, overshoot=5)
+        self.assertEqual(values, [f % 256 for f in self.CONTRIBUTING])
+        self.assertEqual(decoded, len(self.CONTRIBUTING))
+        self.assertEqual(seeks, 1)  # Setelah meleset, sisa video dibaca berurutan
+        self.assertEqual(StubCapture.opened, 1)
+
+    def test_seek_mundur_juga_meleset(self):
+        values, decoded, seeks = self.jalankan(seek_min_gap=10, overshoot=300, overshoot_backward=True)
+        self.assertEqual(values, [f % 256 for f in self.CONTRIBUTING])
+        self.assertEqual(decoded, len(self.CONTRIBUTING))
+        self.assertEqual(StubCapture.opened, 2)  # Dibuka ulang dan di-decode dari awal
+
+
+if __name__ == "__main__":
+    unittest.main()
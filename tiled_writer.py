@@ -0,0 +1,256 @@
+# tiled_writer.py (Penulis Panorama Streaming Berbasis Tile)
+#
+# Menyimpan panorama sebagai tile PNG/TIFF berlebar tetap plus file index
+# JSON, ditulis selama pemindaian berjalan. Memori yang dipakai hanya satu
+# tile, berapa pun panjang pemindaiannya, dan tile yang sudah ditulis tetap
+# aman jika program berhenti mendadak. Contoh menyusun kembali:
+#   python tiled_writer.py folder_tile --output hasil.png
+#   python tiled_writer.py folder_tile --output potongan.png --start 5000 --end 9000
+
+import argparse
+import json
+import os
+
+import cv2
+import numpy as np
+
+INDEX_FILE = "index.json"
+INDEX_VERSION = 1
+DEFAULT_TILE_WIDTH = 1024
+TILE_FORMATS = ("png", "tiff")
+
+
+class TiledPanoramaWriter:
+    """Pengganti `PanoramaBuffer` yang mem-flush tile penuh ke disk.
+
+    Antarmukanya sama (`append`, `view`, `clear`, `width`), tetapi `view()`
+    hanya mengembalikan bagian ekor yang masih ada di memori. Kolom di tile
+    yang belum penuh baru tertulis saat `flush()` atau `close()`.
+
+    Dengan `resume=True` tile yang sudah tercatat di index folder itu
+    dipertahankan dan kolom baru ditambahkan setelahnya (lihat juga
+    `state_dict()`/`load_state()` untuk checkpoint).
+    """
+
+    def __init__(self, directory, height, channels=3, tile_width=DEFAULT_TILE_WIDTH,
+                 fmt="png", dtype=np.uint8, resume=False):
+        if fmt not in TILE_FORMATS:
+            raise ValueError(f"Format tile tidak dikenal: {fmt!r} (pilih {TILE_FORMATS})")
+        if tile_width <= 0:
+            raise ValueError("tile_width harus lebih besar dari 0")
+
+        self.directory = directory
+        self.height = height
+        self.channels = channels
+        self.tile_width = tile_width
+        self.fmt = fmt
+        self.dtype = np.dtype(dtype)
+        os.makedirs(directory, exist_ok=True)
+
+        shape = (height, tile_width) if channels == 1 else (height, tile_width, channels)
+        # Dua buffer tile bergantian: satu diisi, satu (yang baru ditulis) untuk tampilan
+        self._buffers = [np.zeros(shape, dtype=self.dtype), np.zeros(shape, dtype=self.dtype)]
+        self._active = 0
+        self._tile = self._buffers[0]
+        self._last_tile = None
+        self._fill = 0
+        self._tiles = []
+        self._flushed_width = 0
+        if resume and os.path.exists(os.path.join(directory, INDEX_FILE)):
+            self._load_index()
+        self._write_index()
+
+    def _load_index(self):
+        reader = TiledPanoramaReader(self.directory)
+        if (reader.height, reader.channels, reader.dtype) != (self.height, self.channels, self.dtype):
+            raise ValueError(f"Tile di '{self.directory}' tidak cocok dengan ukuran panorama ini")
+        self._tiles = list(reader.index["tiles"])
+        self._flushed_width = reader.width
+
+    # --- INFORMASI UKURAN ---
+    @property
+    def width(self):
+        return self._flushed_width + self._fill
+
+    def __len__(self):
+        return self.width
+
+    # --- PENAMBAHAN KOLOM ---
+    def append(self, columns):
+        if columns.ndim == self._tile.ndim - 1:
+            columns = columns[:, np.newaxis]
+        if columns.shape[0] != self.height:
+            raise ValueError(f"Tinggi kolom {columns.shape[0]} tidak sama dengan tinggi panorama {self.height}")
+
+        offset = 0
+        n = columns.shape[1]
+        while offset < n:
+            take = min(n - offset, self.tile_width - self._fill)
+            self._tile[:, self._fill:self._fill + take] = columns[:, offset:offset + take]
+            self._fill += take
+            offset += take
+            if self._fill == self.tile_width:
+                self.flush()
+
+    def flush(self):
+        """Tulis tile yang sedang diisi ke disk dan mulai tile baru."""
+        if self._fill == 0:
+            return
+        file_name = f"tile_{len(self._tiles):06d}.{self.fmt}"
+        cv2.imwrite(os.path.join(self.directory, file_name), self._tile[:, :self._fill])
+        self._tiles.append({"file": file_name, "start": self._flushed_width, "width": self._fill})
+        self._flushed_width += self._fill
+        self._write_index()
+
+        self._last_tile = self._tile[:, :self._fill]
+        self._active ^= 1
+        self._tile = self._buffers[self._active]
+        self._fill = 0
+
+    def _write_index(self):
+        index = {
+            "version": INDEX_VERSION,
+            "height": self.height,
+            "channels": self.channels,
+            "dtype": self.dtype.name,
+            "tile_width": self.tile_width,
+            "format": self.fmt,
+            "width": sum(t["width"] for t in self._tiles),
+            "tiles": [{k: t[k] for k in ("file", "start", "width")} for t in self._tiles],
+        }
+        # Tulis ke file sementara lalu rename agar index tidak pernah setengah jadi
+        tmp_path = os.path.join(self.directory, INDEX_FILE + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(index, f, indent=1)
+        os.replace(tmp_path, os.path.join(self.directory, INDEX_FILE))
+
+    def close(self):
+        self.flush()
+
+    # --- CHECKPOINT ---
+    def state_dict(self):
+        # Tile yang sudah di disk cukup dicatat lebarnya; kolom tile aktif disalin
+        return {"flushed_width": self._flushed_width, "pending": self._tile[:, :self._fill].copy()}
+
+    def load_state(self, state):
+        """Kembalikan panorama ke keadaan checkpoint (tile sesudahnya dibuang)."""
+        width = state["flushed_width"]
+        keep = [t for t in self._tiles if t["start"] + t["width"] <= width]
+        for tile in self._tiles[len(keep):]:
+            try:
+                os.remove(os.path.join(self.directory, tile["file"]))
+            except FileNotFoundError:
+                pass
+        if sum(t["width"] for t in keep) != width:
+            raise ValueError(f"Tile di '{self.directory}' tidak lengkap untuk checkpoint ({width} kolom)")
+        self._tiles = keep
+        self._flushed_width = width
+        self._last_tile = None
+        self._fill = 0
+        self._write_index()
+        if state["pending"].shape[1]:
+            self.append(state["pending"])
+
+    def clear(self):
+        """Hapus semua tile yang sudah ditulis dan mulai dari awal."""
+        for tile in self._tiles:
+            try:
+                os.remove(os.path.join(self.directory, tile["file"]))
+            except FileNotFoundError:
+                pass
+        self._tiles = []
+        self._flushed_width = 0
+        self._fill = 0
+        self._last_tile = None
+        self._write_index()
+
+    # --- AKSES HASIL ---
+    def view(self):
+        """Ekor panorama yang masih di memori (tile aktif, atau tile terakhir jika kosong)."""
+        if self._fill == 0 and self._last_tile is not None:
+            return self._last_tile
+        return self._tile[:, :self._fill]
+
+
+class TiledPanoramaReader:
+    """Membaca rentang kolom dari folder tile tanpa memuat seluruh panorama."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, INDEX_FILE)) as f:
+            self.index = json.load(f)
+        if self.index.get("version") != INDEX_VERSION:
+            raise ValueError(f"Versi index tidak didukung: {self.index.get('version')}")
+        self.height = self.index["height"]
+        self.channels = self.index["channels"]
+        self.dtype = np.dtype(self.index["dtype"])
+        self.width = self.index["width"]
+
+    def _shape(self, width):
+        if self.channels == 1:
+            return (self.height, width)
+        return (self.height, width, self.channels)
+
+    def _load_tile(self, tile):
+        flags = cv2.IMREAD_GRAYSCALE if self.channels == 1 else cv2.IMREAD_COLOR
+        image = cv2.imread(os.path.join(self.directory, tile["file"]), flags)
+        if image is None:
+            raise IOError(f"Tile '{tile['file']}' tidak bisa dibaca")
+        return image
+
+    def read_columns(self, start=0, end=None, out=None):
+        """Kembalikan kolom [start, end) sebagai array (hanya tile yang perlu dibaca)."""
+        end = self.width if end is None else min(end, self.width)
+        start = max(0, start)
+        if end <= start:
+            return np.zeros(self._shape(0), dtype=self.dtype)
+        if out is None:
+            out = np.zeros(self._shape(end - start), dtype=self.dtype)
+
+        for tile in self.index["tiles"]:
+            t0, t1 = tile["start"], tile["start"] + tile["width"]
+            if t1 <= start or t0 >= end:
+                continue
+            image = self._load_tile(tile)
+            a, b = max(start, t0), min(end, t1)
+            out[:, a - start:b - start] = image[:, a - t0:b - t0]
+        return out
+
+    def assemble(self, output_path, start=0, end=None):
+        """Susun rentang kolom menjadi satu gambar.
+
+        Kolom disalin tile demi tile ke array memory-mapped di samping file
+        keluaran, sehingga memori resident tidak bergantung pada panjang panorama.
+        """
+        end = self.width if end is None else min(end, self.width)
+        width = max(0, end - start)
+        tmp_path = output_path + ".tmp.npy"
+        mm = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=self.dtype, shape=self._shape(width))
+        try:
+            self.read_columns(start, end, out=mm)
+            ok = cv2.imwrite(output_path, mm)
+        finally:
+            del mm
+            os.remove(tmp_path)
+        return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Susun atau potong panorama dari folder tile.")
+    parser.add_argument("directory", help="Folder berisi tile dan index.json")
+    parser.add_argument("--output", required=True, help="File gambar keluaran")
+    parser.add_argument("--start", type=int, default=0, help="Kolom awal (inklusif)")
+    parser.add_argument("--end", type=int, default=None, help="Kolom akhir (eksklusif)")
+    args = parser.parse_args()
+
+    reader = TiledPanoramaReader(args.directory)
+    end = reader.width if args.end is None else min(args.end, reader.width)
+    print(f"Panorama {reader.width} kolom x {reader.height} baris, {len(reader.index['tiles'])} tile.")
+    if reader.assemble(args.output, args.start, end):
+        print(f"Kolom {args.start}-{end} disimpan di: {args.output}")
+    else:
+        print("Error: Gagal menyimpan gambar.")
+
+
+if __name__ == "__main__":
+    main()
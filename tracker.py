@@ -0,0 +1,183 @@
+# tracker.py (Pelacak Template: Strip Penuh dan Prediktif Coarse-to-Fine)
+
+from collections import deque
+
+import cv2
+
+# --- MODE PELACAK ---
+TRACKER_FULL = "full"              # Perilaku lama: matchTemplate di strip selebar frame
+TRACKER_PREDICTIVE = "predictive"  # Jendela sempit di sekitar posisi prediksi + piramida
+TRACKER_MODES = (TRACKER_FULL, TRACKER_PREDICTIVE)
+
+DEFAULT_SEARCH_MARGIN = 20      # Margin vertikal pita pencarian (piksel), sama seperti sebelumnya
+DEFAULT_WINDOW_MARGIN = 24      # Margin horizontal jendela prediktif (piksel)
+DEFAULT_PYRAMID_LEVELS = 1      # Jumlah level pyrDown untuk pencarian kasar
+DEFAULT_VELOCITY_HISTORY = 5    # Jumlah posisi terakhir untuk estimasi kecepatan
+MIN_COARSE_TEMPLATE_SIZE = 16   # Template di level kasar tidak boleh lebih kecil dari ini
+WIDEN_FACTOR = 4                # Pelebaran jendela saat confidence turun
+
+
+class TemplateTracker:
+    """Pelacak template di pita horizontal selebar frame (perilaku asli).
+
+    `match()` mengembalikan (max_val, posisi_kiri_atas) dalam koordinat frame.
+    Dengan `band_input=True`, argumen `frame` yang diberikan ke `match()`
+    sudah berupa pita pencarian saja (baris `band_y0:band_y1`), misalnya
+    pita grayscale dari mode ROI; posisi tetap dalam koordinat frame.
+
+    Jika `coarse_levels` > 0, pencarian strip penuh dilakukan dulu di level
+    piramida yang diperkecil lalu diperhalus di sekitar hasil kasar (lebih
+    murah, sedikit kurang tahan terhadap tekstur halus).
+    """
+
+    def __init__(self, frame_width, frame_height, box_size=100,
+                 search_margin=DEFAULT_SEARCH_MARGIN, confidence_threshold=0.8, band_input=False):
+        self.frame_width = frame_width
+        self.frame_height = frame_height
+        self.w = self.h = box_size
+        self.y_box_init = (frame_height - box_size) // 2
+        self.confidence_threshold = confidence_threshold
+        self.band_y0 = max(0, self.y_box_init - search_margin)
+        self.band_y1 = min(frame_height, self.y_box_init + box_size + search_margin)
+        self.band_input = band_input
+        self._result = None  # Peta korelasi strip penuh, dipakai ulang antar frame
+        self.coarse_levels = 0  # Level piramida tambahan saat beban tinggi (lihat load_governor.py)
+
+    def band(self, frame):
+        return frame if self.band_input else frame[self.band_y0:self.band_y1]
+
+    def reset(self, position=None, timestamp=None):
+        pass
+
+    def state_dict(self):
+        return {}
+
+    def load_state(self, state):
+        pass
+
+    def _match_pyramid(self, frame, template, x0, x1, levels):
+        # Cari template di frame[band, x0:x1], kasar dulu lalu halus
+        band = self.band(frame)[:, x0:x1]
+        while levels > 0 and min(self.w, self.h) >> levels < MIN_COARSE_TEMPLATE_SIZE:
+            levels -= 1
+
+        if levels == 0:
+            res = cv2.matchTemplate(band, template, cv2.TM_CCOEFF_NORMED)
+            _, max_val, _, max_loc = cv2.minMaxLoc(res)
+            return max_val, (max_loc[0] + x0, max_loc[1] + self.band_y0)
+
+        small_band, small_template = band, template
+        for _ in range(levels):
+            small_band = cv2.pyrDown(small_band)
+            small_template = cv2.pyrDown(small_template)
+        res = cv2.matchTemplate(small_band, small_template, cv2.TM_CCOEFF_NORMED)
+        _, _, _, coarse_loc = cv2.minMaxLoc(res)
+
+        # --- PENGHALUSAN DI RESOLUSI PENUH ---
+        scale = 1 << levels
+        band_h, band_w = band.shape[:2]
+        rx0 = max(0, coarse_loc[0] * scale - scale)
+        ry0 = max(0, coarse_loc[1] * scale - scale)
+        rx1 = min(band_w, coarse_loc[0] * scale + self.w + scale)
+        ry1 = min(band_h, coarse_loc[1] * scale + self.h + scale)
+        res = cv2.matchTemplate(band[ry0:ry1, rx0:rx1], template, cv2.TM_CCOEFF_NORMED)
+        _, max_val, _, max_loc = cv2.minMaxLoc(res)
+        return max_val, (max_loc[0] + rx0 + x0, max_loc[1] + ry0 + self.band_y0)
+
+    def match(self, frame, template, last_pos, timestamp):
+        if self.coarse_levels:
+            return self._match_pyramid(frame, template, 0, self.frame_width, self.coarse_levels)
+        search_area = self.band(frame)
+        self._result = cv2.matchTemplate(search_area, template, cv2.TM_CCOEFF_NORMED, result=self._result)
+        _, max_val, _, max_loc = cv2.minMaxLoc(self._result)
+        return max_val, (max_loc[0], max_loc[1] + self.band_y0)
+
+
+class PredictiveTracker(TemplateTracker):
+    """Pelacak yang hanya mencari di jendela sekitar posisi prediksi.
+
+    Posisi berikutnya diprediksi dari kecepatan (piksel/detik) beberapa
+    posisi terakhir. Pencarian dilakukan dulu di level piramida yang
+    diperkecil, lalu diperhalus di resolusi penuh pada area kecil di sekitar
+    hasil kasar. Jika confidence di bawah ambang, jendela diperlebar
+    bertahap hingga akhirnya kembali ke pencarian strip penuh.
+    """
+
+    def __init__(self, frame_width, frame_height, box_size=100,
+                 search_margin=DEFAULT_SEARCH_MARGIN, confidence_threshold=0.8, band_input=False,
+                 window_margin=DEFAULT_WINDOW_MARGIN, pyramid_levels=DEFAULT_PYRAMID_LEVELS,
+                 velocity_history=DEFAULT_VELOCITY_HISTORY):
+        if window_margin < 1:
+            # Margin 0 tidak pernah melebar (0 * WIDEN_FACTOR), loop pelebaran jadi tak berujung
+            raise ValueError("window_margin harus lebih besar dari 0")
+        if pyramid_levels < 0:
+            raise ValueError("pyramid_levels tidak boleh negatif")
+        super().__init__(frame_width, frame_height, box_size, search_margin, confidence_threshold, band_input)
+        self.window_margin = window_margin
+        self.pyramid_levels = pyramid_levels
+        self.history = deque(maxlen=velocity_history)
+
+        # --- STATISTIK ---
+        self.match_count = 0
+        self.widen_count = 0
+        self.full_search_count = 0
+
+    def reset(self, position=None, timestamp=None):
+        # Dipanggil saat pelacakan dimulai ulang; posisi awal ikut jadi riwayat
+        self.history.clear()
+        if position is not None and timestamp is not None:
+            self.history.append((timestamp, position[0]))
+
+    def state_dict(self):
+        return {"history": [list(item) for item in self.history]}
+
+    def load_state(self, state):
+        self.history.clear()
+        self.history.extend((t, x) for t, x in state["history"])
+
+    def predict_x(self, last_pos, timestamp):
+        if len(self.history) < 2:
+            return last_pos[0]
+        (t0, x0), (t1, x1) = self.history[0], self.history[-1]
+        if t1 <= t0:
+            return last_pos[0]
+        velocity = (x1 - x0) / (t1 - t0)
+        return int(round(last_pos[0] + velocity * (timestamp - t1)))
+
+    def _match_window(self, frame, template, x0, x1):
+        return self._match_pyramid(frame, template, x0, x1, self.pyramid_levels + self.coarse_levels)
+
+    def match(self, frame, template, last_pos, timestamp):
+        self.match_count += 1
+        predicted_x = self.predict_x(last_pos, timestamp)
+        margin = self.window_margin if len(self.history) >= 2 else self.window_margin * WIDEN_FACTOR
+
+        while True:
+            x0 = max(0, predicted_x - margin)
+            x1 = min(self.frame_width, predicted_x + self.w + margin)
+            if x0 == 0 and x1 == self.frame_width:
+                self.full_search_count += 1
+                max_val, pos = TemplateTracker.match(self, frame, template, last_pos, timestamp)
+                break
+            if x1 - x0 >= self.w:
+                max_val, pos = self._match_window(frame, template, x0, x1)
+                if max_val >= self.confidence_threshold:
+                    break
+            self.widen_count += 1
+            margin *= WIDEN_FACTOR
+
+        if max_val >= self.confidence_threshold:
+            if self.history and timestamp <= self.history[-1][0]:
+                self.history.clear()
+            self.history.append((timestamp, pos[0]))
+        return max_val, pos
+
+
+def buat_tracker(mode, frame_width, frame_height, box_size=100, confidence_threshold=0.8, band_input=False):
+    if mode == TRACKER_FULL:
+        return TemplateTracker(frame_width, frame_height, box_size,
+                               confidence_threshold=confidence_threshold, band_input=band_input)
+    if mode == TRACKER_PREDICTIVE:
+        return PredictiveTracker(frame_width, frame_height, box_size,
+                                 confidence_threshold=confidence_threshold, band_input=band_input)
+    raise ValueError(f"Mode pelacak tidak dikenal: {mode!r} (pilih {TRACKER_MODES})")